@@ -0,0 +1,203 @@
+"""Async read views of the catalog and the show sessions.
+
+Under an ASGI server these serve the list and retrieve requests of shows,
+sessions, domes and themes as coroutines: the rows are read with the
+async ORM (aiterator, aget) instead of tying up a worker thread per
+request. JWT authentication and the throttles have no async API, they
+run together in one sync_to_async call. Filtersets, keyset
+paginators, sparse fieldsets, serializers and conditional GET are those
+of the viewsets, so are the responses; only the catalog cache is not
+consulted. Writes stay on the sync viewsets.
+
+Django has no async database backends yet, the async ORM still runs the
+queries in the thread of sync_to_async. What the event loop gains is
+that requests waiting on each other do not each hold a thread.
+"""
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.http import Http404, HttpResponse
+from drf_spectacular.utils import extend_schema
+from rest_framework import generics
+
+from planetarium.conditional import ConditionalGetMixin
+from planetarium.fieldsets import SparseFieldsetViewMixin
+from planetarium.filters import (
+    AstronomyShowFilter,
+    PlanetariumDomeFilter,
+    ShowSessionFilter,
+    ShowThemeFilter,
+)
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    ShowSession,
+    ShowTheme,
+)
+from planetarium.pagination import (
+    AstronomyShowPagination,
+    PlanetariumDomePagination,
+    ShowSessionPagination,
+    ShowThemePagination,
+)
+from planetarium.permissions import IsAdminOrIfAuthenticatedReadOnly
+from planetarium.serializers import (
+    AstronomyShowCreateSerializer,
+    AstronomyShowListSerializer,
+    PlanetariumDomeCreateSerializer,
+    PlanetariumDomeListSerializer,
+    ShowSessionCreateSerializer,
+    ShowSessionListSerializer,
+    ShowThemeSerializer,
+)
+from planetarium.views import AstronomyShowViewSet
+
+
+# the same endpoints are documented on the viewsets
+@extend_schema(exclude=True)
+class AsyncReadView(
+    SparseFieldsetViewMixin, ConditionalGetMixin, generics.GenericAPIView
+):
+    """list without and retrieve with a lookup in the URL; serializer_class
+    renders retrieve and list_serializer_class list, like the
+    get_serializer_class of the viewsets"""
+
+    http_method_names = ["get", "head"]
+    list_serializer_class = None
+
+    def initialize_request(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        self.action = "retrieve" if lookup_url_kwarg in kwargs else "list"
+        return super().initialize_request(request, *args, **kwargs)
+
+    async def dispatch(self, request, *args, **kwargs):
+        """APIView.dispatch with the handler awaited"""
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            method = request.method.lower()
+            if method not in self.http_method_names:
+                self.http_method_not_allowed(request, *args, **kwargs)
+            response = await getattr(self, method)(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(
+            request, response, *args, **kwargs
+        )
+        return self.render(self.response)
+
+    @staticmethod
+    def render(response):
+        """Django would render a Response in sync_to_async, hand it a
+        rendered HttpResponse instead"""
+        if not hasattr(response, "render"):
+            return response
+        response.render()
+        rendered = HttpResponse(response.content, status=response.status_code)
+        for header, value in response.items():
+            rendered[header] = value
+        return rendered
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return self.list_serializer_class
+        return self.serializer_class
+
+    async def get(self, request, *args, **kwargs):
+        return await getattr(self, self.action)(request, *args, **kwargs)
+
+    async def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        paginator = self.paginator
+        paginator.prepare(request, self)
+        page = paginator.get_page_queryset(queryset)
+        # one chunk holds the whole page, prefetches run once per chunk
+        rows = paginator.set_page(
+            [
+                instance
+                async for instance in page.aiterator(
+                    chunk_size=paginator.page_size + 1
+                )
+            ]
+        )
+        return self.conditional_response(
+            request, rows, self.list_response, rows, True
+        )
+
+    async def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            instance = await (
+                self.filter_queryset(self.get_queryset())
+                .filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+                .aget()
+            )
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+        except self.queryset.model.DoesNotExist:
+            raise Http404
+        self.check_object_permissions(request, instance)
+        return self.conditional_response(
+            request, [instance], self.retrieve_response, instance
+        )
+
+
+class AstronomyShowReadView(AsyncReadView):
+    queryset = (
+        AstronomyShow.objects.all()
+        .defer("search_vector")
+        .prefetch_related("show_theme")
+    )
+    serializer_class = AstronomyShowCreateSerializer
+    list_serializer_class = AstronomyShowListSerializer
+    permission_classes = [IsAdminOrIfAuthenticatedReadOnly]
+    pagination_class = AstronomyShowPagination
+    filterset_class = AstronomyShowFilter
+    conditional_related_fields = ("show_theme__updated_at",)
+    keyset_ordering = AstronomyShowViewSet.keyset_ordering
+
+
+class PlanetariumDomeReadView(AsyncReadView):
+    queryset = PlanetariumDome.objects.all()
+    serializer_class = PlanetariumDomeCreateSerializer
+    list_serializer_class = PlanetariumDomeListSerializer
+    permission_classes = [IsAdminOrIfAuthenticatedReadOnly]
+    pagination_class = PlanetariumDomePagination
+    filterset_class = PlanetariumDomeFilter
+
+
+class ShowSessionReadView(AsyncReadView):
+    queryset = (
+        ShowSession.objects.all()
+        .select_related("astronomy_show", "planetarium_dome")
+        .defer("astronomy_show__search_vector")
+    )
+    serializer_class = ShowSessionCreateSerializer
+    list_serializer_class = ShowSessionListSerializer
+    permission_classes = [IsAdminOrIfAuthenticatedReadOnly]
+    pagination_class = ShowSessionPagination
+    filterset_class = ShowSessionFilter
+    conditional_related_fields = (
+        "astronomy_show__updated_at",
+        "astronomy_show__show_theme__updated_at",
+        "planetarium_dome__updated_at",
+    )
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "list":
+            queryset = queryset.prefetch_related("astronomy_show__show_theme")
+        return queryset
+
+
+class ShowThemeReadView(AsyncReadView):
+    queryset = ShowTheme.objects.all()
+    serializer_class = ShowThemeSerializer
+    list_serializer_class = ShowThemeSerializer
+    permission_classes = [IsAdminOrIfAuthenticatedReadOnly]
+    pagination_class = ShowThemePagination
+    filterset_class = ShowThemeFilter
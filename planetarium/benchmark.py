@@ -0,0 +1,129 @@
+"""Measuring endpoints through the test client.
+
+Every request is timed and its SQL statements and body bytes counted,
+up to the last byte of streamed bodies. Results are kept as
+{"<route> <METHOD>": summary} and compared against a baseline of the
+same shape.
+"""
+
+import gc
+import json
+import statistics
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+from django.urls import URLPattern, URLResolver
+
+from planetarium_api_service.middleware import QueryStats
+
+PERCENTILES = (50, 95, 99)
+LATENCY_METRICS = tuple(f"p{percentile}_ms" for percentile in PERCENTILES)
+
+
+def route_names(urlpatterns):
+    """names of the routes of urlpatterns, included ones too"""
+    names = set()
+    for pattern in urlpatterns:
+        if isinstance(pattern, URLResolver):
+            names |= route_names(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            names.add(pattern.name)
+    return names
+
+
+def response_size(response):
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+def measure(send):
+    """(milliseconds, queries, bytes) of the response send() returns,
+    streamed bodies included"""
+    stats = QueryStats()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(stats))
+        start = time.perf_counter()
+        response = send()
+        size = response_size(response)
+        elapsed = (time.perf_counter() - start) * 1000
+    if response.status_code >= 400:
+        raise ValueError(
+            f"{response.status_code} {response.request['PATH_INFO']}: "
+            f"{response.content[:200]!r}"
+        )
+    return elapsed, stats.count, size
+
+
+@contextmanager
+def gc_paused():
+    """like timeit, keep garbage collection pauses out of the samples"""
+    gc.collect()
+    gc.disable()
+    try:
+        yield
+    finally:
+        gc.enable()
+
+
+def latency_percentiles(latencies):
+    """{"p50_ms": ..., ...} of latencies in milliseconds"""
+    cut_points = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        metric: round(cut_points[percentile - 1], 3)
+        for metric, percentile in zip(LATENCY_METRICS, PERCENTILES)
+    }
+
+
+def summarize(samples):
+    """percentiles of the latency, medians of queries and bytes"""
+    latencies, queries, sizes = zip(*samples)
+    summary = latency_percentiles(latencies)
+    summary["queries"] = statistics.median_low(queries)
+    summary["bytes"] = statistics.median_low(sizes)
+    return summary
+
+
+def compare(
+    results,
+    baseline,
+    tolerance,
+    metrics=("bytes", *LATENCY_METRICS),
+    slack_ms=0.0,
+):
+    """regressions of results against baseline, as messages; metrics may
+    grow by tolerance (0.1 is 10%), latencies by slack_ms more so that
+    jitter of fast endpoints is not flagged, queries not at all"""
+    regressions = []
+    for name, summary in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        for metric in metrics:
+            limit = expected[metric] * (1 + tolerance)
+            if metric in LATENCY_METRICS:
+                limit += slack_ms
+            if summary[metric] > limit:
+                regressions.append(
+                    f"{name}: {metric} {summary[metric]} > {limit:.3f} "
+                    f"(baseline {expected[metric]})"
+                )
+        if summary["queries"] > expected["queries"]:
+            regressions.append(
+                f"{name}: queries {summary['queries']} > "
+                f"{expected['queries']}"
+            )
+    return regressions
+
+
+def load_baseline(path):
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save_baseline(path, baseline):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(baseline, file, indent=2, sort_keys=True)
+        file.write("\n")
@@ -0,0 +1,163 @@
+"""Ticket booking in as few queries as possible.
+
+The dome shape of a show session is cached in the catalog cache, so
+validation does not touch the database. With the default locmem backend
+every process has a cache of its own, see CATALOG_CACHE. Booking
+first adds the seats to the counters of the session, an UPDATE that also
+locks the session row and matches nothing when the session is gone or
+the seats are outside its dome. Tickets are then written with a single
+INSERT ... ON CONFLICT DO NOTHING RETURNING. Seats that are sold or held
+by another visitor are simply not inserted, which tells the caller which
+seats were taken without checking them beforehand.
+"""
+
+from django.db import connections, router, transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from planetarium.cache import catalog_cache
+from planetarium.exceptions import SeatsTaken
+from planetarium.models import Reservation, SeatHold, ShowSession, Ticket
+
+DOME_SHAPE_CACHE_TIMEOUT = 60 * 60
+
+
+def dome_shape_cache_key(show_session_id):
+    return f"planetarium:dome_shape:{show_session_id}"
+
+
+def get_dome_shape(show_session_id):
+    """(rows, seats_in_row) of the dome of a show session or None if the
+    session does not exist"""
+    cache = catalog_cache()
+    key = dome_shape_cache_key(show_session_id)
+    shape = cache.get(key)
+    if shape is None:
+        shape = (
+            ShowSession.objects.filter(pk=show_session_id)
+            .values_list(
+                "planetarium_dome__rows", "planetarium_dome__seats_in_row"
+            )
+            .first()
+        )
+        if shape is None:
+            return None
+        cache.set(key, shape, DOME_SHAPE_CACHE_TIMEOUT)
+    return shape
+
+
+def validate_seats(show_session_id, seats, error_to_raise):
+    """check (row, seat) pairs against the cached dome shape"""
+    shape = get_dome_shape(show_session_id)
+    if shape is None:
+        raise error_to_raise("The show session does not exist.")
+    for row, seat in seats:
+        Ticket.validate_seats_row(
+            row, shape[0], seat, shape[1], error_to_raise
+        )
+    if len(set(seats)) != len(seats):
+        raise error_to_raise("The same seat can not be selected twice.")
+
+
+def insert_tickets(show_session_id, reservation, seats, user, using):
+    """insert one ticket per (row, seat) skipping seats that are sold or
+    held by somebody else than user, returns the inserted tickets"""
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    ticket = {
+        field: qn(Ticket._meta.get_field(field).column)
+        for field in (
+            "id",
+            "row",
+            "seat",
+            "show_session",
+            "reservation",
+            "updated_at",
+        )
+    }
+    hold = {
+        field: qn(SeatHold._meta.get_field(field).column)
+        for field in ("row", "seat", "show_session", "expires_at", "user")
+    }
+    selected = " UNION ALL ".join(
+        [f"SELECT %s AS {ticket['row']}, %s AS {ticket['seat']}"] * len(seats)
+    )
+    sql = f"""INSERT INTO {qn(Ticket._meta.db_table)} (
+            {ticket['row']}, {ticket['seat']},
+            {ticket['show_session']}, {ticket['reservation']},
+            {ticket['updated_at']}
+        )
+        SELECT selected.{ticket['row']}, selected.{ticket['seat']}, %s, %s, %s
+        FROM ({selected}) AS selected
+        WHERE NOT EXISTS (
+            SELECT 1 FROM {qn(SeatHold._meta.db_table)} AS hold
+            WHERE hold.{hold['show_session']} = %s
+            AND hold.{hold['row']} = selected.{ticket['row']}
+            AND hold.{hold['seat']} = selected.{ticket['seat']}
+            AND hold.{hold['expires_at']} > %s
+            AND hold.{hold['user']} <> %s
+        )
+        ON CONFLICT DO NOTHING
+        RETURNING {ticket['id']}, {ticket['row']}, {ticket['seat']}
+    """
+    now = timezone.now()
+    adapted_now = connection.ops.adapt_datetimefield_value(now)
+    params = [show_session_id, reservation.pk, adapted_now]
+    params += [value for seat in seats for value in seat]
+    params += [
+        show_session_id,
+        adapted_now,
+        user.pk,
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        inserted = cursor.fetchall()
+    tickets = []
+    for pk, row, seat in inserted:
+        ticket = Ticket(
+            id=pk,
+            row=row,
+            seat=seat,
+            show_session_id=show_session_id,
+            reservation=reservation,
+            updated_at=now,
+        )
+        ticket._state.adding = False
+        ticket._state.db = using
+        tickets.append(ticket)
+    return tickets
+
+
+def book_seats(user, show_session_id, seats):
+    """create one reservation with a ticket for every (row, seat) pair,
+    raises SeatsTaken and rolls everything back if any seat is taken"""
+    using = router.db_for_write(Ticket)
+    with transaction.atomic(using=using):
+        if (
+            not ShowSession.objects.using(using)
+            .filter(
+                pk=show_session_id,
+                planetarium_dome__rows__gte=max(row for row, _ in seats),
+                planetarium_dome__seats_in_row__gte=max(
+                    seat for _, seat in seats
+                ),
+            )
+            .add_seats_sold(len(seats))
+        ):
+            # the cached dome shape was out of date
+            catalog_cache().delete(dome_shape_cache_key(show_session_id))
+            validate_seats(
+                show_session_id, seats, serializers.ValidationError
+            )
+            raise serializers.ValidationError(
+                "The show session does not exist."
+            )
+        reservation = Reservation.objects.using(using).create(user=user)
+        tickets = insert_tickets(
+            show_session_id, reservation, seats, user, using
+        )
+        if len(tickets) != len(seats):
+            raise SeatsTaken(
+                set(seats) - {(ticket.row, ticket.seat) for ticket in tickets}
+            )
+    return reservation, tickets
@@ -0,0 +1,73 @@
+"""Helpers of the bulk loading commands.
+
+Rows are inserted in batches with bulk_create, or with COPY FROM STDIN on
+PostgreSQL, which skips the per statement overhead of INSERT altogether.
+Neither calls save() nor sends signals, so callers take care of what the
+model relies on them for.
+"""
+
+import csv
+import io
+from itertools import islice
+
+from django.db import connections
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+
+
+def batched(iterable, size):
+    """lists of up to size items of iterable"""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def resolve_names(queryset, field_name, names, *values):
+    """{name: pk} of the rows of queryset whose field_name is in names, in
+    a single query; {name: (value, ...)} when values are given"""
+    values = values or ("pk",)
+    rows = queryset.filter(**{f"{field_name}__in": set(names)}).values_list(
+        field_name, *values
+    )
+    if len(values) == 1:
+        return dict(rows)
+    return {name: tuple(row) for name, *row in rows}
+
+
+def supports_copy(using="default"):
+    return connections[using].vendor == "postgresql"
+
+
+def copy_rows(model, fields, rows, using="default"):
+    """COPY rows, tuples in the order of fields, into the table of model;
+    unlike bulk_create no primary keys come back"""
+    connection = connections[using]
+    quote_name = connection.ops.quote_name
+    columns = ", ".join(
+        quote_name(model._meta.get_field(field).column) for field in fields
+    )
+    sql = f"COPY {quote_name(model._meta.db_table)} ({columns}) FROM STDIN"
+    with connection.cursor() as cursor:
+        if is_psycopg3:
+            with cursor.cursor.copy(sql) as copy:
+                for row in rows:
+                    copy.write_row(row)
+        else:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in rows:
+                # an unquoted empty value is NULL in the csv format
+                writer.writerow(
+                    "" if value is None else value for value in row
+                )
+            buffer.seek(0)
+            cursor.cursor.copy_expert(f"{sql} WITH (FORMAT csv)", buffer)
+
+
+def insert_rows(model, fields, rows, using="default", copy=True):
+    """COPY on PostgreSQL unless copy is False, bulk_create elsewhere"""
+    if copy and supports_copy(using):
+        copy_rows(model, fields, rows, using)
+        return
+    model._default_manager.using(using).bulk_create(
+        [model(**dict(zip(fields, row))) for row in rows]
+    )
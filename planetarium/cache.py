@@ -0,0 +1,187 @@
+"""Read-through response cache for the catalog viewsets.
+
+Every cached response is stored under a key that contains the current
+version of each namespace it depends on, e.g. "astronomyshow" for the
+whole show list or "astronomyshow:5" for one show. Signals bump those
+versions when a model changes, which makes every dependent entry
+unreachable at once without having to know its key.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+
+from planetarium_api_service.db_router import reads_from_primary
+
+CATALOG_CACHE_ALIAS = "catalog"
+VERSION_KEY = "catalog:version:{}"
+STATS_KEY = "catalog:stats:{}"
+# set by ConditionalGetMixin, kept with the data to answer conditional GETs
+VALIDATOR_HEADERS = ("ETag", "Last-Modified")
+
+
+def catalog_cache():
+    return caches[CATALOG_CACHE_ALIAS]
+
+
+def request_fingerprint(request, *parts):
+    """sha1 over what makes two GET responses differ, plus parts"""
+    query = sorted(
+        (name, sorted(values))
+        for name, values in request.query_params.lists()
+    )
+    return hashlib.sha1(
+        repr(
+            (
+                request.build_absolute_uri(request.path),
+                query,
+                request.accepted_renderer.format,
+                *parts,
+            )
+        ).encode()
+    ).hexdigest()
+
+
+def new_version():
+    """a version no earlier one can equal: the locmem and file caches cull
+    version keys too, one starting over from 0 would make the entries
+    cached under the old versions reachable again"""
+    return time.time_ns()
+
+
+def get_versions(namespaces):
+    cache = catalog_cache()
+    keys = [VERSION_KEY.format(name) for name in namespaces]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            version = new_version()
+            cache.add(key, version, timeout=None)
+            # another process may have added it first
+            versions[key] = cache.get(key, version)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*namespaces):
+    cache = catalog_cache()
+    for name in namespaces:
+        key = VERSION_KEY.format(name)
+        if not cache.add(key, new_version(), timeout=None):
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, new_version(), timeout=None)
+
+
+def record(outcome):
+    """count a hit or miss, only with settings.CATALOG_CACHE_STATS: the
+    counters are shared, with the database cache that is two writes per
+    request"""
+    if not settings.CATALOG_CACHE_STATS:
+        return
+    cache = catalog_cache()
+    key = STATS_KEY.format(outcome)
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            pass
+
+
+def get_stats():
+    cache = catalog_cache()
+    return {
+        outcome: cache.get(STATS_KEY.format(outcome), 0)
+        for outcome in ("hit", "miss")
+    }
+
+
+def reset_stats():
+    catalog_cache().delete_many(
+        [STATS_KEY.format(outcome) for outcome in ("hit", "miss")]
+    )
+
+
+class CatalogCacheMixin:
+    """Caches the data of list and retrieve responses of a viewset.
+
+    cache_list_namespaces lists the namespaces a list response depends on,
+    a retrieve response depends on "<model_name>:<pk>" plus
+    cache_retrieve_namespaces. Permissions and throttles still run on
+    every request because the cache is consulted inside the action. Misses
+    read from the primary, see ReplicaRoutingMiddleware. The
+    ETag and Last-Modified of the response are cached with its data, put
+    the mixin before ConditionalGetMixin.
+    """
+
+    cache_list_namespaces = ()
+    cache_retrieve_namespaces = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            request,
+            list(self.cache_list_namespaces),
+            super().list,
+            *args,
+            **kwargs,
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        try:
+            # "05" and "5" are the same object, signals bump "<model>:5"
+            lookup = int(lookup)
+        except ValueError:
+            return super().retrieve(request, *args, **kwargs)
+        namespace = f"{self.queryset.model._meta.model_name}:{lookup}"
+        return self.cached_response(
+            request,
+            [namespace, *self.cache_retrieve_namespaces],
+            super().retrieve,
+            *args,
+            **kwargs,
+        )
+
+    def get_cache_key(self, request, namespaces):
+        fingerprint = request_fingerprint(request, get_versions(namespaces))
+        return f"catalog:entry:{self.basename}:{self.action}:{fingerprint}"
+
+    def cached_response(self, request, namespaces, handler, *args, **kwargs):
+        cache = catalog_cache()
+        key = self.get_cache_key(request, namespaces)
+        entry = cache.get(key)
+        if entry is not None:
+            record("hit")
+            data, validators = entry
+            response = get_conditional_response(
+                request,
+                etag=validators.get("ETag"),
+                last_modified=parse_http_date_safe(
+                    validators.get("Last-Modified")
+                ),
+            )
+            if response is None:
+                response = Response(data)
+            for header, value in validators.items():
+                response[header] = value
+            response["X-Cache"] = "HIT"
+            return response
+        record("miss")
+        # a replica behind the write that bumped the versions would fill
+        # the new key with the old rows
+        with reads_from_primary():
+            response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            validators = {
+                header: response[header]
+                for header in VALIDATOR_HEADERS
+                if header in response
+            }
+            cache.set(key, (response.data, validators))
+        response["X-Cache"] = "MISS"
+        return response
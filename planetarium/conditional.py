@@ -0,0 +1,122 @@
+"""Conditional GET for list and retrieve actions.
+
+The validators come from the rows the response renders, once they are
+loaded: the primary keys and the updated_at of every row and of the
+related rows loaded with it. No extra query is run, and nothing is
+serialized to answer a matching If-None-Match or If-Modified-Since with
+304. The catalog cache stores the validators next to the cached data, a
+hit answers them without touching the database.
+
+A deleted row leaves the latest updated_at untouched, so only the ETag
+(which includes the primary keys) notices deletions; clients should
+prefer If-None-Match.
+"""
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from planetarium.cache import request_fingerprint
+
+
+def loaded_values(instance, path):
+    """the values at the end of a lookup path like
+    "astronomy_show__show_theme__updated_at" that are loaded already;
+    relations or fields that were not loaded are not rendered either and
+    are skipped instead of queried"""
+    name, _, rest = path.partition("__")
+    if not rest:
+        if name in instance.get_deferred_fields():
+            return []
+        return [getattr(instance, name)]
+    field = instance._meta.get_field(name)
+    if field.many_to_many or field.one_to_many:
+        related = getattr(instance, "_prefetched_objects_cache", {}).get(name)
+        if related is None:
+            return []
+    elif field.is_cached(instance):
+        related = [getattr(instance, name)]
+    else:
+        return []
+    return [
+        value
+        for obj in related
+        if obj is not None
+        for value in loaded_values(obj, rest)
+    ]
+
+
+class ConditionalGetMixin:
+    """Adds ETag and Last-Modified to list and retrieve responses.
+
+    conditional_related_fields lists the updated_at lookups of related
+    models the serializers render, e.g. "show_theme__updated_at".
+    """
+
+    conditional_related_fields = ()
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        rows = list(queryset) if page is None else page
+        return self.conditional_response(
+            request, rows, self.list_response, rows, page is not None
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        return self.conditional_response(
+            request, [instance], self.retrieve_response, instance
+        )
+
+    def list_response(self, rows, paginated):
+        serializer = self.get_serializer(rows, many=True)
+        if paginated:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+    def retrieve_response(self, instance):
+        return Response(self.get_serializer(instance).data)
+
+    def get_validators(self, request, rows):
+        stamps = []
+        modified = []
+        for row in rows:
+            values = []
+            for path in ("updated_at", *self.conditional_related_fields):
+                values += loaded_values(row, path)
+            stamps.append((row.pk, *(value.isoformat() for value in values)))
+            modified += values
+        # a page gains a next link when rows are added after it
+        links = (
+            getattr(self.paginator, "next_position", None) is not None,
+            getattr(self.paginator, "previous_position", None) is not None,
+        )
+        etag = request_fingerprint(request, stamps, links)
+        return quote_etag(etag), max(modified, default=None)
+
+    def conditional_response(self, request, rows, handler, *args):
+        """handler(*args) builds the response unless the validators of
+        rows match the request"""
+        etag, last_modified = self.get_validators(request, rows)
+        response = self.not_modified_response(request, etag, last_modified)
+        if response is None:
+            response = handler(*args)
+        return self.add_validators(response, etag, last_modified)
+
+    @staticmethod
+    def not_modified_response(request, etag, last_modified):
+        return get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=last_modified and int(last_modified.timestamp()),
+        )
+
+    @staticmethod
+    def add_validators(response, etag, last_modified):
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(
+                int(last_modified.timestamp())
+            )
+        return response
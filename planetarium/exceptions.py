@@ -0,0 +1,23 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class SeatsTaken(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Some of the seats are already taken."
+    default_code = "seats_taken"
+
+    def __init__(self, seats):
+        super().__init__()
+        self.detail = {
+            "detail": self.detail,
+            "seats": [
+                {"row": row, "seat": seat} for row, seat in sorted(seats)
+            ],
+        }
+
+
+class NoSeatsAvailable(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "There is no block of adjacent free seats of this size."
+    default_code = "no_seats_available"
@@ -0,0 +1,196 @@
+"""Sparse fieldsets: ?fields= and ?exclude= on list endpoints.
+
+Both take comma separated field names, nested fields are addressed with
+dots, e.g. ?fields=show_time,astronomy_show.show_name. The serializers
+drop the other fields and the queryset only loads the columns, joins and
+prefetches the remaining fields read.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import serializers
+
+FIELDS_QUERY_PARAM = "fields"
+EXCLUDE_QUERY_PARAM = "exclude"
+
+
+def parse_fieldset(value):
+    """ "a,b.c,b.d" -> {"a": {}, "b": {"c": {}, "d": {}}}"""
+    tree = {}
+    for path in value.split(","):
+        node = tree
+        for name in filter(None, path.strip().split(".")):
+            node = node.setdefault(name, {})
+    return tree
+
+
+class SparseFieldsetSerializerMixin:
+    """drops the fields not selected by the "fieldset" of the context,
+    nested serializers using the mixin find their part of it by path"""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fieldset = self.context.get("fieldset")
+        if not fieldset:
+            return fields
+        only, exclude = fieldset
+        for name in self.get_fieldset_path():
+            only = only.get(name) if only else None
+            exclude = exclude.get(name) if exclude else None
+        if only:
+            for name in set(fields) - set(only):
+                fields.pop(name)
+        if exclude:
+            for name, nested in exclude.items():
+                if not nested:
+                    fields.pop(name, None)
+        return fields
+
+    def get_fieldset_path(self):
+        path = []
+        node = self
+        while node.parent is not None:
+            if node.field_name:
+                path.append(node.field_name)
+            node = node.parent
+        return reversed(path)
+
+
+class Unprunable(Exception):
+    pass
+
+
+class QueryPlan:
+    def __init__(self):
+        self.only = set()
+        self.select_related = set()
+        self.prefetch_related = set()
+
+    def add_serializer(self, serializer, model, prefix=""):
+        for field in serializer.fields.values():
+            if not field.write_only:
+                self.add_field(field, model, prefix)
+
+    def add_field(self, field, model, prefix):
+        if field.source == "*" or isinstance(
+            field, serializers.SerializerMethodField
+        ):
+            raise Unprunable()
+        parts = []
+        for index, attr in enumerate(field.source_attrs):
+            last = index == len(field.source_attrs) - 1
+            try:
+                model_field = model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                raise Unprunable()
+            parts.append(attr)
+            path = prefix + "__".join(parts)
+            if model_field.many_to_many or model_field.one_to_many:
+                if not last:
+                    raise Unprunable()
+                self.prefetch_related.add(path)
+                if isinstance(field, serializers.ListSerializer):
+                    # the prefetched objects are loaded whole, only check
+                    # that the child reads nothing beyond them
+                    QueryPlan().add_serializer(
+                        field.child, model_field.related_model
+                    )
+                return
+            self.only.add(path)
+            if last and isinstance(field, serializers.PrimaryKeyRelatedField):
+                # the foreign key column is enough, no join needed
+                return
+            if model_field.is_relation:
+                self.select_related.add(path)
+                model = model_field.related_model
+        if isinstance(field, serializers.BaseSerializer):
+            self.add_serializer(
+                field, model, prefix + "__".join(parts) + "__"
+            )
+
+
+def get_updated_at_fields(model, plan):
+    """the updated_at of the rows and of the related rows a plan loads,
+    conditional GET reads them"""
+    fields = []
+    for path in ("", *sorted(plan.select_related)):
+        related = model
+        for name in filter(None, path.split("__")):
+            related = related._meta.get_field(name).related_model
+        if any(
+            field.name == "updated_at"
+            for field in related._meta.concrete_fields
+        ):
+            fields.append(f"{path}__updated_at" if path else "updated_at")
+    return fields
+
+
+class SparseFieldsetViewMixin:
+    """parses ?fields=/?exclude= for the list action, passes them to the
+    serializer and prunes the queryset to what is left"""
+
+    def get_fieldset(self):
+        if getattr(self, "action", None) != "list":
+            return None
+        params = self.request.query_params
+        only = parse_fieldset(params.get(FIELDS_QUERY_PARAM, ""))
+        exclude = parse_fieldset(params.get(EXCLUDE_QUERY_PARAM, ""))
+        if not only and not exclude:
+            return None
+        return only, exclude
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fieldset"] = self.get_fieldset()
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.get_fieldset() is None:
+            return queryset
+        plan = QueryPlan()
+        try:
+            plan.add_serializer(self.get_serializer(), queryset.model)
+        except Unprunable:
+            return queryset
+        plan.only.update(self.get_ordering_fields(queryset.model))
+        plan.only.update(get_updated_at_fields(queryset.model, plan))
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if plan.select_related:
+            # select_related() without fields would follow every relation
+            queryset = queryset.select_related(*plan.select_related)
+        return queryset.prefetch_related(*plan.prefetch_related).only(
+            *plan.only
+        )
+
+    def get_ordering_fields(self, model):
+        """the paginator reads the ordering columns of the last row"""
+        if self.paginator is None:
+            return []
+        fields = []
+        for field in self.paginator.get_base_ordering(self.request, self):
+            try:
+                fields.append(model._meta.get_field(field.lstrip("-")).name)
+            except FieldDoesNotExist:
+                pass
+        return fields
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name=FIELDS_QUERY_PARAM,
+                type=OpenApiTypes.STR,
+                description="Comma separated fields to return, nested "
+                "fields as parent.child",
+            ),
+            OpenApiParameter(
+                name=EXCLUDE_QUERY_PARAM,
+                type=OpenApiTypes.STR,
+                description="Comma separated fields to leave out, nested "
+                "fields as parent.child",
+            ),
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
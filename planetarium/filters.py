@@ -0,0 +1,199 @@
+"""FilterSets of the planetarium viewsets.
+
+None of the filters joins a to-many relation, so no query needs DISTINCT:
+the show_theme M2M filter is an EXISTS subquery on the through table.
+"""
+
+from django.db.models import Exists, OuterRef
+from django_filters import rest_framework as filters
+
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    Reservation,
+    ShowSession,
+    ShowTheme,
+    Ticket,
+)
+from planetarium.search import search_astronomy_shows
+
+
+class TicketFilter(filters.FilterSet):
+    show_session = filters.CharFilter(
+        field_name="show_session__astronomy_show__title",
+        lookup_expr="icontains",
+        label="Filter by show_session(astronomy show title)",
+    )
+    reservation = filters.CharFilter(
+        field_name="reservation__user__username",
+        lookup_expr="icontains",
+        label="Filter by reservation(username)",
+    )
+    planetarium_dome = filters.CharFilter(
+        field_name="show_session__planetarium_dome__name",
+        lookup_expr="icontains",
+        label="Filter by planetarium_dome(name)",
+    )
+    created_from = filters.IsoDateTimeFilter(
+        field_name="reservation__created_at",
+        lookup_expr="gte",
+        label="Reserved at or after",
+    )
+    created_to = filters.IsoDateTimeFilter(
+        field_name="reservation__created_at",
+        lookup_expr="lte",
+        label="Reserved at or before",
+    )
+
+    class Meta:
+        model = Ticket
+        fields = ()
+
+
+class TicketExportFilter(filters.FilterSet):
+    show_session = filters.NumberFilter(label="Filter by show_session(id)")
+    show_time = filters.DateFilter(
+        field_name="show_session__show_time",
+        label="Filter by show_time(day of the show session)",
+    )
+    created_from = filters.IsoDateTimeFilter(
+        field_name="reservation__created_at",
+        lookup_expr="gte",
+        label="Reserved at or after",
+    )
+    created_to = filters.IsoDateTimeFilter(
+        field_name="reservation__created_at",
+        lookup_expr="lte",
+        label="Reserved at or before",
+    )
+
+    class Meta:
+        model = Ticket
+        fields = ()
+
+
+class ReservationExportFilter(filters.FilterSet):
+    created_from = filters.IsoDateTimeFilter(
+        field_name="created_at",
+        lookup_expr="gte",
+        label="Reserved at or after",
+    )
+    created_to = filters.IsoDateTimeFilter(
+        field_name="created_at",
+        lookup_expr="lte",
+        label="Reserved at or before",
+    )
+
+    class Meta:
+        model = Reservation
+        fields = ()
+
+
+class AstronomyShowFilter(filters.FilterSet):
+    show_theme = filters.CharFilter(
+        method="filter_show_theme", label="Filter by show_theme(name)"
+    )
+    show_name = filters.CharFilter(
+        field_name="title",
+        lookup_expr="icontains",
+        label="Filter by show_name(title)",
+    )
+    description = filters.CharFilter(
+        lookup_expr="icontains",
+        label="Filter by description(description)",
+    )
+    q = filters.CharFilter(
+        method="filter_search",
+        label="Full-text search in title and description, best match first",
+    )
+
+    class Meta:
+        model = AstronomyShow
+        fields = ()
+
+    @staticmethod
+    def filter_show_theme(queryset, name, value):
+        return queryset.filter(
+            Exists(
+                AstronomyShow.show_theme.through.objects.filter(
+                    astronomyshow=OuterRef("pk"),
+                    showtheme__name__icontains=value,
+                )
+            )
+        )
+
+    @staticmethod
+    def filter_search(queryset, name, value):
+        return search_astronomy_shows(queryset, value)
+
+
+class PlanetariumDomeFilter(filters.FilterSet):
+    planetarium_name = filters.CharFilter(
+        field_name="name",
+        lookup_expr="icontains",
+        label="Filter by planetarium_name(name)",
+    )
+    rows = filters.NumberFilter(label="Filter by rows")
+    seats_in_row = filters.NumberFilter(label="Filter by seats_in_row")
+
+    class Meta:
+        model = PlanetariumDome
+        fields = ()
+
+
+class ShowSessionFilter(filters.FilterSet):
+    show_name = filters.CharFilter(
+        field_name="astronomy_show__title",
+        lookup_expr="icontains",
+        label="Filter by show_name(astronomy show title)",
+    )
+    description = filters.CharFilter(
+        field_name="astronomy_show__description",
+        lookup_expr="icontains",
+        label="Filter by description(astronomy show description)",
+    )
+    name = filters.CharFilter(
+        field_name="planetarium_dome__name",
+        lookup_expr="icontains",
+        label="Filter by name(planetarium dome name)",
+    )
+    show_time = filters.DateFilter(label="Filter by show_time")
+    show_time_from = filters.DateFilter(
+        field_name="show_time",
+        lookup_expr="gte",
+        label="Shows on or after this date",
+    )
+    show_time_to = filters.DateFilter(
+        field_name="show_time",
+        lookup_expr="lte",
+        label="Shows on or before this date",
+    )
+    available_min = filters.NumberFilter(
+        field_name="seats_available",
+        lookup_expr="gte",
+        label="Filter by seats_available(at least)",
+    )
+    q = filters.CharFilter(
+        method="filter_search",
+        label="Full-text search in the astronomy show title and description",
+    )
+
+    class Meta:
+        model = ShowSession
+        fields = ()
+
+    @staticmethod
+    def filter_search(queryset, name, value):
+        return search_astronomy_shows(
+            queryset, value, prefix="astronomy_show__", rank=False
+        )
+
+
+class ShowThemeFilter(filters.FilterSet):
+    name = filters.CharFilter(
+        lookup_expr="icontains", label="Filter by name(name)"
+    )
+
+    class Meta:
+        model = ShowTheme
+        fields = ()
@@ -0,0 +1,312 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from planetarium.benchmark import gc_paused, latency_percentiles
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    ShowSession,
+    ShowTheme,
+)
+
+HOST = "testserver"
+READ_ROUTES = (
+    ("astronomy_show", AstronomyShow),
+    ("planetarium_dome", PlanetariumDome),
+    ("show_session", ShowSession),
+    ("show_theme", ShowTheme),
+)
+# mode: (suffix of the route names, server)
+MODES = {
+    "wsgi": ("", "wsgi"),
+    "asgi": ("-async", "asgi"),
+    "asgi-sync": ("", "asgi"),
+}
+
+
+def read_paths(suffix):
+    """list and retrieve paths of the read routes with suffix, retrieving
+    the first row of each model"""
+    paths = []
+    for prefix, model in READ_ROUTES:
+        pk = model.objects.order_by("pk").values_list("pk", flat=True)[0]
+        paths.append(reverse(f"planetarium:{prefix}{suffix}-list"))
+        paths.append(
+            reverse(f"planetarium:{prefix}{suffix}-detail", args=[pk])
+        )
+    return paths
+
+
+def wsgi_get(handler, path, authorization):
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": path,
+        "HTTP_HOST": HOST,
+        "HTTP_AUTHORIZATION": authorization,
+    }
+    setup_testing_defaults(environ)
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(int(status.split()[0]))
+
+    response = handler(environ, start_response)
+    try:
+        for _ in response:
+            pass
+    finally:
+        response.close()
+    return statuses[0]
+
+
+async def asgi_get(handler, path, authorization):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", HOST.encode()),
+            (b"authorization", authorization.encode()),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": (HOST, 80),
+    }
+    received = False
+    status = None
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # the client stays connected, Django cancels this when it is done
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await handler(scope, receive, send)
+    return status
+
+
+def run_wsgi(paths, authorization, concurrency):
+    """closed loop: concurrency threads, each sending its share of paths
+    one after the other, like the threads of a threaded WSGI server"""
+    handler = WSGIHandler()
+
+    def worker(share):
+        samples = []
+        try:
+            for path in share:
+                start = time.perf_counter()
+                status = wsgi_get(handler, path, authorization)
+                samples.append(((time.perf_counter() - start) * 1000, status))
+        finally:
+            connections.close_all()
+        return samples
+
+    shares = [paths[index::concurrency] for index in range(concurrency)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(worker, shares))
+    return time.perf_counter() - start, [
+        sample for samples in results for sample in samples
+    ]
+
+
+def run_asgi(paths, authorization, concurrency):
+    """closed loop: concurrency tasks on one event loop, each sending its
+    share of paths one after the other"""
+    handler = ASGIHandler()
+
+    async def worker(share):
+        samples = []
+        for path in share:
+            start = time.perf_counter()
+            status = await asgi_get(handler, path, authorization)
+            samples.append(((time.perf_counter() - start) * 1000, status))
+        return samples
+
+    async def main():
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(
+                worker(paths[index::concurrency])
+                for index in range(concurrency)
+            )
+        )
+        return time.perf_counter() - start, [
+            sample for samples in results for sample in samples
+        ]
+
+    # a thread of its own, like a server's, keeps the loop clear of any
+    # async_to_sync the caller is in
+    with ThreadPoolExecutor(1) as pool:
+        return pool.submit(asyncio.run, main()).result()
+
+
+SERVERS = {"wsgi": run_wsgi, "asgi": run_asgi}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares requests per second and tail latency of the catalog and "
+        "show session reads at high concurrency: the sync viewsets under "
+        "WSGI, the async read views under ASGI and, for reference, the "
+        "sync viewsets under ASGI. Requests go through Django's WSGI and "
+        "ASGI handlers in this process, so no server is measured. Reads "
+        "the rows already in the database, run seed_planetarium first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--mode",
+            action="append",
+            choices=list(MODES),
+            dest="modes",
+            help="repeat to compare several, default all of them",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=64,
+            help="requests in flight at any time",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=2000,
+            help="measured requests per mode, spread over the routes",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=100,
+            help="requests per mode sent before measuring",
+        )
+        parser.add_argument(
+            "--username",
+            help="user the requests authenticate as, by default the first",
+        )
+        parser.add_argument(
+            "--catalog-cache",
+            action="store_true",
+            help="let the sync viewsets serve from the catalog cache, "
+            "the async views never do",
+        )
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1 or options["requests"] < 2:
+            raise CommandError(
+                "--concurrency must be positive, --requests at least 2."
+            )
+        for _, model in READ_ROUTES:
+            if not model.objects.exists():
+                raise CommandError(
+                    f"No {model._meta.verbose_name_plural} to read, "
+                    "run seed_planetarium first."
+                )
+        user = self.get_user(options["username"])
+        authorization = f"Bearer {RefreshToken.for_user(user).access_token}"
+        caches = {}
+        if not options["catalog_cache"]:
+            caches = {
+                "CACHES": {
+                    **settings.CACHES,
+                    "catalog": {
+                        "BACKEND": "django.core.cache.backends.dummy."
+                        "DummyCache"
+                    },
+                }
+            }
+        with override_settings(
+            DEBUG=False,
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, HOST],
+            **caches,
+        ), mock.patch.object(APIView, "check_throttles"):
+            results = {
+                mode: self.run_mode(mode, authorization, options)
+                for mode in options["modes"] or MODES
+            }
+        self.report(results)
+
+    @staticmethod
+    def get_user(username):
+        users = get_user_model().objects.filter(is_active=True)
+        if username:
+            users = users.filter(username=username)
+        user = users.order_by("pk").first()
+        if user is None:
+            raise CommandError("No such active user.")
+        return user
+
+    @staticmethod
+    def run_mode(mode, authorization, options):
+        suffix, server = MODES[mode]
+        routes = read_paths(suffix)
+        run = SERVERS[server]
+
+        def paths(count):
+            return [routes[index % len(routes)] for index in range(count)]
+
+        if options["warmup"]:
+            run(
+                paths(options["warmup"]),
+                authorization,
+                options["concurrency"],
+            )
+        with gc_paused():
+            elapsed, samples = run(
+                paths(options["requests"]),
+                authorization,
+                options["concurrency"],
+            )
+        failed = [status for _, status in samples if status >= 400]
+        if failed:
+            raise CommandError(
+                f"{mode}: {len(failed)} requests failed, e.g. with "
+                f"{failed[0]}."
+            )
+        return {
+            "rps": round(len(samples) / elapsed, 1),
+            **latency_percentiles([latency for latency, _ in samples]),
+        }
+
+    def report(self, results):
+        self.stdout.write(
+            f"{'mode':<12}{'req/s':>10}{'p50 ms':>10}"
+            f"{'p95 ms':>10}{'p99 ms':>10}"
+        )
+        for mode, summary in results.items():
+            self.stdout.write(
+                f"{mode:<12}{summary['rps']:>10.1f}"
+                f"{summary['p50_ms']:>10.2f}{summary['p95_ms']:>10.2f}"
+                f"{summary['p99_ms']:>10.2f}"
+            )
+        if "wsgi" in results and "asgi" in results:
+            self.stdout.write(
+                "asgi/wsgi requests per second: "
+                f"{results['asgi']['rps'] / results['wsgi']['rps']:.2f}"
+            )
@@ -0,0 +1,587 @@
+import io
+import pathlib
+import tempfile
+from datetime import date
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+import planetarium.urls
+import user.urls
+from planetarium.benchmark import (
+    LATENCY_METRICS,
+    compare,
+    gc_paused,
+    load_baseline,
+    measure,
+    route_names,
+    save_baseline,
+    summarize,
+)
+from planetarium.cache import catalog_cache
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    Reservation,
+    SeatHold,
+    ShowSession,
+    ShowTheme,
+    Ticket,
+)
+from planetarium.seeding import Seeder
+
+BASELINE_PATH = (
+    pathlib.Path(settings.BASE_DIR) / "benchmarks" / "endpoints.json"
+)
+
+
+class Rollback(Exception):
+    pass
+
+
+class BenchmarkData:
+    """the seeded rows, and fresh names and free seats for the writes"""
+
+    def __init__(self, size):
+        self.user = get_user_model().objects.create_user(
+            username="benchmark-staff", password=None, is_staff=True
+        )
+        seeder = Seeder()
+        theme_ids = seeder.themes(max(1, size // 10))
+        show_ids = seeder.shows(size, theme_ids, themes_per_show=(1, 1))
+        domes = seeder.domes(
+            max(1, size // 20), rows=(10, 10), seats_in_row=(20, 20)
+        )
+        sessions = seeder.sessions(
+            size, show_ids, domes, start=date(2024, 1, 1), days=365
+        )
+        reservation = Reservation.objects.create(user=self.user)
+        tickets = Ticket.objects.bulk_create(
+            Ticket(
+                row=1,
+                seat=1,
+                show_session_id=session_id,
+                reservation=reservation,
+            )
+            for session_id, *_ in sessions
+        )
+        write_dome = PlanetariumDome.objects.create(
+            name="Benchmark write dome", rows=50, seats_in_row=630
+        )
+        self.write_session, self.best_available_session = (
+            ShowSession.objects.create(
+                astronomy_show_id=show_ids[0],
+                planetarium_dome=write_dome,
+                show_time="2024-01-01",
+            )
+            for _ in range(2)
+        )
+        self.theme = ShowTheme.objects.get(pk=theme_ids[0])
+        self.show = AstronomyShow.objects.get(pk=show_ids[0])
+        self.dome = PlanetariumDome.objects.get(pk=domes[0][0])
+        self.session = ShowSession.objects.get(pk=sessions[0][0])
+        self.ticket = tickets[0]
+        self.counter = 0
+        self.seats = (
+            (row, seat)
+            for row in range(1, write_dome.rows + 1)
+            for seat in range(1, write_dome.seats_in_row + 1)
+        )
+
+    def name(self, prefix):
+        self.counter += 1
+        return f"{prefix}-{self.counter:06d}"
+
+    def seats_json(self, count):
+        return [
+            {"row": row, "seat": seat}
+            for row, seat in (next(self.seats) for _ in range(count))
+        ]
+
+    def hold(self, count):
+        return SeatHold.objects.bulk_create(
+            SeatHold(
+                user=self.user,
+                show_session=self.write_session,
+                expires_at=timezone.now() + settings.SEAT_HOLD_TTL,
+                **seat,
+            )
+            for seat in self.seats_json(count)
+        )
+
+
+def image():
+    file = io.BytesIO()
+    Image.new("RGB", (8, 8)).save(file, "PNG")
+    file.name = "benchmark.png"
+    file.seek(0)
+    return file
+
+
+def url(name, *args):
+    return reverse(name, args=args)
+
+
+def confirm_seat_holds(data):
+    data.hold(2)
+    return (
+        url("planetarium:seat_holds-confirm"),
+        {"show_session": data.write_session.pk},
+        "json",
+    )
+
+
+def delete_seat_hold(data):
+    (seat_hold,) = data.hold(1)
+    return url("planetarium:seat_holds-detail", seat_hold.pk), {}, None
+
+
+# (route, method, prepare), prepare(data) runs untimed and returns the
+# path, the payload and its format
+def async_read_scenarios(prefix, attribute):
+    """list and retrieve of the async read views, retrieving the
+    attribute of the data"""
+    return (
+        (
+            f"{prefix}-async-list",
+            "get",
+            lambda data: (url(f"planetarium:{prefix}-async-list"), {}, None),
+        ),
+        (
+            f"{prefix}-async-detail",
+            "get",
+            lambda data: (
+                url(
+                    f"planetarium:{prefix}-async-detail",
+                    getattr(data, attribute).pk,
+                ),
+                {},
+                None,
+            ),
+        ),
+    )
+
+
+SCENARIOS = (
+    ("api-root", "get", lambda data: (url("planetarium:api-root"), {}, None)),
+    (
+        "tickets-list",
+        "get",
+        lambda data: (url("planetarium:tickets-list"), {}, None),
+    ),
+    (
+        "tickets-list",
+        "post",
+        lambda data: (
+            url("planetarium:tickets-list"),
+            {"show_session": data.write_session.pk, **data.seats_json(1)[0]},
+            "json",
+        ),
+    ),
+    (
+        "tickets-book",
+        "post",
+        lambda data: (
+            url("planetarium:tickets-book"),
+            {
+                "show_session": data.write_session.pk,
+                "tickets": data.seats_json(2),
+            },
+            "json",
+        ),
+    ),
+    (
+        "tickets-export",
+        "get",
+        lambda data: (
+            url("planetarium:tickets-export"),
+            {"show_time": "2024-01-01"},
+            None,
+        ),
+    ),
+    (
+        "tickets-export-reservations",
+        "get",
+        lambda data: (
+            url("planetarium:tickets-export-reservations"),
+            {},
+            None,
+        ),
+    ),
+    (
+        "tickets-detail",
+        "get",
+        lambda data: (
+            url("planetarium:tickets-detail", data.ticket.pk),
+            {},
+            None,
+        ),
+    ),
+    (
+        "astronomy_show-list",
+        "get",
+        lambda data: (url("planetarium:astronomy_show-list"), {}, None),
+    ),
+    (
+        "astronomy_show-list",
+        "post",
+        lambda data: (
+            url("planetarium:astronomy_show-list"),
+            {
+                "title": data.name("Benchmark new show"),
+                "description": "New",
+                "show_theme": [data.theme.pk],
+            },
+            "json",
+        ),
+    ),
+    (
+        "astronomy_show-detail",
+        "get",
+        lambda data: (
+            url("planetarium:astronomy_show-detail", data.show.pk),
+            {},
+            None,
+        ),
+    ),
+    (
+        "astronomy_show-upload-image",
+        "post",
+        lambda data: (
+            url("planetarium:astronomy_show-upload-image", data.show.pk),
+            {"image": image()},
+            "multipart",
+        ),
+    ),
+    (
+        "planetarium_dome-list",
+        "get",
+        lambda data: (url("planetarium:planetarium_dome-list"), {}, None),
+    ),
+    (
+        "planetarium_dome-list",
+        "post",
+        lambda data: (
+            url("planetarium:planetarium_dome-list"),
+            {
+                "name": data.name("Benchmark new dome"),
+                "rows": 10,
+                "seats_in_row": 20,
+            },
+            "json",
+        ),
+    ),
+    (
+        "planetarium_dome-detail",
+        "get",
+        lambda data: (
+            url("planetarium:planetarium_dome-detail", data.dome.pk),
+            {},
+            None,
+        ),
+    ),
+    (
+        "planetarium_dome-upload-image",
+        "post",
+        lambda data: (
+            url("planetarium:planetarium_dome-upload-image", data.dome.pk),
+            {"image": image()},
+            "multipart",
+        ),
+    ),
+    (
+        "show_session-list",
+        "get",
+        lambda data: (url("planetarium:show_session-list"), {}, None),
+    ),
+    (
+        "show_session-list",
+        "post",
+        lambda data: (
+            url("planetarium:show_session-list"),
+            {
+                "astronomy_show": data.show.pk,
+                "planetarium_dome": data.dome.pk,
+                "show_time": "2024-12-31",
+            },
+            "json",
+        ),
+    ),
+    (
+        "show_session-detail",
+        "get",
+        lambda data: (
+            url("planetarium:show_session-detail", data.session.pk),
+            {},
+            None,
+        ),
+    ),
+    (
+        "show_session-seats",
+        "get",
+        lambda data: (
+            url("planetarium:show_session-seats", data.write_session.pk),
+            {},
+            None,
+        ),
+    ),
+    (
+        "show_session-best-available",
+        "get",
+        lambda data: (
+            url(
+                "planetarium:show_session-best-available",
+                data.best_available_session.pk,
+            ),
+            {"party_size": 4},
+            None,
+        ),
+    ),
+    (
+        "show_session-best-available",
+        "post",
+        lambda data: (
+            url(
+                "planetarium:show_session-best-available",
+                data.best_available_session.pk,
+            ),
+            {"party_size": 2},
+            "json",
+        ),
+    ),
+    (
+        "show_theme-list",
+        "get",
+        lambda data: (url("planetarium:show_theme-list"), {}, None),
+    ),
+    (
+        "show_theme-list",
+        "post",
+        lambda data: (
+            url("planetarium:show_theme-list"),
+            {"name": data.name("Benchmark new theme")},
+            "json",
+        ),
+    ),
+    (
+        "show_theme-detail",
+        "get",
+        lambda data: (
+            url("planetarium:show_theme-detail", data.theme.pk),
+            {},
+            None,
+        ),
+    ),
+    (
+        "seat_holds-list",
+        "get",
+        lambda data: (url("planetarium:seat_holds-list"), {}, None),
+    ),
+    (
+        "seat_holds-list",
+        "post",
+        lambda data: (
+            url("planetarium:seat_holds-list"),
+            {
+                "show_session": data.write_session.pk,
+                "seats": data.seats_json(2),
+            },
+            "json",
+        ),
+    ),
+    ("seat_holds-confirm", "post", confirm_seat_holds),
+    ("seat_holds-detail", "delete", delete_seat_hold),
+    *async_read_scenarios("astronomy_show", "show"),
+    *async_read_scenarios("planetarium_dome", "dome"),
+    *async_read_scenarios("show_session", "session"),
+    *async_read_scenarios("show_theme", "theme"),
+    (
+        "user-registration",
+        "post",
+        lambda data: (
+            url("user_authenticate:user-registration"),
+            {
+                "username": data.name("benchmark-user"),
+                "password": "benchmark",
+            },
+            "json",
+        ),
+    ),
+    (
+        "manage-user",
+        "get",
+        lambda data: (url("user_authenticate:manage-user"), {}, None),
+    ),
+    (
+        "manage-user",
+        "patch",
+        lambda data: (
+            url("user_authenticate:manage-user"),
+            {"email": f"{data.name('benchmark')}@example.com"},
+            "json",
+        ),
+    ),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds --size shows and show sessions in a transaction, requests "
+        "every route of planetarium/urls.py and user/urls.py --repeat "
+        "times through the test client and rolls everything back. Reports "
+        "p50/p95/p99 latency, queries and bytes per request and compares "
+        "them with the baseline: latencies and bytes may grow by "
+        "--tolerance, queries not at all. Bytes are only compared for the "
+        "same --size, latencies also need the same database vendor."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--tolerance", type=float, default=0.25)
+        parser.add_argument(
+            "--slack-ms",
+            type=float,
+            default=2.0,
+            help="latency growth below this is never a regression",
+        )
+        parser.add_argument(
+            "--baseline", type=pathlib.Path, default=BASELINE_PATH
+        )
+        parser.add_argument(
+            "--update-baseline",
+            action="store_true",
+            help="store the results as the new baseline",
+        )
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 2:
+            raise CommandError("--repeat must be at least 2.")
+        missing = (
+            route_names(planetarium.urls.urlpatterns)
+            | route_names(user.urls.urlpatterns)
+        ) - {route for route, _, _ in SCENARIOS}
+        if missing:
+            raise CommandError(
+                f"No benchmark scenario for: {', '.join(sorted(missing))}"
+            )
+        results = self.run(
+            options["size"], options["warmup"], options["repeat"]
+        )
+        self.report(results)
+        baseline = {
+            "vendor": connection.vendor,
+            "size": options["size"],
+            "repeat": options["repeat"],
+            "results": results,
+        }
+        if options["update_baseline"]:
+            save_baseline(options["baseline"], baseline)
+            self.stdout.write(f"Baseline written to {options['baseline']}")
+            return
+        self.check_baseline(baseline, options)
+
+    def run(self, size, warmup, repeat):
+        media_root = tempfile.TemporaryDirectory()
+        try:
+            with override_settings(
+                DEBUG=False,
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+                MEDIA_ROOT=media_root.name,
+            ), mock.patch.object(APIView, "check_throttles"):
+                with transaction.atomic():
+                    data = BenchmarkData(size)
+                    client = APIClient()
+                    client.force_authenticate(data.user)
+                    results = {
+                        f"{route} {method.upper()}": self.run_scenario(
+                            client, method, prepare, data, warmup, repeat
+                        )
+                        for route, method, prepare in SCENARIOS
+                    }
+                    raise Rollback
+        except Rollback:
+            pass
+        finally:
+            media_root.cleanup()
+            # the cache must not outlive the rolled back rows
+            catalog_cache().clear()
+        return results
+
+    @staticmethod
+    def run_scenario(client, method, prepare, data, warmup, repeat):
+        """the first warmup samples fill caches and are dropped"""
+        samples = []
+        with gc_paused():
+            for _ in range(warmup + repeat):
+                path, payload, payload_format = prepare(data)
+                try:
+                    samples.append(
+                        measure(
+                            lambda: getattr(client, method)(
+                                path, payload, format=payload_format
+                            )
+                        )
+                    )
+                except ValueError as error:
+                    raise CommandError(f"{method.upper()} failed: {error}")
+        return summarize(samples[warmup:])
+
+    def report(self, results):
+        self.stdout.write(
+            f"{'route':<40} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+            f"{'queries':>7} {'bytes':>8}"
+        )
+        for name, summary in results.items():
+            self.stdout.write(
+                f"{name:<40} {summary['p50_ms']:>8.2f} "
+                f"{summary['p95_ms']:>8.2f} {summary['p99_ms']:>8.2f} "
+                f"{summary['queries']:>7} {summary['bytes']:>8}"
+            )
+
+    def check_baseline(self, baseline, options):
+        if not options["baseline"].exists():
+            self.stdout.write(
+                f"No baseline at {options['baseline']}, run with "
+                "--update-baseline to create one"
+            )
+            return
+        expected = load_baseline(options["baseline"])
+        metrics = []
+        if expected["size"] == baseline["size"]:
+            metrics.append("bytes")
+            if expected["vendor"] == baseline["vendor"]:
+                metrics.extend(LATENCY_METRICS)
+        skipped = [
+            metric
+            for metric in ("bytes", *LATENCY_METRICS)
+            if metric not in metrics
+        ]
+        if skipped:
+            self.stdout.write(
+                f"The baseline was taken on {expected['vendor']} with "
+                f"--size {expected['size']}, not comparing "
+                f"{', '.join(skipped)}"
+            )
+        regressions = compare(
+            baseline["results"],
+            expected["results"],
+            options["tolerance"],
+            metrics,
+            options["slack_ms"],
+        )
+        if regressions:
+            raise CommandError(
+                "Regressions against the baseline:\n" + "\n".join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS("No regressions"))
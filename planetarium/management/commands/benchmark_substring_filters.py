@@ -0,0 +1,127 @@
+import random
+import statistics
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    ShowSession,
+    ShowTheme,
+    Ticket,
+)
+from planetarium.seeding import Seeder
+
+TRIGRAM_INDEXES = (
+    "astronomyshow_title_trgm",
+    "planetariumdome_name_trgm",
+    "showtheme_name_trgm",
+)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds --rows rows per table in a transaction, times the substring "
+        "filters of the API with and without the trigram indexes and rolls "
+        "everything back. PostgreSQL only; DROP INDEX locks the tables "
+        "until the end, so run it against a development database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Trigram indexes only exist on PostgreSQL.")
+        self.rng = random.Random(options["seed"])
+        try:
+            with transaction.atomic():
+                self.seed(options["rows"], options["seed"])
+                needle = f"{self.rng.randrange(options['rows']):06d}"[:5]
+                filters = self.get_filters(needle)
+                after = self.time_filters(filters, options["repeat"])
+                with connection.cursor() as cursor:
+                    for index in TRIGRAM_INDEXES:
+                        cursor.execute(
+                            f"DROP INDEX {connection.ops.quote_name(index)}"
+                        )
+                before = self.time_filters(filters, options["repeat"])
+                raise Rollback
+        except Rollback:
+            pass
+        self.stdout.write(
+            f"{'filter':<40} {'before ms':>10} {'after ms':>10} "
+            f"{'speedup':>8}"
+        )
+        for name in filters:
+            self.stdout.write(
+                f"{name:<40} {before[name]:>10.2f} {after[name]:>10.2f} "
+                f"{before[name] / after[name]:>7.1f}x"
+            )
+
+    def seed(self, rows, seed):
+        seeder = Seeder(seed)
+        seeder.themes(rows)
+        domes = seeder.domes(rows, rows=(10, 10), seats_in_row=(10, 10))
+        show_ids = seeder.shows(rows)
+        sessions = seeder.sessions(
+            rows, show_ids, domes, start=date(2024, 1, 1), days=1
+        )
+        user_ids = seeder.users(1, prefix="benchmark-substring-filters")
+        # one ticket per session
+        seeder.tickets(sessions, user_ids, fill_rate=0.01, party_size=(1, 1))
+        with connection.cursor() as cursor:
+            for model in (
+                AstronomyShow,
+                ShowTheme,
+                PlanetariumDome,
+                ShowSession,
+                Ticket,
+            ):
+                cursor.execute(
+                    f"ANALYZE {connection.ops.quote_name(model._meta.db_table)}"
+                )
+
+    @staticmethod
+    def get_filters(needle):
+        """the substring filters of the viewsets"""
+        return {
+            "tickets ?show_session=": Ticket.objects.filter(
+                show_session__astronomy_show__title__icontains=needle
+            ),
+            "tickets ?planetarium_dome=": Ticket.objects.filter(
+                show_session__planetarium_dome__name__icontains=needle
+            ),
+            "astronomy shows ?show_name=": AstronomyShow.objects.filter(
+                title__icontains=needle
+            ),
+            "planetarium domes ?planetarium_name=": (
+                PlanetariumDome.objects.filter(name__icontains=needle)
+            ),
+            "show themes ?name=": ShowTheme.objects.filter(
+                name__icontains=needle
+            ),
+        }
+
+    @staticmethod
+    def time_filters(filters, repeat):
+        timings = {}
+        for name, queryset in filters.items():
+            queryset = queryset.values_list("pk", flat=True)
+            list(queryset.all())
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                list(queryset.all())
+                samples.append((time.perf_counter() - start) * 1000)
+            timings[name] = statistics.median(samples)
+        return timings
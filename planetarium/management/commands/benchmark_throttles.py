@@ -0,0 +1,160 @@
+import statistics
+import time
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework.throttling import ScopedRateThrottle
+
+from planetarium.benchmark import gc_paused, latency_percentiles
+from planetarium.models import ThrottleBucket
+from planetarium.throttling import ScopedTokenBucketThrottle
+
+SCOPE = "benchmark"
+# high enough for no check to be throttled
+RATE = "1000000/hour"
+THROTTLES = {
+    "cache": ScopedRateThrottle,
+    "token-bucket": ScopedTokenBucketThrottle,
+}
+
+
+class BenchmarkView:
+    throttle_scope = SCOPE
+
+
+def benchmark_throttle_class(name, cache):
+    return type(
+        f"Benchmark{THROTTLES[name].__name__}",
+        (THROTTLES[name],),
+        {"THROTTLE_RATES": {SCOPE: RATE}, "cache": cache},
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the time a throttle check adds to a request: DRF's "
+        "ScopedRateThrottle keeping request histories in a cache against "
+        "the token buckets in the database. Takes tokens from buckets of "
+        f"a {SCOPE!r} scope of its own and deletes them afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--throttle",
+            action="append",
+            choices=list(THROTTLES),
+            dest="throttles",
+            help="repeat to compare several, default all of them",
+        )
+        parser.add_argument(
+            "--checks",
+            type=int,
+            default=5000,
+            help="measured checks per throttle, spread over the clients",
+        )
+        parser.add_argument(
+            "--clients",
+            type=int,
+            default=100,
+            help="users the checks are made for, a bucket each",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=200,
+            help="checks per throttle made before measuring",
+        )
+        parser.add_argument(
+            "--cache",
+            default="default",
+            help="cache alias of the cache throttle",
+        )
+
+    def handle(self, *args, **options):
+        if options["clients"] < 1 or options["checks"] < 2:
+            raise CommandError(
+                "--clients must be positive, --checks at least 2."
+            )
+        if options["cache"] not in settings.CACHES:
+            raise CommandError(f"No cache {options['cache']!r}.")
+        cache = caches[options["cache"]]
+        requests = [
+            self.request_for(pk) for pk in range(1, options["clients"] + 1)
+        ]
+        results = {}
+        for name in options["throttles"] or THROTTLES:
+            throttle_class = benchmark_throttle_class(name, cache)
+            try:
+                self.run_checks(throttle_class, requests, options["warmup"])
+                with gc_paused():
+                    results[name] = self.run_checks(
+                        throttle_class, requests, options["checks"]
+                    )
+                results[name]["state"] = self.state(name, cache, requests)
+            finally:
+                cache.delete_many(
+                    [self.cache_key(request) for request in requests]
+                )
+                ThrottleBucket.objects.filter(
+                    key__startswith=f"throttle_{SCOPE}_"
+                ).delete()
+        self.report(results)
+
+    @staticmethod
+    def request_for(pk):
+        request = RequestFactory().get("/")
+        request.user = SimpleNamespace(pk=pk, is_authenticated=True)
+        return request
+
+    @staticmethod
+    def cache_key(request):
+        return ScopedRateThrottle.cache_format % {
+            "scope": SCOPE,
+            "ident": request.user.pk,
+        }
+
+    @staticmethod
+    def run_checks(throttle_class, requests, count):
+        view = BenchmarkView()
+        latencies = []
+        start = time.perf_counter()
+        for index in range(count):
+            # DRF builds the throttles for every request
+            throttle = throttle_class()
+            check_start = time.perf_counter()
+            allowed = throttle.allow_request(
+                requests[index % len(requests)], view
+            )
+            latencies.append((time.perf_counter() - check_start) * 1000)
+            if not allowed:
+                raise CommandError(f"{throttle_class.__name__} throttled.")
+        elapsed = time.perf_counter() - start
+        return {
+            "checks_per_second": round(count / elapsed, 1),
+            **latency_percentiles(latencies),
+        }
+
+    def state(self, name, cache, requests):
+        """what is stored per client"""
+        if name == "cache":
+            histories = [
+                len(cache.get(self.cache_key(request), []))
+                for request in requests
+            ]
+            return f"{statistics.mean(histories):.0f} timestamps"
+        return "1 row"
+
+    def report(self, results):
+        self.stdout.write(
+            f"{'throttle':<14}{'checks/s':>10}{'p50 ms':>10}"
+            f"{'p95 ms':>10}{'p99 ms':>10}  state per client"
+        )
+        for name, summary in results.items():
+            self.stdout.write(
+                f"{name:<14}{summary['checks_per_second']:>10.1f}"
+                f"{summary['p50_ms']:>10.3f}{summary['p95_ms']:>10.3f}"
+                f"{summary['p99_ms']:>10.3f}  {summary['state']}"
+            )
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from planetarium.cache import get_stats, reset_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Prints hit/miss counters of the catalog response cache, counted "
+        "when CATALOG_CACHE_STATS=1"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Reset the counters after printing them",
+        )
+
+    def handle(self, *args, **options):
+        stats = get_stats()
+        total = stats["hit"] + stats["miss"]
+        hit_rate = stats["hit"] / total if total else 0
+        self.stdout.write(
+            f"hits: {stats['hit']}, misses: {stats['miss']}, "
+            f"hit rate: {hit_rate:.1%}"
+        )
+        if options["reset"]:
+            reset_stats()
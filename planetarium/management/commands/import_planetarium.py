@@ -0,0 +1,272 @@
+import abc
+import csv
+import json
+import pathlib
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from planetarium.bulk import batched, insert_rows, resolve_names
+from planetarium.cache import bump_versions
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    ShowSession,
+    ShowTheme,
+)
+
+THEME_SEPARATOR = "|"
+
+
+def read_records(path):
+    """dicts from a .csv file with a header row, a .json list or a
+    .ndjson/.jsonl file with one object per line"""
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        with path.open(newline="", encoding="utf-8") as file:
+            yield from csv.DictReader(file)
+    elif suffix == ".json":
+        with path.open(encoding="utf-8") as file:
+            yield from json.load(file)
+    elif suffix in (".ndjson", ".jsonl"):
+        with path.open(encoding="utf-8") as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        raise CommandError(f"{path}: expected a .csv, .json or .ndjson file")
+
+
+def get_value(record, name):
+    value = record.get(name)
+    if value is None or value == "":
+        raise ValueError(f"{name} is missing")
+    return value
+
+
+def resolve(mapping, name, label):
+    try:
+        return mapping[name]
+    except KeyError:
+        raise ValueError(f"unknown {label} {name!r}")
+
+
+class Importer(abc.ABC):
+    """turns a batch of records into rows of model, with a value for each
+    of fields; cache_namespaces are bumped once the import is done"""
+
+    model = None
+    fields = ()
+    cache_namespaces = ()
+
+    def __init__(self, using, copy):
+        self.using = using
+        self.copy = copy
+
+    def import_batch(self, records):
+        now = timezone.now()
+        rows = []
+        for record in records:
+            try:
+                rows.append(self.get_row(record, now))
+            except (TypeError, ValueError) as error:
+                raise ValueError(f"{error} in {record!r}")
+        insert_rows(self.model, self.fields, rows, self.using, self.copy)
+
+    @abc.abstractmethod
+    def get_row(self, record, now):
+        """the values of fields for one record, ValueError or TypeError
+        when it is invalid"""
+
+
+class ShowThemeImporter(Importer):
+    model = ShowTheme
+    fields = ("name", "updated_at")
+    cache_namespaces = ("showtheme",)
+
+    def get_row(self, record, now):
+        return get_value(record, "name"), now
+
+
+class PlanetariumDomeImporter(Importer):
+    model = PlanetariumDome
+    fields = ("name", "rows", "seats_in_row", "image", "updated_at")
+    cache_namespaces = ("planetariumdome",)
+
+    def get_row(self, record, now):
+        rows = int(get_value(record, "rows"))
+        seats_in_row = int(get_value(record, "seats_in_row"))
+        # the check full_clean() runs in PlanetariumDome.save()
+        PlanetariumDome.validate_row_seats_in_row(
+            rows, seats_in_row, ValueError
+        )
+        return get_value(record, "name"), rows, seats_in_row, "", now
+
+
+class AstronomyShowImporter(Importer):
+    """show_theme holds theme names, a list in JSON and separated by
+    THEME_SEPARATOR in CSV"""
+
+    model = AstronomyShow
+    fields = ("title", "description", "image", "updated_at")
+    cache_namespaces = ("astronomyshow",)
+
+    def import_batch(self, records):
+        themes = {}
+        for record in records:
+            names = record.get("show_theme") or []
+            if isinstance(names, str):
+                names = names.split(THEME_SEPARATOR)
+            themes[record.get("title")] = [
+                name.strip() for name in names if name.strip()
+            ]
+        theme_ids = resolve_names(
+            ShowTheme.objects.using(self.using),
+            "name",
+            [name for names in themes.values() for name in names],
+        )
+        super().import_batch(records)
+        # COPY returns no primary keys, the titles are unique
+        show_ids = resolve_names(
+            AstronomyShow.objects.using(self.using), "title", themes
+        )
+        insert_rows(
+            AstronomyShow.show_theme.through,
+            ("astronomyshow_id", "showtheme_id"),
+            [
+                (show_ids[title], resolve(theme_ids, name, "show_theme"))
+                for title, names in themes.items()
+                for name in names
+            ],
+            self.using,
+            self.copy,
+        )
+
+    def get_row(self, record, now):
+        return (
+            get_value(record, "title"),
+            get_value(record, "description"),
+            "",
+            now,
+        )
+
+
+class ShowSessionImporter(Importer):
+    """astronomy_show and planetarium_dome hold the show title and the dome
+    name"""
+
+    model = ShowSession
+    fields = (
+        "astronomy_show_id",
+        "planetarium_dome_id",
+        "show_time",
+        "seats_sold",
+        "seats_available",
+        "updated_at",
+    )
+
+    def import_batch(self, records):
+        self.show_ids = resolve_names(
+            AstronomyShow.objects.using(self.using),
+            "title",
+            [record.get("astronomy_show") for record in records],
+        )
+        self.domes = resolve_names(
+            PlanetariumDome.objects.using(self.using),
+            "name",
+            [record.get("planetarium_dome") for record in records],
+            "pk",
+            F("rows") * F("seats_in_row"),
+        )
+        super().import_batch(records)
+
+    def get_row(self, record, now):
+        dome_id, capacity = resolve(
+            self.domes,
+            get_value(record, "planetarium_dome"),
+            "planetarium_dome",
+        )
+        return (
+            resolve(
+                self.show_ids,
+                get_value(record, "astronomy_show"),
+                "astronomy_show",
+            ),
+            dome_id,
+            date.fromisoformat(get_value(record, "show_time")),
+            0,
+            capacity,
+            now,
+        )
+
+
+IMPORTERS = {
+    "themes": ShowThemeImporter,
+    "domes": PlanetariumDomeImporter,
+    "shows": AstronomyShowImporter,
+    "sessions": ShowSessionImporter,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports show themes, planetarium domes, astronomy shows or show "
+        "sessions from CSV, JSON or NDJSON files in batches. Shows refer "
+        "to themes by name and sessions to shows and domes, so import "
+        "those first. Every batch is a transaction of its own: a "
+        "batch with an invalid or duplicate row is rolled back and "
+        "reported, the other batches are kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=IMPORTERS)
+        parser.add_argument("paths", nargs="+", type=pathlib.Path)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--database", default="default")
+        parser.add_argument(
+            "--no-copy",
+            action="store_false",
+            dest="copy",
+            help="use INSERT instead of COPY on PostgreSQL",
+        )
+
+    def handle(self, *args, **options):
+        importer = IMPORTERS[options["kind"]](
+            options["database"], options["copy"]
+        )
+        imported = failed = 0
+        start = time.perf_counter()
+        for path in options["paths"]:
+            for number, records in enumerate(
+                batched(read_records(path), options["batch_size"]), start=1
+            ):
+                try:
+                    with transaction.atomic(using=options["database"]):
+                        importer.import_batch(records)
+                except (ValueError, DatabaseError) as error:
+                    failed += len(records)
+                    self.stderr.write(
+                        f"{path} batch {number} rolled back: {error}"
+                    )
+                    continue
+                imported += len(records)
+                if options["verbosity"] > 1:
+                    self.stdout.write(self.progress(imported, start))
+        if imported and importer.cache_namespaces:
+            # bulk inserts send no post_save to invalidate the cache
+            bump_versions(*importer.cache_namespaces)
+        self.stdout.write(self.style.SUCCESS(self.progress(imported, start)))
+        if failed:
+            raise CommandError(f"{failed} rows were not imported")
+
+    @staticmethod
+    def progress(imported, start):
+        elapsed = time.perf_counter() - start
+        return (
+            f"Imported {imported} rows in {elapsed:.2f} s "
+            f"({imported / elapsed if elapsed else 0:.0f} rows/s)"
+        )
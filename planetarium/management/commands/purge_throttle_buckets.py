@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from planetarium.models import ThrottleBucket
+from planetarium.throttling import refill_seconds
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes throttle buckets idle long enough to be full again, run it "
+        "periodically (e.g. from cron)"
+    )
+
+    def handle(self, *args, **options):
+        deleted, _ = ThrottleBucket.objects.idle(refill_seconds()).delete()
+        self.stdout.write(
+            self.style.SUCCESS(f"Purged {deleted} full throttle buckets")
+        )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from planetarium.models import SeatHold
+
+
+class Command(BaseCommand):
+    help = "Deletes expired seat holds, run it periodically (e.g. from cron)"
+
+    def handle(self, *args, **options):
+        deleted, _ = SeatHold.objects.expired().delete()
+        self.stdout.write(
+            self.style.SUCCESS(f"Released {deleted} expired seat holds")
+        )
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from planetarium.models import ShowSession
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes seats_sold and seats_available of every show session "
+        "from its tickets"
+    )
+
+    def handle(self, *args, **options):
+        updated = ShowSession.objects.repair_seat_counters()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Repaired counters of {updated} show sessions"
+            )
+        )
@@ -0,0 +1,136 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from planetarium.cache import bump_versions
+from planetarium.seeding import SEED_PASSWORD, Seeder
+
+
+class Command(BaseCommand):
+    help = (
+        "Fills an empty database with synthetic show themes, planetarium "
+        "domes, astronomy shows, show sessions, users and reservations "
+        "with tickets. The same --seed gives the same data. Tickets are "
+        "written with COPY on PostgreSQL. Users log in with "
+        f"{SEED_PASSWORD!r}."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--themes", type=int, default=50)
+        parser.add_argument("--domes", type=int, default=20)
+        parser.add_argument(
+            "--max-rows",
+            type=int,
+            default=50,
+            help="dome rows are drawn from 5 up to this",
+        )
+        parser.add_argument(
+            "--max-seats-in-row",
+            type=int,
+            default=630,
+            help="dome seats per row are drawn from 10 up to this",
+        )
+        parser.add_argument("--shows", type=int, default=1000)
+        parser.add_argument("--sessions", type=int, default=500)
+        parser.add_argument(
+            "--start",
+            type=date.fromisoformat,
+            default=date(2024, 1, 1),
+            help="first day of the sessions, YYYY-MM-DD",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=365,
+            help="the sessions are spread over this many days",
+        )
+        parser.add_argument("--users", type=int, default=10_000)
+        parser.add_argument(
+            "--fill-rate",
+            type=float,
+            default=0.5,
+            help="share of the seats of every session that is sold",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--database", default="default")
+        parser.add_argument(
+            "--no-copy",
+            action="store_false",
+            dest="copy",
+            help="use INSERT instead of COPY on PostgreSQL",
+        )
+
+    def handle(self, *args, **options):
+        if not 0 <= options["fill_rate"] <= 1:
+            raise CommandError("--fill-rate must be between 0 and 1.")
+        if not (1 <= options["max_rows"] <= 50) or not (
+            1 <= options["max_seats_in_row"] <= 630
+        ):
+            raise CommandError("Domes have at most 50 rows of 630 seats.")
+        if options["sessions"] and not (
+            options["shows"] and options["domes"]
+        ):
+            raise CommandError("Sessions need --shows and --domes.")
+        if (
+            options["fill_rate"]
+            and options["sessions"]
+            and not options["users"]
+        ):
+            raise CommandError("Tickets need --users.")
+        seeder = Seeder(
+            options["seed"],
+            options["database"],
+            options["batch_size"],
+            options["copy"],
+        )
+        theme_ids = self.step("show themes", seeder.themes, options["themes"])
+        domes = self.step(
+            "planetarium domes",
+            seeder.domes,
+            options["domes"],
+            (min(5, options["max_rows"]), options["max_rows"]),
+            (
+                min(10, options["max_seats_in_row"]),
+                options["max_seats_in_row"],
+            ),
+        )
+        show_ids = self.step(
+            "astronomy shows", seeder.shows, options["shows"], theme_ids
+        )
+        sessions = self.step(
+            "show sessions",
+            seeder.sessions,
+            options["sessions"],
+            show_ids,
+            domes,
+            options["start"],
+            options["days"],
+        )
+        user_ids = self.step("users", seeder.users, options["users"])
+        if sessions and options["fill_rate"]:
+            self.step(
+                "tickets",
+                seeder.tickets,
+                sessions,
+                user_ids,
+                options["fill_rate"],
+            )
+        bump_versions("showtheme", "planetariumdome", "astronomyshow")
+        if connections[options["database"]].vendor == "postgresql":
+            with connections[options["database"]].cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+    def step(self, label, create, *args):
+        """run create(*args) and report how many rows per second it wrote"""
+        start = time.perf_counter()
+        created = create(*args)
+        elapsed = time.perf_counter() - start
+        count = created if isinstance(created, int) else len(created)
+        self.stdout.write(
+            f"{count} {label} in {elapsed:.2f} s "
+            f"({count / elapsed if elapsed else 0:.0f} rows/s)"
+        )
+        return created
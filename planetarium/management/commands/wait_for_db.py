@@ -1,21 +1,38 @@
 from django.core.management.base import BaseCommand
-from django.db import connections
+from django.db import DEFAULT_DB_ALIAS, connections
 from django.db.utils import OperationalError
 import time
 
 
 class Command(BaseCommand):
-    helper = "Waits for the database to be available"
+    help = "Waits for the database to be available"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="alias of the database to wait for",
+        )
 
     def handle(self, *args, **options):
+        connection = connections[options["database"]]
         self.stdout.write("Waiting for database...")
-        db_conn = None
-        while not db_conn:
-            try:
-                db_conn = connections["default"]
-                db_conn.cursor()
-            except OperationalError:
-                self.stdout.write("Database unavailable, waiting 1 second...")
-                time.sleep(1)
+        while not self.database_available(connection):
+            self.stdout.write("Database unavailable, waiting 1 second...")
+            time.sleep(1)
 
         self.stdout.write(self.style.SUCCESS("Database available!"))
+
+    @staticmethod
+    def database_available(connection):
+        """opens and closes a connection of its own: through a connection
+        pool every attempt would wait for the pool timeout, and the pool
+        would keep reconnecting in the background afterwards"""
+        try:
+            with connection.wrap_database_errors:
+                connection.Database.connect(
+                    **connection.get_connection_params()
+                ).close()
+        except OperationalError:
+            return False
+        return True
@@ -0,0 +1,108 @@
+from django.db import migrations
+
+
+class AddUniqueConstraintConcurrently(migrations.AddConstraint):
+    """AddConstraint that does not lock big tables on PostgreSQL.
+
+    The unique index is built with CREATE UNIQUE INDEX CONCURRENTLY and then
+    attached to the table as the constraint, which only needs a short lock.
+    Other databases fall back to the regular AddConstraint. The migration
+    using it must set atomic = False.
+    """
+
+    def database_forwards(
+        self, app_label, schema_editor, from_state, to_state
+    ):
+        if schema_editor.connection.vendor != "postgresql":
+            return super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(
+            schema_editor.connection.alias, model
+        ):
+            return
+        quote_name = schema_editor.quote_name
+        table = quote_name(model._meta.db_table)
+        name = quote_name(self.constraint.name)
+        columns = ", ".join(
+            quote_name(model._meta.get_field(field).column)
+            for field in self.constraint.fields
+        )
+        schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        schema_editor.execute(
+            f"CREATE UNIQUE INDEX CONCURRENTLY {name} ON {table} ({columns})"
+        )
+        schema_editor.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {name} UNIQUE USING INDEX {name}"
+        )
+
+
+class AddIndexConcurrently(migrations.AddIndex):
+    """AddIndex that builds the index with CREATE INDEX CONCURRENTLY on
+    PostgreSQL, so writes to the table are not blocked meanwhile. The
+    migration using it must set atomic = False."""
+
+    def database_forwards(
+        self, app_label, schema_editor, from_state, to_state
+    ):
+        if schema_editor.connection.vendor != "postgresql":
+            return super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(model, self.index, concurrently=True)
+
+    def database_backwards(
+        self, app_label, schema_editor, from_state, to_state
+    ):
+        if schema_editor.connection.vendor != "postgresql":
+            return super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(model, self.index, concurrently=True)
+
+
+class AddPostgreSQLIndexConcurrently(AddIndexConcurrently):
+    """AddIndexConcurrently for PostgreSQL-only index types (GIN, GiST,
+    opclasses...). The index is part of the migration state everywhere but
+    only created on PostgreSQL."""
+
+    def database_forwards(
+        self, app_label, schema_editor, from_state, to_state
+    ):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+    def database_backwards(
+        self, app_label, schema_editor, from_state, to_state
+    ):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+
+class RunSQLOnPostgreSQL(migrations.RunSQL):
+    """RunSQL that is skipped on every other database."""
+
+    def database_forwards(
+        self, app_label, schema_editor, from_state, to_state
+    ):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+    def database_backwards(
+        self, app_label, schema_editor, from_state, to_state
+    ):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
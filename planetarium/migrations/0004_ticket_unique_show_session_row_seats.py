@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+from planetarium.migration_operations import AddUniqueConstraintConcurrently
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("planetarium", "0003_seathold"),
+    ]
+
+    operations = [
+        AddUniqueConstraintConcurrently(
+            model_name="ticket",
+            constraint=models.UniqueConstraint(
+                fields=("show_session", "row", "seat"),
+                name="unique_show_session_row_seats",
+            ),
+        ),
+        migrations.RemoveConstraint(
+            model_name="ticket",
+            name="unique_row_seats",
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+from planetarium.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("planetarium", "0004_ticket_unique_show_session_row_seats"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="showsession",
+            index=models.Index(
+                fields=["show_time", "id"],
+                name="showsession_show_time_id_idx",
+            ),
+        ),
+    ]
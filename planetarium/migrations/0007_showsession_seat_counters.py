@@ -0,0 +1,50 @@
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_seat_counters(apps, schema_editor):
+    ShowSession = apps.get_model("planetarium", "ShowSession")
+    Ticket = apps.get_model("planetarium", "Ticket")
+    PlanetariumDome = apps.get_model("planetarium", "PlanetariumDome")
+    sold = Coalesce(
+        Subquery(
+            Ticket.objects.filter(show_session=OuterRef("pk"))
+            .order_by()
+            .values("show_session")
+            .annotate(count=Count("pk"))
+            .values("count")
+        ),
+        0,
+    )
+    capacity = Subquery(
+        PlanetariumDome.objects.filter(
+            pk=OuterRef("planetarium_dome")
+        ).values(capacity=F("rows") * F("seats_in_row"))
+    )
+    ShowSession.objects.using(schema_editor.connection.alias).update(
+        seats_sold=sold, seats_available=capacity - sold
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("planetarium", "0006_astronomyshow_updated_at_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="showsession",
+            name="seats_available",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="showsession",
+            name="seats_sold",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(
+            fill_seat_counters, reverse_code=migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+from planetarium.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("planetarium", "0007_showsession_seat_counters"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="showsession",
+            index=models.Index(
+                fields=["seats_available", "id"],
+                name="showsession_available_id_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,60 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+from planetarium.migration_operations import (
+    AddPostgreSQLIndexConcurrently,
+    RunSQLOnPostgreSQL,
+)
+
+# keep the text search configuration in sync with planetarium.search
+SEARCH_VECTOR_TRIGGER = """
+CREATE FUNCTION planetarium_astronomyshow_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER planetarium_astronomyshow_search_vector
+BEFORE INSERT OR UPDATE OF title, description, search_vector
+ON planetarium_astronomyshow
+FOR EACH ROW EXECUTE FUNCTION planetarium_astronomyshow_search_vector();
+
+UPDATE planetarium_astronomyshow SET title = title;
+"""
+
+DROP_SEARCH_VECTOR_TRIGGER = """
+DROP TRIGGER planetarium_astronomyshow_search_vector
+ON planetarium_astronomyshow;
+DROP FUNCTION planetarium_astronomyshow_search_vector();
+"""
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("planetarium", "0008_showsession_available_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="astronomyshow",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        RunSQLOnPostgreSQL(
+            SEARCH_VECTOR_TRIGGER, reverse_sql=DROP_SEARCH_VECTOR_TRIGGER
+        ),
+        AddPostgreSQLIndexConcurrently(
+            model_name="astronomyshow",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="astronomyshow_search_gin"
+            ),
+        ),
+    ]
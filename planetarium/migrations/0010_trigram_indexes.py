@@ -0,0 +1,61 @@
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+from planetarium.migration_operations import AddPostgreSQLIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("planetarium", "0009_astronomyshow_search_vector"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddPostgreSQLIndexConcurrently(
+            model_name="astronomyshow",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper(
+                        django.db.models.functions.comparison.Cast(
+                            "title", output_field=models.TextField()
+                        )
+                    ),
+                    name="gin_trgm_ops",
+                ),
+                name="astronomyshow_title_trgm",
+            ),
+        ),
+        AddPostgreSQLIndexConcurrently(
+            model_name="planetariumdome",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper(
+                        django.db.models.functions.comparison.Cast(
+                            "name", output_field=models.TextField()
+                        )
+                    ),
+                    name="gin_trgm_ops",
+                ),
+                name="planetariumdome_name_trgm",
+            ),
+        ),
+        AddPostgreSQLIndexConcurrently(
+            model_name="showtheme",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper(
+                        django.db.models.functions.comparison.Cast(
+                            "name", output_field=models.TextField()
+                        )
+                    ),
+                    name="gin_trgm_ops",
+                ),
+                name="showtheme_name_trgm",
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+from planetarium.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("planetarium", "0010_trigram_indexes"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="reservation",
+            index=models.Index(
+                fields=["user", "created_at"],
+                name="reservation_user_created_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.4 on 2026-10-18 05:54
+
+from django.db import migrations, models
+
+from planetarium.migration_operations import RunSQLOnPostgreSQL
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("planetarium", "0011_reservation_user_created_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ThrottleBucket",
+            fields=[
+                (
+                    "key",
+                    models.CharField(
+                        max_length=255, primary_key=True, serialize=False
+                    ),
+                ),
+                ("tokens", models.FloatField()),
+                ("updated_at", models.FloatField()),
+            ],
+        ),
+        # buckets only ever refill, losing them in a crash is harmless and
+        # the table skips the WAL: no flush to wait for on every request
+        RunSQLOnPostgreSQL(
+            "ALTER TABLE planetarium_throttlebucket SET UNLOGGED",
+            reverse_sql="ALTER TABLE planetarium_throttlebucket SET LOGGED",
+        ),
+    ]
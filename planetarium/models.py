@@ -1,13 +1,38 @@
 import pathlib
+import time
 import uuid
-
-from django.db import models
-from django.db.models import UniqueConstraint
+from collections import Counter, defaultdict
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, router, transaction
+from django.db.models import (
+    Count,
+    F,
+    OuterRef,
+    Subquery,
+    TextField,
+    UniqueConstraint,
+)
+from django.db.models.functions import Cast, Coalesce, Upper
 from django.template.defaultfilters import slugify
+from django.utils import timezone
 
 from planetarium_api_service import settings
 
 
+def trigram_index(field_name, name):
+    """GIN index serving field_name__icontains on PostgreSQL, which
+    compiles to UPPER(field::text) LIKE UPPER(%s)"""
+    return GinIndex(
+        OpClass(
+            Upper(Cast(field_name, output_field=TextField())),
+            name="gin_trgm_ops",
+        ),
+        name=name,
+    )
+
+
 def astronomy_show_image_path(self, filename):
     filename = (
         f"{slugify(self.title)}-{uuid.uuid4()}"
@@ -23,11 +48,19 @@ class AstronomyShow(models.Model):
         "ShowTheme", related_name="astronomy_show"
     )
     image = models.ImageField(upload_to=astronomy_show_image_path, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         constraints = [
             UniqueConstraint(fields=["title"], name="unique_title")
         ]
+        indexes = [
+            GinIndex(
+                fields=["search_vector"], name="astronomyshow_search_gin"
+            ),
+            trigram_index("title", "astronomyshow_title_trgm"),
+        ]
 
     def __str__(self):
         self.show_themes = ", ".join(
@@ -38,14 +71,70 @@ class AstronomyShow(models.Model):
 
 class ShowTheme(models.Model):
     name = models.CharField(max_length=256)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         constraints = [UniqueConstraint(fields=["name"], name="unique_name")]
+        indexes = [trigram_index("name", "showtheme_name_trgm")]
 
     def __str__(self):
         return self.name
 
 
+class ShowSessionQuerySet(models.QuerySet):
+    def add_seats_sold(self, count):
+        """F() expressions keep concurrent bookings from losing updates"""
+        return self.update(
+            seats_sold=F("seats_sold") + count,
+            seats_available=F("seats_available") - count,
+            updated_at=timezone.now(),
+        )
+
+    def remove_tickets(self, tickets):
+        """take the tickets, before they are deleted, off the counters of
+        their show sessions in a single UPDATE"""
+        removed = Coalesce(
+            Subquery(
+                tickets.filter(show_session=OuterRef("pk"))
+                .order_by()
+                .values("show_session")
+                .annotate(count=Count("pk"))
+                .values("count")
+            ),
+            0,
+        )
+        return self.filter(
+            pk__in=tickets.order_by().values("show_session")
+        ).update(
+            seats_sold=F("seats_sold") - removed,
+            seats_available=F("seats_available") + removed,
+            updated_at=timezone.now(),
+        )
+
+    def repair_seat_counters(self):
+        """recompute both counters from the tickets in a single UPDATE"""
+        sold = Coalesce(
+            Subquery(
+                Ticket.objects.filter(show_session=OuterRef("pk"))
+                .order_by()
+                .values("show_session")
+                .annotate(count=Count("pk"))
+                .values("count")
+            ),
+            0,
+        )
+        capacity = Subquery(
+            PlanetariumDome.objects.filter(
+                pk=OuterRef("planetarium_dome")
+            ).values(capacity=F("rows") * F("seats_in_row"))
+        )
+        return self.update(
+            seats_sold=sold,
+            seats_available=capacity - sold,
+            updated_at=timezone.now(),
+        )
+
+
 class ShowSession(models.Model):
     astronomy_show = models.ForeignKey(
         AstronomyShow, on_delete=models.CASCADE, related_name="show_sessions"
@@ -56,6 +145,74 @@ class ShowSession(models.Model):
         related_name="dome_sessions",
     )
     show_time = models.DateField()
+    seats_sold = models.PositiveIntegerField(default=0, editable=False)
+    seats_available = models.IntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ShowSessionQuerySet.as_manager()
+
+    SEAT_COUNTERS = ("seats_sold", "seats_available")
+    # the dome seats_available was computed for
+    _loaded_planetarium_dome_id = None
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["show_time", "id"],
+                name="showsession_show_time_id_idx",
+            ),
+            models.Index(
+                fields=["seats_available", "id"],
+                name="showsession_available_id_idx",
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_planetarium_dome_id = instance.__dict__.get(
+            "planetarium_dome_id"
+        )
+        return instance
+
+    def save(
+        self,
+        force_insert=False,
+        force_update=False,
+        using=None,
+        update_fields=None,
+    ):
+        """the counters belong to add_seats_sold, a save never writes them
+        back from a possibly stale instance; seats_available is resynced
+        only when the session moves to another dome"""
+        adding = self._state.adding
+        if adding:
+            self.seats_available = (
+                self.planetarium_dome.capacity - self.seats_sold
+            )
+            resync = False
+        elif update_fields is None:
+            update_fields = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.SEAT_COUNTERS
+            ]
+            resync = (
+                self.planetarium_dome_id != self._loaded_planetarium_dome_id
+            )
+        else:
+            dome_fields = {"planetarium_dome", "planetarium_dome_id"}
+            resync = not dome_fields.isdisjoint(update_fields)
+        super(ShowSession, self).save(
+            force_insert, force_update, using, update_fields
+        )
+        self._loaded_planetarium_dome_id = self.planetarium_dome_id
+        if resync:
+            ShowSession.objects.filter(pk=self.pk).update(
+                seats_available=self.planetarium_dome.capacity
+                - F("seats_sold")
+            )
 
     def __str__(self):
         return (
@@ -76,11 +233,13 @@ class PlanetariumDome(models.Model):
     rows = models.IntegerField()
     seats_in_row = models.IntegerField()
     image = models.ImageField(upload_to=image_path, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         constraints = [
             UniqueConstraint(fields=["name"], name="unique_name_planetarium")
         ]
+        indexes = [trigram_index("name", "planetariumdome_name_trgm")]
 
     @staticmethod
     def validate_row_seats_in_row(rows, seats_in_row, error_to_raise):
@@ -110,10 +269,48 @@ class PlanetariumDome(models.Model):
             force_insert, force_update, using, update_fields
         )
 
+    @property
+    def capacity(self):
+        return self.rows * self.seats_in_row
+
     def __str__(self):
         return f"name : {self.name} , rows : {self.rows} , seats_in_row : {self.seats_in_row}"
 
 
+class TicketQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        """bulk_create sends no post_save, so the counters of the show
+        sessions are adjusted here, with one UPDATE per distinct number of
+        new tickets rather than one per show session"""
+        objs = super().bulk_create(objs, *args, **kwargs)
+        if kwargs.get("ignore_conflicts") or kwargs.get("update_conflicts"):
+            ShowSession.objects.filter(
+                pk__in={obj.show_session_id for obj in objs}
+            ).repair_seat_counters()
+            return objs
+        show_sessions_by_count = defaultdict(list)
+        for show_session_id, count in Counter(
+            obj.show_session_id for obj in objs
+        ).items():
+            show_sessions_by_count[count].append(show_session_id)
+        for count, show_session_ids in show_sessions_by_count.items():
+            # stay well below the bind parameter limit of the backends
+            for start in range(0, len(show_session_ids), 5000):
+                ShowSession.objects.filter(
+                    pk__in=show_session_ids[start : start + 5000]
+                ).add_seats_sold(count)
+        return objs
+
+    def delete(self):
+        """a post_delete receiver would turn off fast deletes of every
+        cascade to tickets, so the counters are adjusted here, in the
+        deletes of reservations and by the pre_delete receiver of users"""
+        using = self._db or router.db_for_write(self.model, **self._hints)
+        with transaction.atomic(using=using, savepoint=False):
+            ShowSession.objects.using(using).remove_tickets(self)
+            return super().delete()
+
+
 class Ticket(models.Model):
     row = models.IntegerField()
     seat = models.IntegerField()
@@ -125,10 +322,16 @@ class Ticket(models.Model):
         on_delete=models.CASCADE,
         related_name="reservation_tickets",
     )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = TicketQuerySet.as_manager()
 
     class Meta:
         constraints = [
-            UniqueConstraint(fields=["row", "seat"], name="unique_row_seats")
+            UniqueConstraint(
+                fields=["show_session", "row", "seat"],
+                name="unique_show_session_row_seats",
+            )
         ]
 
     @staticmethod
@@ -165,10 +368,29 @@ class Ticket(models.Model):
             force_insert, force_update, using, update_fields
         )
 
+    def delete(self, using=None, keep_parents=False):
+        using = using or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            ShowSession.objects.using(using).filter(
+                pk=self.show_session_id
+            ).add_seats_sold(-1)
+            return super().delete(using, keep_parents)
+
     def __str__(self):
         return f"row:{self.row} - seat:{self.seat} - show_session:{self.show_session} - reservation:{self.reservation.user}"
 
 
+class ReservationQuerySet(models.QuerySet):
+    def delete(self):
+        """the tickets cascade with fast deletes, which send no signals"""
+        using = self._db or router.db_for_write(self.model, **self._hints)
+        with transaction.atomic(using=using, savepoint=False):
+            ShowSession.objects.using(using).remove_tickets(
+                Ticket.objects.using(using).filter(reservation__in=self)
+            )
+            return super().delete()
+
+
 class Reservation(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     user = models.ForeignKey(
@@ -177,5 +399,78 @@ class Reservation(models.Model):
         related_name="user",
     )
 
+    objects = ReservationQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "created_at"],
+                name="reservation_user_created_idx",
+            )
+        ]
+
+    def delete(self, using=None, keep_parents=False):
+        using = using or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            ShowSession.objects.using(using).remove_tickets(
+                Ticket.objects.using(using).filter(reservation=self)
+            )
+            return super().delete(using, keep_parents)
+
     def __str__(self):
         return f"reservation for : {self.user}, created at: {self.created_at}"
+
+
+class SeatHoldQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(expires_at__gt=timezone.now())
+
+    def expired(self):
+        return self.filter(expires_at__lte=timezone.now())
+
+
+class SeatHold(models.Model):
+    row = models.IntegerField()
+    seat = models.IntegerField()
+    show_session = models.ForeignKey(
+        ShowSession, on_delete=models.CASCADE, related_name="seat_holds"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="seat_holds",
+    )
+    expires_at = models.DateTimeField(db_index=True)
+
+    objects = SeatHoldQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=["show_session", "row", "seat"],
+                name="unique_hold_session_row_seat",
+            )
+        ]
+
+    def __str__(self):
+        return f"hold row:{self.row} - seat:{self.seat} - show_session:{self.show_session_id} - until:{self.expires_at}"
+
+
+class ThrottleBucketQuerySet(models.QuerySet):
+    def idle(self, seconds):
+        """buckets no token was taken from for seconds"""
+        return self.filter(updated_at__lt=time.time() - seconds)
+
+
+class ThrottleBucket(models.Model):
+    """token bucket of a throttle, see planetarium.throttling"""
+
+    key = models.CharField(max_length=255, primary_key=True)
+    tokens = models.FloatField()
+    # unix time the last token was taken
+    updated_at = models.FloatField()
+
+    objects = ThrottleBucketQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.key}: {self.tokens:.2f} tokens"
@@ -0,0 +1,280 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Keyset (seek) pagination with opaque cursors.
+
+    A page is selected with a WHERE over the values of the ordering columns
+    of the last row seen instead of an OFFSET, so page N costs the same as
+    the first one as long as the ordering is backed by an index. The last
+    ordering field must be unique. No COUNT(*) is ever run.
+
+    orderings maps the values clients may pass in ordering_query_param to
+    alternative orderings, each of them should be backed by an index too.
+    Orderings may use annotations of the queryset. A cursor carries the
+    ordering it was made for and is only valid with that ordering.
+    """
+
+    ordering = ("id",)
+    orderings = {}
+    ordering_query_param = "ordering"
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.prepare(request, view)
+        return self.set_page(list(self.get_page_queryset(queryset)))
+
+    def prepare(self, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_base_ordering(request, view)
+
+    def get_page_queryset(self, queryset):
+        """the queryset of the current page with one extra row that tells
+        whether there is a page after it"""
+        self.cursor = self.decode_cursor(self.request, queryset)
+        reverse = bool(self.cursor and self.cursor["reverse"])
+        ordering = self.get_ordering(reverse)
+        queryset = queryset.order_by(*ordering)
+        if self.cursor:
+            queryset = queryset.filter(
+                self.seek_filter(ordering, self.cursor["position"])
+            )
+        return queryset[: self.page_size + 1]
+
+    def set_page(self, results):
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        reverse = bool(self.cursor and self.cursor["reverse"])
+        if reverse:
+            results.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, self.cursor is not None
+        self.next_position = (
+            self.get_position(results[-1]) if has_next and results else None
+        )
+        self.previous_position = (
+            self.get_position(results[0])
+            if has_previous and results
+            else None
+        )
+        return results
+
+    def get_base_ordering(self, request, view=None):
+        """a view can impose an ordering through its keyset_ordering
+        attribute, e.g. to order search results by rank"""
+        ordering = getattr(view, "keyset_ordering", None)
+        if ordering:
+            return ordering
+        return self.orderings.get(
+            request.query_params.get(self.ordering_query_param),
+            type(self).ordering,
+        )
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_ordering(self, reverse=False):
+        if not reverse:
+            return list(self.ordering)
+        return [
+            field[1:] if field.startswith("-") else f"-{field}"
+            for field in self.ordering
+        ]
+
+    def get_position(self, instance):
+        return [
+            getattr(instance, field.lstrip("-")) for field in self.ordering
+        ]
+
+    @staticmethod
+    def seek_filter(ordering, position):
+        """rows strictly after position, e.g. for ordering (a, b):
+        a > x OR (a = x AND b > y)"""
+        seek = Q()
+        for index, field in enumerate(ordering):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition = Q(**{f"{name}__{lookup}": position[index]})
+            for previous, value in zip(ordering[:index], position):
+                condition &= Q(**{previous.lstrip("-"): value})
+            seek |= condition
+        return seek
+
+    @staticmethod
+    def get_ordering_field(queryset, name):
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return queryset.model._meta.get_field(name)
+
+    def encode_cursor(self, position, reverse):
+        data = json.dumps(
+            {"o": ",".join(self.ordering), "p": position, "r": int(reverse)},
+            cls=DjangoJSONEncoder,
+            separators=(",", ":"),
+        )
+        return base64.urlsafe_b64encode(data.encode()).decode("ascii")
+
+    def decode_cursor(self, request, queryset):
+        """the cursor of the request with its position converted to the
+        types of the ordering fields of queryset; tampered cursors and
+        cursors of another ordering are not found"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            ordering, position = data["o"], data["p"]
+            reverse = bool(data["r"])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if (
+            ordering != ",".join(self.ordering)
+            or not isinstance(position, list)
+            or len(position) != len(self.ordering)
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            position = [
+                self.get_ordering_field(
+                    queryset, field.lstrip("-")
+                ).to_python(value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if None in position:
+            raise NotFound(self.invalid_cursor_message)
+        return {"position": position, "reverse": reverse}
+
+    def get_link(self, position, reverse):
+        if position is None:
+            return None
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            self.encode_cursor(position, reverse),
+        )
+
+    def get_next_link(self):
+        return self.get_link(self.next_position, False)
+
+    def get_previous_link(self):
+        return self.get_link(self.previous_position, True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        example = "http://api.example.org/accounts/?{}={}".format(
+            self.cursor_query_param, self.encode_cursor([42], False)
+        )
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {
+                    "type": "string",
+                    "nullable": True,
+                    "format": "uri",
+                    "example": example,
+                },
+                "previous": {
+                    "type": "string",
+                    "nullable": True,
+                    "format": "uri",
+                    "example": example,
+                },
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        parameters = [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page, "
+                f"at most {self.max_page_size}.",
+                "schema": {"type": "integer"},
+            },
+        ]
+        if self.orderings:
+            parameters.append(
+                {
+                    "name": self.ordering_query_param,
+                    "required": False,
+                    "in": "query",
+                    "description": "Which field to use when ordering "
+                    "the results.",
+                    "schema": {
+                        "type": "string",
+                        "enum": list(self.orderings),
+                    },
+                }
+            )
+        return parameters
+
+
+class TicketPagination(KeysetPagination):
+    page_size = 50
+    max_page_size = 200
+
+
+class AstronomyShowPagination(KeysetPagination):
+    page_size = 20
+    max_page_size = 100
+
+
+class PlanetariumDomePagination(KeysetPagination):
+    page_size = 20
+    max_page_size = 100
+
+
+class ShowSessionPagination(KeysetPagination):
+    ordering = ("show_time", "id")
+    orderings = {
+        "seats_available": ("seats_available", "id"),
+        "-seats_available": ("-seats_available", "-id"),
+    }
+    page_size = 20
+    max_page_size = 100
+
+
+class ShowThemePagination(KeysetPagination):
+    page_size = 50
+    max_page_size = 200
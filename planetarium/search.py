@@ -0,0 +1,43 @@
+"""Full-text search over the astronomy show catalog.
+
+On PostgreSQL AstronomyShow.search_vector is kept current by a trigger
+(migration 0009) and backed by a GIN index, so a search is an index scan
+ranked with ts_rank. Other databases fall back to icontains.
+"""
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Cast
+
+SEARCH_CONFIG = "english"
+SEARCH_RANK_ORDERING = ("-search_rank", "-id")
+
+
+def supports_full_text_search(queryset):
+    return connections[queryset.db].vendor == "postgresql"
+
+
+def search_astronomy_shows(queryset, query, prefix="", rank=True):
+    """filter queryset by query, prefix is the lookup path from the model
+    of queryset to AstronomyShow, e.g. "astronomy_show__". With rank the
+    rows are annotated with search_rank on PostgreSQL"""
+    if not supports_full_text_search(queryset):
+        return queryset.filter(
+            Q(**{f"{prefix}title__icontains": query})
+            | Q(**{f"{prefix}description__icontains": query})
+        )
+    search_query = SearchQuery(
+        query, config=SEARCH_CONFIG, search_type="websearch"
+    )
+    queryset = queryset.filter(**{f"{prefix}search_vector": search_query})
+    if not rank:
+        return queryset
+    return queryset.annotate(
+        # double precision survives the round trip through a keyset cursor,
+        # the real returned by ts_rank does not
+        search_rank=Cast(
+            SearchRank(F(f"{prefix}search_vector"), search_query),
+            output_field=FloatField(),
+        )
+    )
@@ -0,0 +1,124 @@
+import base64
+import hashlib
+
+from planetarium.models import Ticket, SeatHold
+
+
+def filter_seats(queryset, seats):
+    """(row, seat) pairs of seats that are present in the queryset"""
+    seats = set(seats)
+    return (
+        set(
+            queryset.filter(
+                row__in={row for row, _ in seats},
+                seat__in={seat for _, seat in seats},
+            ).values_list("row", "seat")
+        )
+        & seats
+    )
+
+
+class SeatMap:
+    """Occupancy of one show session.
+
+    Every row is kept as an int bitmask where bit 0 is seat 1, so a whole
+    row can be tested or combined with a single bit operation.
+    """
+
+    def __init__(self, rows, seats_in_row, occupied=()):
+        self.rows = rows
+        self.seats_in_row = seats_in_row
+        self.row_masks = [0] * rows
+        for row, seat in occupied:
+            # tickets sold before the dome was made smaller
+            if 1 <= row <= rows and 1 <= seat <= seats_in_row:
+                self.row_masks[row - 1] |= 1 << (seat - 1)
+
+    @classmethod
+    def for_show_session(cls, show_session):
+        """build the map with one query over the tickets and the active
+        seat holds of the session"""
+        return cls(
+            show_session.planetarium_dome.rows,
+            show_session.planetarium_dome.seats_in_row,
+            Ticket.objects.filter(show_session=show_session)
+            .values_list("row", "seat")
+            .union(
+                SeatHold.objects.active()
+                .filter(show_session=show_session)
+                .values_list("row", "seat"),
+                all=True,
+            ),
+        )
+
+    def is_taken(self, row, seat):
+        return bool(self.row_masks[row - 1] >> (seat - 1) & 1)
+
+    @property
+    def taken_count(self):
+        return sum(mask.bit_count() for mask in self.row_masks)
+
+    def free_blocks(self, row, size):
+        """bitmask of seats in the row that start size free adjacent seats"""
+        blocks = ~self.row_masks[row - 1] & ((1 << self.seats_in_row) - 1)
+        span = 1
+        while span < size:
+            step = min(span, size - span)
+            blocks &= blocks >> step
+            span += step
+        return blocks
+
+    def find_block(self, size, preferred_row=None):
+        """(row, first seat) of the best block of size adjacent free seats
+
+        Rows are tried from the preferred one (or the middle row) outwards
+        and inside a row the block closest to the center wins, so every row
+        costs a handful of bit operations. Returns None if no row has room.
+        """
+        if not 1 <= size <= self.seats_in_row:
+            return None
+        if preferred_row is None:
+            rows = sorted(
+                range(1, self.rows + 1),
+                key=lambda row: abs(2 * row - self.rows - 1),
+            )
+        else:
+            rows = sorted(
+                range(1, self.rows + 1),
+                key=lambda row: abs(row - preferred_row),
+            )
+        center = (self.seats_in_row - size) // 2
+        for row in rows:
+            blocks = self.free_blocks(row, size)
+            if not blocks:
+                continue
+            right = blocks >> center
+            left = blocks & ((1 << center) - 1)
+            candidates = []
+            if right:
+                candidates.append(center + (right & -right).bit_length() - 1)
+            if left:
+                candidates.append(left.bit_length() - 1)
+            start = min(candidates, key=lambda seat: abs(seat - center))
+            return row, start + 1
+        return None
+
+    def to_bytes(self):
+        """pack all seats row by row, seat (row, seat) lands on bit
+        (row - 1) * seats_in_row + seat - 1 counted from the least
+        significant bit of the first byte"""
+        packed = 0
+        for index, mask in enumerate(self.row_masks):
+            packed |= mask << (index * self.seats_in_row)
+        return packed.to_bytes(
+            (self.rows * self.seats_in_row + 7) // 8, "little"
+        )
+
+    def to_base64(self):
+        return base64.b64encode(self.to_bytes()).decode("ascii")
+
+    def etag(self):
+        digest = hashlib.sha1(
+            f"{self.rows}x{self.seats_in_row}:".encode() + self.to_bytes()
+        ).hexdigest()
+        return f'"{digest}"'
@@ -0,0 +1,231 @@
+"""Synthetic data for load tests and benchmarks.
+
+Seeder draws everything from one random.Random(seed), so the same calls
+with the same seed produce the same rows. Parents are written with
+bulk_create, which returns their primary keys, tickets, the bulk of the
+data, with planetarium.bulk.insert_rows, i.e. COPY on PostgreSQL. Names
+are numbered from 0, so seed into an empty database.
+"""
+
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from planetarium.bulk import batched, insert_rows
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    Reservation,
+    ShowSession,
+    ShowTheme,
+    Ticket,
+)
+
+WORDS = (
+    "andromeda",
+    "aurora",
+    "comet",
+    "eclipse",
+    "galaxy",
+    "meteor",
+    "nebula",
+    "orbit",
+    "pulsar",
+    "quasar",
+    "saturn",
+    "zenith",
+)
+SEED_PASSWORD = "planetarium"
+
+
+class Seeder:
+    def __init__(self, seed=0, using="default", batch_size=5000, copy=True):
+        self.rng = random.Random(seed)
+        self.using = using
+        self.batch_size = batch_size
+        self.copy = copy
+
+    def name(self, number):
+        return (
+            f"{self.rng.choice(WORDS)} {self.rng.choice(WORDS)} "
+            f"{number:06d}"
+        )
+
+    def bulk_create(self, model, objs):
+        return model._default_manager.using(self.using).bulk_create(
+            objs, batch_size=self.batch_size
+        )
+
+    def themes(self, count):
+        """primary keys of count new show themes"""
+        return [
+            theme.pk
+            for theme in self.bulk_create(
+                ShowTheme,
+                (
+                    ShowTheme(name=self.name(number))
+                    for number in range(count)
+                ),
+            )
+        ]
+
+    def domes(self, count, rows=(5, 50), seats_in_row=(10, 630)):
+        """count new domes as (pk, rows, seats_in_row), sizes are drawn
+        from the inclusive ranges"""
+        domes = self.bulk_create(
+            PlanetariumDome,
+            (
+                PlanetariumDome(
+                    name=self.name(number),
+                    rows=self.rng.randint(*rows),
+                    seats_in_row=self.rng.randint(*seats_in_row),
+                )
+                for number in range(count)
+            ),
+        )
+        return [(dome.pk, dome.rows, dome.seats_in_row) for dome in domes]
+
+    def shows(self, count, theme_ids=(), themes_per_show=(1, 3)):
+        """primary keys of count new astronomy shows"""
+        shows = self.bulk_create(
+            AstronomyShow,
+            (
+                AstronomyShow(
+                    title=self.name(number),
+                    description=" ".join(self.rng.choices(WORDS, k=20)),
+                )
+                for number in range(count)
+            ),
+        )
+        if theme_ids:
+            through = AstronomyShow.show_theme.through
+            self.bulk_create(
+                through,
+                (
+                    through(astronomyshow_id=show.pk, showtheme_id=theme_id)
+                    for show in shows
+                    for theme_id in self.rng.sample(
+                        theme_ids,
+                        min(
+                            len(theme_ids), self.rng.randint(*themes_per_show)
+                        ),
+                    )
+                ),
+            )
+        return [show.pk for show in shows]
+
+    def sessions(self, count, show_ids, domes, start, days):
+        """count new show sessions of random shows and domes on one of the
+        days from start, as (pk, rows, seats_in_row)"""
+        sessions = []
+        for batch in batched(range(count), self.batch_size):
+            picks = [
+                (self.rng.choice(show_ids), self.rng.choice(domes))
+                for _ in batch
+            ]
+            created = self.bulk_create(
+                ShowSession,
+                [
+                    ShowSession(
+                        astronomy_show_id=show_id,
+                        planetarium_dome_id=dome_id,
+                        show_time=start
+                        + timedelta(days=self.rng.randrange(days)),
+                        seats_available=rows * seats_in_row,
+                    )
+                    for show_id, (dome_id, rows, seats_in_row) in picks
+                ],
+            )
+            sessions.extend(
+                (session.pk, rows, seats_in_row)
+                for session, (_, (_, rows, seats_in_row)) in zip(
+                    created, picks
+                )
+            )
+        return sessions
+
+    def users(self, count, prefix="seed-user"):
+        """primary keys of count new users, all with SEED_PASSWORD"""
+        User = get_user_model()
+        # hashing is slow on purpose, one hash serves all of them
+        password = make_password(SEED_PASSWORD)
+        return [
+            user.pk
+            for user in self.bulk_create(
+                User,
+                (
+                    User(username=f"{prefix}-{number:07d}", password=password)
+                    for number in range(count)
+                ),
+            )
+        ]
+
+    def tickets(self, sessions, user_ids, fill_rate, party_size=(1, 6)):
+        """sell about fill_rate of the seats of every session to parties of
+        random users, one reservation per party; returns the ticket count"""
+        created = 0
+        now = timezone.now()
+        for batch in batched(sessions, max(1, self.batch_size // 100)):
+            parties = []
+            for session_id, rows, seats_in_row in batch:
+                capacity = rows * seats_in_row
+                sold = self.rng.sample(
+                    range(capacity),
+                    min(capacity, round(capacity * fill_rate)),
+                )
+                start = 0
+                while start < len(sold):
+                    end = start + self.rng.randint(*party_size)
+                    parties.append(
+                        (
+                            self.rng.choice(user_ids),
+                            session_id,
+                            seats_in_row,
+                            sold[start:end],
+                        )
+                    )
+                    start = end
+            reservations = self.bulk_create(
+                Reservation,
+                (Reservation(user_id=user_id) for user_id, *_ in parties),
+            )
+            rows = [
+                (
+                    seat // seats_in_row + 1,
+                    seat % seats_in_row + 1,
+                    session_id,
+                    reservation.pk,
+                    now,
+                )
+                for reservation, (_, session_id, seats_in_row, seats) in zip(
+                    reservations, parties
+                )
+                for seat in seats
+            ]
+            for chunk in batched(rows, self.batch_size * 10):
+                insert_rows(
+                    Ticket,
+                    (
+                        "row",
+                        "seat",
+                        "show_session_id",
+                        "reservation_id",
+                        "updated_at",
+                    ),
+                    chunk,
+                    self.using,
+                    self.copy,
+                )
+            created += len(rows)
+        self.repair_seat_counters([session_id for session_id, *_ in sessions])
+        return created
+
+    def repair_seat_counters(self, session_ids):
+        """COPY leaves the counters alone, bulk_create updates them"""
+        if session_ids:
+            ShowSession.objects.using(self.using).filter(
+                pk__gte=min(session_ids), pk__lte=max(session_ids)
+            ).repair_seat_counters()
@@ -1,5 +1,9 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
 from rest_framework import serializers
-from rest_framework.validators import UniqueTogetherValidator, UniqueValidator
+from rest_framework.validators import UniqueValidator
 
 from planetarium.models import (
     Ticket,
@@ -8,7 +12,11 @@ from planetarium.models import (
     AstronomyShow,
     PlanetariumDome,
     ShowTheme,
+    SeatHold,
 )
+from planetarium.booking import book_seats, validate_seats
+from planetarium.fieldsets import SparseFieldsetSerializerMixin
+from planetarium.seat_map import filter_seats
 from user.models import User
 from user.serializers import UserSerializer
 
@@ -21,7 +29,9 @@ class AstronomyShowSerializer(serializers.ModelSerializer):
         fields = ("title", "description", "show_theme")
 
 
-class ShowThemeSerializer(serializers.ModelSerializer):
+class ShowThemeSerializer(
+    SparseFieldsetSerializerMixin, serializers.ModelSerializer
+):
     class Meta:
         model = ShowTheme
         fields = ("name",)
@@ -56,7 +66,7 @@ class ReservationSerializer(serializers.ModelSerializer):
 """Custom Serializers for model Ticket"""
 
 
-class TicketListSerializer(TicketSerializer):
+class TicketListSerializer(SparseFieldsetSerializerMixin, TicketSerializer):
     show_session = serializers.CharField(
         source="show_session.astronomy_show.title", read_only=True
     )
@@ -80,25 +90,184 @@ class TicketListSerializer(TicketSerializer):
 
 
 class TicketCreateSerializer(TicketSerializer):
+    """books one seat in two queries, see planetarium.booking"""
+
+    show_session = serializers.IntegerField(source="show_session_id")
+
     class Meta:
         model = Ticket
         fields = ("id", "row", "seat", "show_session")
-        validators = [
-            UniqueTogetherValidator(
-                queryset=Ticket.objects.all(), fields=["row", "seat"]
+        validators = []
+
+    def validate(self, attrs):
+        validate_seats(
+            attrs["show_session_id"],
+            [(attrs["row"], attrs["seat"])],
+            serializers.ValidationError,
+        )
+        return attrs
+
+    def create(self, validated_data):
+        _, (ticket,) = book_seats(
+            validated_data["user"],
+            validated_data["show_session_id"],
+            [(validated_data["row"], validated_data["seat"])],
+        )
+        return ticket
+
+
+class TicketSeatSerializer(serializers.Serializer):
+    id = serializers.IntegerField(read_only=True)
+    row = serializers.IntegerField()
+    seat = serializers.IntegerField()
+
+
+class SeatSelectionSerializer(serializers.Serializer):
+    """base for serializers that pick several seats of one show session"""
+
+    show_session = serializers.PrimaryKeyRelatedField(
+        queryset=ShowSession.objects.select_related("planetarium_dome")
+    )
+
+    def validate_selected_seats(self, show_session, seats, field_name):
+        """check bounds against the dome and that no seat is sold or held
+        by somebody else, seats is a list of (row, seat) pairs"""
+        planetarium_dome = show_session.planetarium_dome
+        for row, seat in seats:
+            Ticket.validate_seats_row(
+                row,
+                planetarium_dome.rows,
+                seat,
+                planetarium_dome.seats_in_row,
+                serializers.ValidationError,
             )
-        ]
+        if len(set(seats)) != len(seats):
+            raise serializers.ValidationError(
+                "The same seat can not be selected twice."
+            )
+        taken_seats = filter_seats(
+            Ticket.objects.filter(show_session=show_session), seats
+        )
+        held_seats = filter_seats(
+            SeatHold.objects.active()
+            .filter(show_session=show_session)
+            .exclude(user=self.context["request"].user),
+            seats,
+        )
+        if taken_seats or held_seats:
+            raise serializers.ValidationError(
+                {
+                    field_name: [
+                        f"row {row} seat {seat} is already taken"
+                        for row, seat in sorted(taken_seats)
+                    ]
+                    + [
+                        f"row {row} seat {seat} is held by another visitor"
+                        for row, seat in sorted(held_seats)
+                    ]
+                }
+            )
+
+
+class TicketBatchCreateSerializer(serializers.Serializer):
+    """books several seats of one show session under a single reservation
+    in two queries, see planetarium.booking"""
+
+    reservation = serializers.IntegerField(
+        source="reservation.pk", read_only=True
+    )
+    show_session = serializers.IntegerField()
+    tickets = TicketSeatSerializer(many=True, allow_empty=False)
 
     def validate(self, attrs):
-        Ticket.validate_seats_row(
-            attrs["row"],
-            attrs["show_session"].planetarium_dome.rows,
-            attrs["seat"],
-            attrs["show_session"].planetarium_dome.seats_in_row,
+        validate_seats(
+            attrs["show_session"],
+            [(ticket["row"], ticket["seat"]) for ticket in attrs["tickets"]],
             serializers.ValidationError,
         )
         return attrs
 
+    def create(self, validated_data):
+        reservation, tickets = book_seats(
+            validated_data["user"],
+            validated_data["show_session"],
+            [
+                (ticket["row"], ticket["seat"])
+                for ticket in validated_data["tickets"]
+            ],
+        )
+        return {
+            "reservation": reservation,
+            "show_session": validated_data["show_session"],
+            "tickets": tickets,
+        }
+
+
+"""Custom Serializers for model SeatHold"""
+
+
+class SeatHoldSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SeatHold
+        fields = ("id", "row", "seat", "show_session", "expires_at")
+
+
+class SeatHoldCreateSerializer(SeatSelectionSerializer):
+    """holds several seats of one show session for settings.SEAT_HOLD_TTL"""
+
+    seats = TicketSeatSerializer(many=True, allow_empty=False)
+    expires_at = serializers.DateTimeField(read_only=True)
+
+    def validate(self, attrs):
+        self.validate_selected_seats(
+            attrs["show_session"],
+            [(seat["row"], seat["seat"]) for seat in attrs["seats"]],
+            "seats",
+        )
+        return attrs
+
+    def create(self, validated_data):
+        show_session = validated_data["show_session"]
+        user = validated_data["user"]
+        expires_at = timezone.now() + settings.SEAT_HOLD_TTL
+        seats_q = Q()
+        for seat in validated_data["seats"]:
+            seats_q |= Q(row=seat["row"], seat=seat["seat"])
+        try:
+            with transaction.atomic():
+                SeatHold.objects.filter(
+                    seats_q, show_session=show_session
+                ).filter(
+                    Q(user=user) | Q(expires_at__lte=timezone.now())
+                ).delete()
+                holds = SeatHold.objects.bulk_create(
+                    [
+                        SeatHold(
+                            row=seat["row"],
+                            seat=seat["seat"],
+                            show_session=show_session,
+                            user=user,
+                            expires_at=expires_at,
+                        )
+                        for seat in validated_data["seats"]
+                    ]
+                )
+        except IntegrityError:
+            raise serializers.ValidationError(
+                {"seats": ["Some of the seats have just been held."]}
+            )
+        return {
+            "show_session": show_session,
+            "seats": holds,
+            "expires_at": expires_at,
+        }
+
+
+class SeatHoldConfirmSerializer(serializers.Serializer):
+    show_session = serializers.PrimaryKeyRelatedField(
+        queryset=ShowSession.objects.all()
+    )
+
 
 class UserTicketSerializer(UserSerializer):
     reservation_for = serializers.CharField(source="username")
@@ -133,7 +302,7 @@ class AstronomyShowTicketSerializer(AstronomyShowSerializer):
         fields = ("show_name", "show_theme")
 
     @staticmethod
-    def get_show_theme(obj):
+    def get_show_theme(obj) -> list[str]:
         show_themes = obj.show_theme.all()
         return [theme.name for theme in show_themes]
 
@@ -159,7 +328,9 @@ class TicketDetailSerializer(serializers.ModelSerializer):
 """Custom Serializers for model Astronomy"""
 
 
-class AstronomyShowListSerializer(AstronomyShowSerializer):
+class AstronomyShowListSerializer(
+    SparseFieldsetSerializerMixin, AstronomyShowSerializer
+):
     show_name = serializers.CharField(source="title", read_only=True)
     show_theme = ShowThemeSerializer(many=True, read_only=True)
 
@@ -187,7 +358,9 @@ class AstronomyShowImageSerializer(serializers.ModelSerializer):
 """Custom Serializers for model Planetarium Dome"""
 
 
-class PlanetariumDomeListSerializer(PlanetariumDomeSerializer):
+class PlanetariumDomeListSerializer(
+    SparseFieldsetSerializerMixin, PlanetariumDomeSerializer
+):
     planetarium_name = serializers.CharField(source="name", read_only=True)
 
     class Meta:
@@ -220,13 +393,20 @@ class PlanetariumDomeImageSerializer(serializers.ModelSerializer):
 """Custom Serializers for model ShowSessionSerializer"""
 
 
-class ShowSessionListSerializer(ShowSessionSerializer):
+class ShowSessionListSerializer(
+    SparseFieldsetSerializerMixin, ShowSessionSerializer
+):
     astronomy_show = AstronomyShowListSerializer(read_only=True)
     planetarium_dome = PlanetariumDomeListSerializer(read_only=True)
 
     class Meta:
         model = ShowSession
-        fields = ("astronomy_show", "planetarium_dome", "show_time")
+        fields = (
+            "astronomy_show",
+            "planetarium_dome",
+            "show_time",
+            "seats_available",
+        )
 
 
 class ShowSessionCreateSerializer(ShowSessionSerializer):
@@ -235,6 +415,27 @@ class ShowSessionCreateSerializer(ShowSessionSerializer):
         fields = ("astronomy_show", "planetarium_dome", "show_time")
 
 
+class ShowSessionSeatsSerializer(serializers.Serializer):
+    """occupied seats packed into a base64 encoded bitset, see SeatMap"""
+
+    rows = serializers.IntegerField(read_only=True)
+    seats_in_row = serializers.IntegerField(read_only=True)
+    taken = serializers.IntegerField(source="taken_count", read_only=True)
+    seats = serializers.CharField(source="to_base64", read_only=True)
+
+
+class BestAvailableSeatsSerializer(serializers.Serializer):
+    party_size = serializers.IntegerField(min_value=1, write_only=True)
+    preferred_row = serializers.IntegerField(
+        min_value=1, required=False, write_only=True
+    )
+    show_session = serializers.IntegerField(read_only=True)
+    row = serializers.IntegerField(read_only=True)
+    seats = serializers.ListField(
+        child=serializers.IntegerField(), read_only=True
+    )
+
+
 class ShowThemeCreateSerializer(ShowThemeSerializer):
     name = serializers.CharField(
         validators=[UniqueValidator(queryset=ShowTheme.objects.all())]
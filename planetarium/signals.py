@@ -0,0 +1,102 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+from django.db.models import F
+from django.utils import timezone
+
+from planetarium.booking import dome_shape_cache_key
+from planetarium.cache import bump_versions, catalog_cache
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    ShowSession,
+    ShowTheme,
+    Ticket,
+)
+
+
+@receiver(post_save, sender=ShowSession)
+@receiver(post_delete, sender=ShowSession)
+def forget_show_session_dome_shape(sender, instance, **kwargs):
+    catalog_cache().delete(dome_shape_cache_key(instance.pk))
+
+
+@receiver(post_save, sender=PlanetariumDome)
+def update_planetarium_dome_seats_available(sender, instance, **kwargs):
+    instance.dome_sessions.update(
+        seats_available=instance.capacity - F("seats_sold")
+    )
+
+
+@receiver(post_save, sender=Ticket)
+def count_created_ticket(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        ShowSession.objects.filter(
+            pk=instance.show_session_id
+        ).add_seats_sold(1)
+
+
+@receiver(pre_delete, sender=get_user_model())
+def count_deleted_user_tickets(sender, instance, using, **kwargs):
+    """the reservations of the user cascade without calling their delete()"""
+    ShowSession.objects.using(using).remove_tickets(
+        Ticket.objects.using(using).filter(reservation__user=instance)
+    )
+
+
+@receiver(post_save, sender=PlanetariumDome)
+def forget_planetarium_dome_shape(sender, instance, **kwargs):
+    catalog_cache().delete_many(
+        [
+            dome_shape_cache_key(show_session_id)
+            for show_session_id in instance.dome_sessions.values_list(
+                "pk", flat=True
+            )
+        ]
+    )
+
+
+@receiver(post_save, sender=AstronomyShow)
+@receiver(post_delete, sender=AstronomyShow)
+@receiver(post_save, sender=PlanetariumDome)
+@receiver(post_delete, sender=PlanetariumDome)
+@receiver(post_save, sender=ShowTheme)
+@receiver(post_delete, sender=ShowTheme)
+def invalidate_catalog_cache(sender, instance, **kwargs):
+    model_name = sender._meta.model_name
+    bump_versions(model_name, f"{model_name}:{instance.pk}")
+
+
+def touch_astronomy_shows(pks):
+    """theme changes alter how the shows render"""
+    pks = list(pks)
+    AstronomyShow.objects.filter(pk__in=pks).update(updated_at=timezone.now())
+    bump_versions("astronomyshow", *(f"astronomyshow:{pk}" for pk in pks))
+
+
+@receiver(pre_delete, sender=ShowTheme)
+def touch_show_theme_astronomy_shows(sender, instance, **kwargs):
+    """the through rows are deleted without sending m2m_changed"""
+    touch_astronomy_shows(
+        instance.astronomy_show.values_list("pk", flat=True)
+    )
+
+
+@receiver(m2m_changed, sender=AstronomyShow.show_theme.through)
+def touch_astronomy_show_themes(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            touch_astronomy_shows([instance.pk])
+    elif action == "pre_clear":
+        touch_astronomy_shows(
+            instance.astronomy_show.values_list("pk", flat=True)
+        )
+    elif action in ("post_add", "post_remove"):
+        touch_astronomy_shows(pk_set)
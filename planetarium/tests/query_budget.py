@@ -0,0 +1,36 @@
+from contextlib import contextmanager
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.views import APIView
+
+# API requests take a token from the bucket of the user or anon throttle
+# scope, booking writes from the booking scope too
+THROTTLE_QUERIES = 1
+BOOKING_THROTTLE_QUERIES = 2
+
+
+def without_throttles():
+    """for blocks that must not run a single query"""
+    return mock.patch.object(APIView, "throttle_classes", [])
+
+
+class QueryBudgetMixin:
+    """TestCase mixin failing a test when a block runs more SQL queries than
+    the budget declared for it"""
+
+    @contextmanager
+    def assertQueryBudget(self, budget):
+        with CaptureQueriesContext(connection) as queries:
+            yield queries
+        if len(queries) > budget:
+            self.fail(
+                f"{len(queries)} queries executed, the budget is {budget}:\n"
+                + "\n".join(
+                    f"{number}. {query['sql']}"
+                    for number, query in enumerate(
+                        queries.captured_queries, start=1
+                    )
+                )
+            )
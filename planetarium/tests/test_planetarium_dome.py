@@ -14,6 +14,7 @@ from planetarium.tests.default_test_data import (
     user_test,
     sample_planetarium_dome,
 )
+from planetarium.tests.query_budget import QueryBudgetMixin, THROTTLE_QUERIES
 
 Planetarium_Dome_URL = reverse("planetarium:planetarium_dome-list")
 
@@ -47,7 +48,7 @@ class AuthenticatedShowThemeApiTests(TestCase):
             planetarium_dome, many=True
         )
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_not_create_planetarium_dome(self):
         payload = {"name": "New Show Theme", "rows": 40, "seats_in_row": 200}
@@ -94,9 +95,9 @@ class PlanetariumDomeFilteringApiTests(TestCase):
         serializer2 = PlanetariumDomeListSerializer(planetarium_dome_2)
         serializer3 = PlanetariumDomeListSerializer(planetarium_dome_3)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data["results"])
+        self.assertIn(serializer2.data, res.data["results"])
+        self.assertNotIn(serializer3.data, res.data["results"])
 
     def test_filter_planetarium_rows(self):
         planetarium_dome_1 = sample_planetarium_dome(
@@ -117,9 +118,9 @@ class PlanetariumDomeFilteringApiTests(TestCase):
         serializer2 = PlanetariumDomeListSerializer(planetarium_dome_2)
         serializer3 = PlanetariumDomeListSerializer(planetarium_dome_3)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data["results"])
+        self.assertIn(serializer2.data, res.data["results"])
+        self.assertNotIn(serializer3.data, res.data["results"])
 
     def test_filter_planetarium_seats_rows(self):
         planetarium_dome_1 = sample_planetarium_dome(
@@ -139,9 +140,9 @@ class PlanetariumDomeFilteringApiTests(TestCase):
         serializer2 = PlanetariumDomeListSerializer(planetarium_dome_2)
         serializer3 = PlanetariumDomeListSerializer(planetarium_dome_3)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data["results"])
+        self.assertIn(serializer2.data, res.data["results"])
+        self.assertNotIn(serializer3.data, res.data["results"])
 
 
 class PlanetariumValidateTest(TestCase):
@@ -205,3 +206,18 @@ class PlanetariumModelsTests(TestCase):
             planetarium_dome.__str__(),
             f"name : {planetarium_dome.name} , rows : {planetarium_dome.rows} , seats_in_row : {planetarium_dome.seats_in_row}",
         )
+
+
+class PlanetariumDomeQueryBudgetTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = user_test(
+            username="default_user", password="defaultpassword122"
+        )
+        self.client.force_authenticate(self.user)
+        for number in range(10):
+            sample_planetarium_dome(name=f"Dome {number}")
+
+    def test_list_budget(self):
+        with self.assertQueryBudget(1 + THROTTLE_QUERIES):
+            self.client.get(Planetarium_Dome_URL)
@@ -1,4 +1,6 @@
-from django.db import IntegrityError
+from unittest import skipUnless
+
+from django.db import IntegrityError, connection
 from django.test import TestCase
 from django.urls import reverse
 from rest_framework.test import APIClient
@@ -14,7 +16,10 @@ from planetarium.tests.default_test_data import (
     user_test,
     sample_show_theme,
     sample_astronomy_show,
+    sample_planetarium_dome,
+    sample_show_session,
 )
+from planetarium.tests.query_budget import QueryBudgetMixin, THROTTLE_QUERIES
 
 Astronomy_Show_URL = reverse("planetarium:astronomy_show-list")
 
@@ -46,7 +51,7 @@ class AuthenticatedAstronomyShowApiTests(TestCase):
         astronomy_show = AstronomyShow.objects.all()
         serializer = AstronomyShowListSerializer(astronomy_show, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_not_create_astronomy_show(self):
         payload = {"name": "Astronomy Show Test"}
@@ -97,7 +102,7 @@ class AstronomyShowFilteringApiTests(TestCase):
         )
         res = self.client.get(Astronomy_Show_URL, {"show_name": "new"})
         serializer3 = AstronomyShowListSerializer(astronomy_show_object_1)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertNotIn(serializer3.data, res.data["results"])
 
     def test_filter_astronomy_show_show_theme(self):
         astronomy_show_object_1 = sample_astronomy_show()
@@ -120,11 +125,11 @@ class AstronomyShowFilteringApiTests(TestCase):
         )
         res = self.client.get(Astronomy_Show_URL, {"show_theme": "sample"})
         serializer1 = AstronomyShowListSerializer(astronomy_show_object_1)
-        self.assertIn(serializer1.data, res.data)
+        self.assertIn(serializer1.data, res.data["results"])
         serializer2 = AstronomyShowListSerializer(astronomy_show_object_1)
-        self.assertIn(serializer2.data, res.data)
+        self.assertIn(serializer2.data, res.data["results"])
         serializer3 = AstronomyShowListSerializer(astronomy_show_object_3)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertNotIn(serializer3.data, res.data["results"])
 
     def test_filter_astronomy_show_description(self):
         astronomy_show_object_1 = sample_astronomy_show()
@@ -147,11 +152,11 @@ class AstronomyShowFilteringApiTests(TestCase):
         )
         res = self.client.get(Astronomy_Show_URL, {"description": "desc"})
         serializer1 = AstronomyShowListSerializer(astronomy_show_object_1)
-        self.assertIn(serializer1.data, res.data)
+        self.assertIn(serializer1.data, res.data["results"])
         serializer2 = AstronomyShowListSerializer(astronomy_show_object_2)
-        self.assertIn(serializer2.data, res.data)
+        self.assertIn(serializer2.data, res.data["results"])
         serializer3 = AstronomyShowListSerializer(astronomy_show_object_3)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertNotIn(serializer3.data, res.data["results"])
 
 
 class AstronomyShowValidation(TestCase):
@@ -222,3 +227,92 @@ class ShowThemeModelsTests(TestCase):
             astronomy_show_object_1.__str__(),
             f"name_show : {astronomy_show_object_1.title} , description : {astronomy_show_object_1.description} , show_theme : {astronomy_show_object_1.show_themes}",
         )
+
+
+class AstronomyShowQueryBudgetTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = user_test(
+            username="default_user", password="defaultpassword122"
+        )
+        self.client.force_authenticate(self.user)
+        for number in range(10):
+            astronomy_show = sample_astronomy_show(title=f"Show {number}")
+            astronomy_show.show_theme.add(
+                sample_show_theme(name=f"Theme {number}")
+            )
+
+    def test_list_budget(self):
+        with self.assertQueryBudget(2 + THROTTLE_QUERIES):
+            self.client.get(Astronomy_Show_URL)
+
+    def test_retrieve_budget(self):
+        url = reverse(
+            "planetarium:astronomy_show-detail",
+            args=[AstronomyShow.objects.first().id],
+        )
+
+        with self.assertQueryBudget(2 + THROTTLE_QUERIES):
+            self.client.get(url)
+
+
+class AstronomyShowSearchApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = user_test(
+            username="default_user", password="defaultpassword122"
+        )
+        self.client.force_authenticate(self.user)
+        sample_astronomy_show(
+            title="Black holes",
+            description="A trip past the event horizon of a black hole",
+        )
+        sample_astronomy_show(
+            title="The Moon",
+            description="Craters, seas and the black hole next door",
+        )
+        sample_astronomy_show(
+            title="Northern lights", description="Auroras over the pole"
+        )
+
+    def search(self, query):
+        res = self.client.get(Astronomy_Show_URL, {"q": query})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [show["show_name"] for show in res.data["results"]]
+
+    def test_search_title_and_description(self):
+        self.assertCountEqual(
+            self.search("black hole"), ["Black holes", "The Moon"]
+        )
+        self.assertEqual(self.search("aurora"), ["Northern lights"])
+
+    def test_search_show_sessions(self):
+        sample_show_session(
+            astronomy_show=AstronomyShow.objects.get(title="The Moon"),
+            planetarium_dome=sample_planetarium_dome(name="Search Dome"),
+        )
+
+        res = self.client.get(
+            reverse("planetarium:show_session-list"), {"q": "craters"}
+        )
+
+        self.assertEqual(len(res.data["results"]), 1)
+
+    @skipUnless(
+        connection.vendor == "postgresql", "full-text search needs PostgreSQL"
+    )
+    def test_search_ranks_title_matches_first(self):
+        self.assertEqual(
+            self.search("black hole"), ["Black holes", "The Moon"]
+        )
+
+    @skipUnless(
+        connection.vendor == "postgresql", "full-text search needs PostgreSQL"
+    )
+    def test_search_vector_follows_updates(self):
+        astronomy_show = AstronomyShow.objects.get(title="Northern lights")
+        astronomy_show.description = "Comets and meteor showers"
+        astronomy_show.save()
+
+        self.assertEqual(self.search("comet"), ["Northern lights"])
+        self.assertEqual(self.search("aurora"), [])
@@ -0,0 +1,185 @@
+from io import StringIO
+
+from asgiref.sync import SyncToAsync, iscoroutinefunction, sync_to_async
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.test import AsyncClient, TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from planetarium.models import ShowSession
+from planetarium.tests.default_test_data import (
+    sample_astronomy_show,
+    sample_planetarium_dome,
+    sample_show_theme,
+    user_test,
+)
+
+PREFIXES = (
+    "astronomy_show",
+    "planetarium_dome",
+    "show_session",
+    "show_theme",
+)
+
+
+def sample_catalog():
+    show = sample_astronomy_show(title="Async Show")
+    show.show_theme.add(sample_show_theme(name="Async Theme"))
+    dome = sample_planetarium_dome(name="Async Dome")
+    session = ShowSession.objects.create(
+        astronomy_show=show, planetarium_dome=dome, show_time="2024-05-19"
+    )
+    return {
+        "astronomy_show": show,
+        "planetarium_dome": dome,
+        "show_session": session,
+        "show_theme": show.show_theme.get(),
+    }
+
+
+class AsyncReadViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = user_test(username="default_user", password="test12345")
+        self.client.force_authenticate(self.user)
+        self.catalog = sample_catalog()
+
+    def test_same_responses_as_the_viewsets(self):
+        for prefix in PREFIXES:
+            pk = self.catalog[prefix].pk
+            for suffix, args in (("-list", ()), ("-detail", (pk,))):
+                with self.subTest(prefix=prefix, route=suffix):
+                    sync = self.client.get(
+                        reverse(f"planetarium:{prefix}{suffix}", args=args)
+                    )
+                    res = self.client.get(
+                        reverse(
+                            f"planetarium:{prefix}-async{suffix}", args=args
+                        )
+                    )
+
+                    self.assertEqual(res.status_code, 200)
+                    self.assertEqual(res.json(), sync.json())
+                    self.assertIn("ETag", res)
+
+    def test_filters_fields_and_pagination(self):
+        sample_astronomy_show(title="Other Show")
+        url = reverse("planetarium:astronomy_show-async-list")
+
+        res = self.client.get(
+            url, {"show_name": "async", "fields": "show_name"}
+        )
+        self.assertEqual(res.json()["results"], [{"show_name": "Async Show"}])
+
+        res = self.client.get(url, {"page_size": 1})
+        self.assertEqual(len(res.json()["results"]), 1)
+        res = self.client.get(res.json()["next"])
+        self.assertEqual(res.json()["results"][0]["show_name"], "Other Show")
+        self.assertIsNone(res.json()["next"])
+
+    def test_not_modified(self):
+        url = reverse("planetarium:show_session-async-list")
+        etag = self.client.get(url)["ETag"]
+
+        res = self.client.get(url, headers={"If-None-Match": etag})
+
+        self.assertEqual(res.status_code, 304)
+
+    def test_not_found(self):
+        for pk in (0, "abc"):
+            res = self.client.get(
+                reverse("planetarium:show_theme-async-detail", args=[pk])
+            )
+
+            self.assertEqual(res.status_code, 404)
+
+    def test_reads_only(self):
+        self.user.is_staff = True
+        self.user.save()
+
+        res = self.client.post(
+            reverse("planetarium:show_theme-async-list"), {"name": "New"}
+        )
+
+        self.assertEqual(res.status_code, 405)
+
+    def test_auth_required(self):
+        res = APIClient().get(reverse("planetarium:show_theme-async-list"))
+
+        self.assertEqual(res.status_code, 401)
+
+
+class AsyncReadViewAsgiTests(TestCase):
+    def setUp(self):
+        self.catalog = sample_catalog()
+        token = RefreshToken.for_user(
+            user_test(username="default_user", password="test12345")
+        ).access_token
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+    async def test_list_and_retrieve(self):
+        client = AsyncClient()
+        session = self.catalog["show_session"]
+
+        res = await client.get(
+            reverse("planetarium:show_session-async-list"),
+            headers=self.headers,
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(
+            res.json()["results"][0]["astronomy_show"]["show_theme"],
+            [{"name": "Async Theme"}],
+        )
+
+        res = await client.get(
+            reverse(
+                "planetarium:show_session-async-detail", args=[session.pk]
+            ),
+            headers=self.headers,
+        )
+        self.assertEqual(res.json()["show_time"], "2024-05-19")
+
+    def test_middleware_does_not_take_a_thread(self):
+        chain = ASGIHandler()._middleware_chain
+
+        self.assertTrue(iscoroutinefunction(chain))
+        self.assertNotIsInstance(chain, SyncToAsync)
+
+    async def test_query_stats(self):
+        staff = await sync_to_async(user_test)(
+            username="staff_user", password="test12345", is_staff=True
+        )
+        token = RefreshToken.for_user(staff).access_token
+
+        res = await AsyncClient().get(
+            reverse("planetarium:show_session-async-list"),
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+        self.assertEqual(res.status_code, 200)
+        self.assertGreater(int(res["X-DB-Queries"]), 0)
+        self.assertEqual(
+            int(res["X-DB-Queries"]), res.asgi_request.query_stats.count
+        )
+
+
+class BenchmarkAsyncReadsCommandTests(TransactionTestCase):
+    def test_every_mode_runs(self):
+        sample_catalog()
+        user_test(username="default_user", password="test12345")
+        stdout = StringIO()
+
+        call_command(
+            "benchmark_async_reads",
+            "--requests=16",
+            "--concurrency=4",
+            "--warmup=0",
+            stdout=stdout,
+        )
+
+        output = stdout.getvalue()
+        for mode in ("wsgi", "asgi", "asgi-sync"):
+            self.assertIn(mode, output)
+        self.assertIn("asgi/wsgi requests per second", output)
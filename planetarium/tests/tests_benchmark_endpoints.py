@@ -0,0 +1,72 @@
+import json
+import pathlib
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from planetarium.benchmark import compare
+from planetarium.management.commands.benchmark_endpoints import SCENARIOS
+from planetarium.models import AstronomyShow
+
+SUMMARY = {
+    "p50_ms": 10,
+    "p95_ms": 20,
+    "p99_ms": 30,
+    "queries": 2,
+    "bytes": 100,
+}
+
+
+class BenchmarkEndpointsCommandTests(TestCase):
+    def test_every_route_runs_and_is_rolled_back(self):
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = pathlib.Path(directory) / "baseline.json"
+            options = ["--size", "5", "--repeat", "2", "--warmup", "0"]
+            call_command(
+                "benchmark_endpoints",
+                *options,
+                "--baseline",
+                baseline,
+                "--update-baseline",
+                stdout=StringIO(),
+            )
+            stdout = StringIO()
+            call_command(
+                "benchmark_endpoints",
+                *options,
+                "--baseline",
+                baseline,
+                "--tolerance",
+                "1000",
+                stdout=stdout,
+            )
+            results = json.loads(baseline.read_text())["results"]
+
+        self.assertEqual(
+            set(results),
+            {f"{route} {method.upper()}" for route, method, _ in SCENARIOS},
+        )
+        self.assertIn("No regressions", stdout.getvalue())
+        self.assertFalse(AstronomyShow.objects.exists())
+
+    def test_compare(self):
+        slower = {**SUMMARY, "p95_ms": 30, "queries": 3, "bytes": 105}
+
+        self.assertEqual(
+            compare({"route GET": slower}, {"route GET": SUMMARY}, 0.1),
+            [
+                "route GET: p95_ms 30 > 22.000 (baseline 20)",
+                "route GET: queries 3 > 2",
+            ],
+        )
+        self.assertEqual(
+            compare(
+                {"route GET": slower},
+                {"route GET": SUMMARY},
+                0.1,
+                slack_ms=10,
+            ),
+            ["route GET: queries 3 > 2"],
+        )
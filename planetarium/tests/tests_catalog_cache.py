@@ -0,0 +1,154 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.cache import VERSION_KEY, catalog_cache, get_stats
+from planetarium.tests.default_test_data import (
+    sample_astronomy_show,
+    sample_planetarium_dome,
+    sample_show_theme,
+    user_test,
+)
+from planetarium.tests.query_budget import without_throttles
+
+ASTRONOMY_SHOW_URL = reverse("planetarium:astronomy_show-list")
+PLANETARIUM_DOME_URL = reverse("planetarium:planetarium_dome-list")
+SHOW_THEME_URL = reverse("planetarium:show_theme-list")
+
+
+def astronomy_show_detail_url(astronomy_show_id):
+    return reverse(
+        "planetarium:astronomy_show-detail", args=[astronomy_show_id]
+    )
+
+
+class CatalogCacheApiTests(TestCase):
+    def setUp(self):
+        catalog_cache().clear()
+        self.client = APIClient()
+        self.user = user_test(username="default_user", password="test12345")
+        self.client.force_authenticate(self.user)
+
+    def test_second_list_request_is_served_from_cache(self):
+        sample_show_theme(name="Stars")
+        first = self.client.get(SHOW_THEME_URL)
+
+        with without_throttles(), self.assertNumQueries(0):
+            second = self.client.get(SHOW_THEME_URL)
+
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.data, first.data)
+
+    def test_query_params_are_part_of_the_key(self):
+        sample_show_theme(name="Stars")
+        sample_show_theme(name="Planets")
+        self.client.get(SHOW_THEME_URL, {"name": "star"})
+
+        res = self.client.get(SHOW_THEME_URL, {"name": "planet"})
+
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data["results"][0]["name"], "Planets")
+
+    def test_save_invalidates_list(self):
+        sample_planetarium_dome(name="Old dome")
+        self.client.get(PLANETARIUM_DOME_URL)
+
+        sample_planetarium_dome(name="New dome")
+        res = self.client.get(PLANETARIUM_DOME_URL)
+
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(len(res.data["results"]), 2)
+
+    def test_culled_version_does_not_revive_old_entries(self):
+        sample_planetarium_dome(name="Old dome")
+        self.client.get(PLANETARIUM_DOME_URL)
+        sample_planetarium_dome(name="New dome")
+        self.client.get(PLANETARIUM_DOME_URL)
+
+        catalog_cache().delete(VERSION_KEY.format("planetariumdome"))
+        self.client.get(PLANETARIUM_DOME_URL)
+        sample_planetarium_dome(name="Third dome")
+        res = self.client.get(PLANETARIUM_DOME_URL)
+
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(len(res.data["results"]), 3)
+
+    def test_show_theme_rename_invalidates_astronomy_show_list(self):
+        show_theme = sample_show_theme(name="Stars")
+        astronomy_show = sample_astronomy_show()
+        astronomy_show.show_theme.add(show_theme)
+        self.client.get(ASTRONOMY_SHOW_URL)
+
+        show_theme.name = "Galaxies"
+        show_theme.save()
+        res = self.client.get(ASTRONOMY_SHOW_URL)
+
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(
+            res.data["results"][0]["show_theme"], [{"name": "Galaxies"}]
+        )
+
+    def test_m2m_change_invalidates_astronomy_show_detail(self):
+        show_theme = sample_show_theme(name="Stars")
+        astronomy_show = sample_astronomy_show()
+        url = astronomy_show_detail_url(astronomy_show.id)
+        self.client.get(url)
+
+        show_theme.astronomy_show.add(astronomy_show)
+        res = self.client.get(url)
+
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data["show_theme"], [show_theme.id])
+
+    def test_show_theme_delete_invalidates_astronomy_show_detail(self):
+        show_theme = sample_show_theme(name="Stars")
+        astronomy_show = sample_astronomy_show()
+        astronomy_show.show_theme.add(show_theme)
+        url = astronomy_show_detail_url(astronomy_show.id)
+        self.client.get(url)
+
+        show_theme.delete()
+        res = self.client.get(url)
+
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data["show_theme"], [])
+
+    def test_zero_padded_pk_is_invalidated(self):
+        show_theme = sample_show_theme(name="Stars")
+        url = reverse(
+            "planetarium:show_theme-detail", args=["0" + str(show_theme.id)]
+        )
+        self.client.get(url)
+
+        show_theme.name = "Galaxies"
+        show_theme.save()
+        res = self.client.get(url)
+
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data["name"], "Galaxies")
+
+    @override_settings(CATALOG_CACHE_STATS=True)
+    def test_errors_are_not_cached(self):
+        url = astronomy_show_detail_url(999)
+        self.client.get(url)
+
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(get_stats(), {"hit": 0, "miss": 2})
+
+    def test_cache_hit_still_checks_permissions(self):
+        self.client.get(SHOW_THEME_URL)
+        self.client.force_authenticate(None)
+
+        res = self.client.get(SHOW_THEME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_stats_are_not_counted_by_default(self):
+        self.client.get(SHOW_THEME_URL)
+        self.client.get(SHOW_THEME_URL)
+
+        self.assertEqual(get_stats(), {"hit": 0, "miss": 0})
@@ -0,0 +1,171 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.tests.default_test_data import (
+    sample_astronomy_show,
+    sample_planetarium_dome,
+    sample_show_session,
+    sample_show_theme,
+    user_test,
+)
+from planetarium.models import ShowSession
+from planetarium.serializers import ShowSessionListSerializer
+from planetarium.tests.query_budget import without_throttles
+
+ASTRONOMY_SHOW_URL = reverse("planetarium:astronomy_show-list")
+PLANETARIUM_DOME_URL = reverse("planetarium:planetarium_dome-list")
+SHOW_SESSION_URL = reverse("planetarium:show_session-list")
+
+
+def astronomy_show_detail_url(astronomy_show_id):
+    return reverse(
+        "planetarium:astronomy_show-detail", args=[astronomy_show_id]
+    )
+
+
+class ConditionalGetApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = user_test(username="default_user", password="test12345")
+        self.client.force_authenticate(self.user)
+        self.show_theme = sample_show_theme(name="Stars")
+        self.astronomy_show = sample_astronomy_show(title="Orion")
+        self.astronomy_show.show_theme.add(self.show_theme)
+
+    def test_list_has_validators(self):
+        res = self.client.get(ASTRONOMY_SHOW_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res["ETag"].startswith('"'))
+        self.assertIn("Last-Modified", res)
+
+    def test_cached_etag_is_not_modified_without_queries(self):
+        etag = self.client.get(ASTRONOMY_SHOW_URL)["ETag"]
+
+        with without_throttles(), self.assertNumQueries(0):
+            res = self.client.get(ASTRONOMY_SHOW_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+        self.assertIn("Last-Modified", res)
+
+    def test_matching_etag_is_not_modified_without_serializing(self):
+        sample_show_session(astronomy_show=self.astronomy_show)
+        etag = self.client.get(SHOW_SESSION_URL)["ETag"]
+
+        with mock.patch.object(
+            ShowSessionListSerializer, "to_representation"
+        ) as to_representation:
+            res = self.client.get(SHOW_SESSION_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+        to_representation.assert_not_called()
+
+    def test_new_page_row_changes_etag(self):
+        planetarium_dome = sample_planetarium_dome(name="Test dome")
+        sample_show_session(
+            astronomy_show=self.astronomy_show,
+            planetarium_dome=planetarium_dome,
+        )
+        etag = self.client.get(SHOW_SESSION_URL, {"page_size": 1})["ETag"]
+
+        ShowSession.objects.create(
+            astronomy_show=self.astronomy_show,
+            planetarium_dome=planetarium_dome,
+            show_time="2024-05-20",
+        )
+        res = self.client.get(
+            SHOW_SESSION_URL, {"page_size": 1}, HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(res.data["next"])
+
+    def test_sparse_fieldset_etag_follows_row_changes(self):
+        params = {"fields": "planetarium_name"}
+        planetarium_dome = sample_planetarium_dome(name="Test dome")
+        etag = self.client.get(PLANETARIUM_DOME_URL, params)["ETag"]
+
+        planetarium_dome.name = "Renamed dome"
+        planetarium_dome.save()
+        res = self.client.get(
+            PLANETARIUM_DOME_URL, params, HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data["results"], [{"planetarium_name": "Renamed dome"}]
+        )
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get(ASTRONOMY_SHOW_URL)["Last-Modified"]
+
+        res = self.client.get(
+            ASTRONOMY_SHOW_URL, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_query_params_change_etag(self):
+        etag = self.client.get(ASTRONOMY_SHOW_URL)["ETag"]
+
+        res = self.client.get(
+            ASTRONOMY_SHOW_URL,
+            {"show_name": "sample"},
+            HTTP_IF_NONE_MATCH=etag,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_related_change_changes_etag(self):
+        etag = self.client.get(ASTRONOMY_SHOW_URL)["ETag"]
+
+        self.show_theme.name = "Galaxies"
+        self.show_theme.save()
+        res = self.client.get(ASTRONOMY_SHOW_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_m2m_change_changes_detail_etag(self):
+        url = astronomy_show_detail_url(self.astronomy_show.id)
+        etag = self.client.get(url)["ETag"]
+
+        self.astronomy_show.show_theme.remove(self.show_theme)
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["show_theme"], [])
+
+    def test_delete_changes_etag(self):
+        sample_astronomy_show(title="Second show")
+        etag = self.client.get(ASTRONOMY_SHOW_URL)["ETag"]
+
+        self.astronomy_show.delete()
+        res = self.client.get(ASTRONOMY_SHOW_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_show_session_etag_follows_planetarium_dome(self):
+        planetarium_dome = sample_planetarium_dome(name="Test dome")
+        sample_show_session(
+            astronomy_show=self.astronomy_show,
+            planetarium_dome=planetarium_dome,
+        )
+        etag = self.client.get(SHOW_SESSION_URL)["ETag"]
+
+        planetarium_dome.name = "Renamed dome"
+        planetarium_dome.save()
+        res = self.client.get(SHOW_SESSION_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_missing_object_has_no_etag(self):
+        res = self.client.get(astronomy_show_detail_url(999))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn("ETag", res)
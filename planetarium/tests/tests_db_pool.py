@@ -0,0 +1,192 @@
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from planetarium.tests.default_test_data import user_test
+from planetarium_api_service.db_pool.base import DatabaseWrapper
+
+POOL_METRICS_URL = reverse("db-pool-metrics")
+POOLED = (
+    connection.settings_dict["ENGINE"] == ("planetarium_api_service.db_pool")
+    and "pool" in connection.settings_dict["OPTIONS"]
+)
+
+
+def database_settings(**kwargs):
+    return {
+        "ENGINE": "planetarium_api_service.db_pool",
+        "NAME": "planetarium",
+        "USER": "planetarium",
+        "PASSWORD": "secret",
+        "HOST": "localhost",
+        "PORT": "5432",
+        "TIME_ZONE": None,
+        "CONN_MAX_AGE": 0,
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {"pool": {"min_size": 2, "max_size": 4}},
+        **kwargs,
+    }
+
+
+class DatabasePoolTests(SimpleTestCase):
+    def wrapper(self, **kwargs):
+        wrapper = DatabaseWrapper(database_settings(**kwargs), "pooltest")
+        self.addCleanup(wrapper.close_pool)
+        return wrapper
+
+    def test_pool_of_the_alias(self):
+        wrapper = self.wrapper()
+        pool = wrapper.pool
+
+        self.assertIs(self.wrapper().pool, pool)
+        self.assertTrue(pool.closed)
+        self.assertEqual((pool.min_size, pool.max_size), (2, 4))
+        self.assertEqual(pool.name, "pooltest")
+        self.assertIsNotNone(pool._check)
+        self.assertTrue(pool.kwargs["autocommit"])
+        self.assertNotIn("pool", pool.kwargs)
+        self.assertEqual(pool.kwargs["dbname"], "planetarium")
+
+        wrapper.close_pool()
+        self.assertIsNot(self.wrapper().pool, pool)
+
+    def test_without_health_checks(self):
+        self.assertIsNone(self.wrapper(CONN_HEALTH_CHECKS=False).pool._check)
+
+    def test_without_pool(self):
+        self.assertIsNone(self.wrapper(OPTIONS={}).pool)
+        self.assertIsNone(self.wrapper(OPTIONS={}).pool_stats())
+
+    def test_persistent_connections_are_refused(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.wrapper(CONN_MAX_AGE=60).pool
+
+    def test_pool_stats(self):
+        wrapper = self.wrapper()
+        with mock.patch.object(
+            wrapper.pool,
+            "get_stats",
+            return_value={
+                "pool_min": 2,
+                "pool_max": 4,
+                "pool_size": 3,
+                "pool_available": 1,
+                "requests_num": 8,
+                "requests_queued": 2,
+                "requests_wait_ms": 10,
+                "connections_num": 3,
+                "connections_ms": 24,
+            },
+        ):
+            stats = wrapper.pool_stats()
+
+        self.assertEqual(
+            stats,
+            {
+                "min_size": 2,
+                "max_size": 4,
+                "size": 3,
+                "in_use": 2,
+                "idle": 1,
+                "overflow": 1,
+                "waiting": 0,
+                "checkouts": 8,
+                "checkouts_queued": 2,
+                "checkout_timeouts": 0,
+                "wait_ms_total": 10,
+                "wait_ms_avg": 1.25,
+                "connections_opened": 3,
+                "connect_ms_total": 24,
+                "connections_lost": 0,
+                "returned_broken": 0,
+            },
+        )
+
+
+class WaitForDbCommandTests(SimpleTestCase):
+    def test_waits_until_the_database_accepts_connections(self):
+        unavailable = connection.Database.OperationalError("unavailable")
+        stdout = StringIO()
+
+        with mock.patch.object(
+            connection.Database,
+            "connect",
+            side_effect=[unavailable, unavailable, mock.Mock()],
+        ) as connect, mock.patch(
+            "planetarium.management.commands.wait_for_db.time.sleep"
+        ) as sleep:
+            call_command("wait_for_db", stdout=stdout)
+
+        self.assertEqual(connect.call_count, 3)
+        self.assertEqual(sleep.call_count, 2)
+        self.assertNotIn("pool", connect.call_args.kwargs)
+        self.assertIn("Database available!", stdout.getvalue())
+
+
+class DatabasePoolMetricsViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_staff_only(self):
+        self.client.force_authenticate(user_test())
+
+        res = self.client.get(POOL_METRICS_URL)
+
+        self.assertEqual(res.status_code, 403)
+
+    def test_stats_of_the_pooled_aliases(self):
+        self.client.force_authenticate(user_test(is_staff=True))
+
+        with mock.patch.object(
+            type(connections[DEFAULT_DB_ALIAS]),
+            "pool_stats",
+            create=True,
+            return_value={"in_use": 1},
+        ):
+            res = self.client.get(POOL_METRICS_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data["default"], {"in_use": 1})
+
+
+@skipUnless(POOLED, "needs PostgreSQL with the db_pool backend")
+class PooledConnectionTests(TransactionTestCase):
+    def checkout(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        connection.close()
+
+    def test_connections_are_reused(self):
+        self.checkout()
+        # until the pool holds min_size connections
+        connection.pool.wait()
+        opened = connection.pool_stats()["connections_opened"]
+
+        for _ in range(5):
+            self.checkout()
+
+        stats = connection.pool_stats()
+        self.assertEqual(stats["connections_opened"], opened)
+        self.assertEqual(stats["in_use"], 0)
+
+    def test_broken_connections_are_replaced_on_checkout(self):
+        self.checkout()
+        lost = connection.pool_stats()["connections_lost"]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+                "WHERE datname = current_database() "
+                "AND pid <> pg_backend_pid()"
+            )
+        connection.close()
+
+        for _ in range(3):
+            self.checkout()
+
+        self.assertGreater(connection.pool_stats()["connections_lost"], lost)
@@ -0,0 +1,123 @@
+import json
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.models import Reservation, ShowSession, Ticket
+from planetarium.tests.default_test_data import (
+    sample_astronomy_show,
+    sample_planetarium_dome,
+    user_test,
+)
+
+TICKET_EXPORT_URL = reverse("planetarium:tickets-export")
+RESERVATION_EXPORT_URL = reverse("planetarium:tickets-export-reservations")
+
+
+class ExportApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = user_test(
+            username="staff", email="staff@example.com", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        self.customer = user_test(
+            username="customer", email="customer@example.com"
+        )
+        astronomy_show = sample_astronomy_show(title="Export Show")
+        planetarium_dome = sample_planetarium_dome(name="Export Dome")
+        self.show_sessions = [
+            ShowSession.objects.create(
+                astronomy_show=astronomy_show,
+                planetarium_dome=planetarium_dome,
+                show_time=show_time,
+            )
+            for show_time in ("2024-05-19", "2024-05-20")
+        ]
+        self.reservation = Reservation.objects.create(user=self.customer)
+        for show_session in self.show_sessions:
+            for seat in (2, 1):
+                Ticket.objects.create(
+                    row=1,
+                    seat=seat,
+                    show_session=show_session,
+                    reservation=self.reservation,
+                )
+
+    @staticmethod
+    def content(res):
+        return b"".join(res.streaming_content).decode()
+
+    def test_export_requires_staff(self):
+        self.client.force_authenticate(self.customer)
+
+        for url in (TICKET_EXPORT_URL, RESERVATION_EXPORT_URL):
+            res = self.client.get(url)
+
+            self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_export_tickets_csv(self):
+        res = self.client.get(
+            TICKET_EXPORT_URL, {"show_session": self.show_sessions[0].pk}
+        )
+
+        self.assertTrue(res.streaming)
+        self.assertEqual(res["Content-Type"], "text/csv")
+        self.assertEqual(
+            res["Content-Disposition"], 'attachment; filename="tickets.csv"'
+        )
+        header, *rows = self.content(res).splitlines()
+        self.assertEqual(
+            header,
+            "id,show_session,show_time,astronomy_show,planetarium_dome,"
+            "row,seat,reservation,reserved_at,username,email",
+        )
+        self.assertEqual(
+            [row.split(",")[5:7] for row in rows], [["1", "1"], ["1", "2"]]
+        )
+        self.assertTrue(rows[0].endswith(",customer,customer@example.com"))
+
+    def test_export_tickets_ndjson_by_day(self):
+        res = self.client.get(
+            TICKET_EXPORT_URL,
+            {"file_format": "ndjson", "show_time": "2024-05-20"},
+        )
+
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in self.content(res).splitlines()]
+        self.assertEqual(
+            [(row["show_time"], row["seat"]) for row in rows],
+            [("2024-05-20", 1), ("2024-05-20", 2)],
+        )
+        self.assertEqual(rows[0]["astronomy_show"], "Export Show")
+
+    def test_export_is_one_query(self):
+        res = self.client.get(TICKET_EXPORT_URL)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.content(res)
+
+        self.assertEqual(len(queries), 1)
+
+    def test_export_reservations(self):
+        Reservation.objects.create(user=self.user)
+
+        res = self.client.get(
+            RESERVATION_EXPORT_URL, {"file_format": "ndjson"}
+        )
+
+        rows = [json.loads(line) for line in self.content(res).splitlines()]
+        self.assertEqual(
+            [(row["username"], row["tickets"]) for row in rows],
+            [("customer", 4), ("staff", 0)],
+        )
+
+    def test_invalid_export_parameters(self):
+        for params in ({"file_format": "xml"}, {"show_time": "tomorrow"}):
+            res = self.client.get(TICKET_EXPORT_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,126 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from planetarium.models import Reservation, ShowSession, Ticket
+from planetarium.tests.default_test_data import (
+    sample_astronomy_show,
+    sample_planetarium_dome,
+    sample_show_theme,
+    user_test,
+)
+
+ASTRONOMY_SHOW_URL = reverse("planetarium:astronomy_show-list")
+SHOW_SESSION_URL = reverse("planetarium:show_session-list")
+TICKET_URL = reverse("planetarium:tickets-list")
+
+
+class SparseFieldsetApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = user_test(username="default_user", password="test12345")
+        self.client.force_authenticate(self.user)
+        self.astronomy_show = sample_astronomy_show(title="Fieldset Show")
+        self.astronomy_show.show_theme.add(sample_show_theme(name="Moons"))
+        self.planetarium_dome = sample_planetarium_dome(name="Fieldset Dome")
+        self.show_session = ShowSession.objects.create(
+            astronomy_show=self.astronomy_show,
+            planetarium_dome=self.planetarium_dome,
+            show_time="2024-05-19",
+        )
+
+    def page_query(self, queries):
+        (page_query,) = [
+            query["sql"] for query in queries if "ORDER BY" in query["sql"]
+        ]
+        return page_query
+
+    def test_fields(self):
+        res = self.client.get(
+            SHOW_SESSION_URL,
+            {"fields": "show_time,astronomy_show.show_name"},
+        )
+
+        self.assertEqual(
+            res.data["results"],
+            [
+                {
+                    "astronomy_show": {"show_name": "Fieldset Show"},
+                    "show_time": "2024-05-19",
+                }
+            ],
+        )
+
+    def test_exclude(self):
+        res = self.client.get(
+            ASTRONOMY_SHOW_URL, {"exclude": "description,show_theme.name"}
+        )
+
+        self.assertEqual(
+            res.data["results"],
+            [
+                {
+                    "show_name": "Fieldset Show",
+                    "show_theme": [{}],
+                    "image": None,
+                }
+            ],
+        )
+
+    def test_pruned_query(self):
+        with CaptureQueriesContext(connection) as full:
+            self.client.get(SHOW_SESSION_URL)
+        with CaptureQueriesContext(connection) as pruned:
+            res = self.client.get(
+                SHOW_SESSION_URL, {"fields": "show_time,seats_available"}
+            )
+
+        self.assertEqual(
+            res.data["results"],
+            [{"show_time": "2024-05-19", "seats_available": 7500}],
+        )
+        self.assertEqual(len(pruned), len(full) - 1)
+        page_query = self.page_query(pruned)
+        self.assertNotIn("JOIN", page_query)
+        self.assertNotIn("description", page_query)
+
+    def test_related_source(self):
+        reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.create(
+            row=1,
+            seat=1,
+            show_session=self.show_session,
+            reservation=reservation,
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(TICKET_URL, {"fields": "seat,reservation"})
+
+        self.assertEqual(
+            res.data["results"],
+            [{"seat": 1, "reservation": str(self.user)}],
+        )
+        self.assertNotIn("planetarium_dome", self.page_query(queries))
+
+    def test_next_page_with_pruned_columns(self):
+        ShowSession.objects.create(
+            astronomy_show=self.astronomy_show,
+            planetarium_dome=self.planetarium_dome,
+            show_time="2024-05-20",
+        )
+        params = {"fields": "show_time", "page_size": 1}
+
+        first = self.client.get(SHOW_SESSION_URL, params)
+        second = self.client.get(first.data["next"])
+
+        self.assertEqual(
+            [first.data["results"], second.data["results"]],
+            [[{"show_time": "2024-05-19"}], [{"show_time": "2024-05-20"}]],
+        )
+
+    def test_unknown_fields_are_ignored(self):
+        res = self.client.get(SHOW_SESSION_URL, {"fields": "nonexistent"})
+
+        self.assertEqual(res.data["results"], [{}])
@@ -0,0 +1,101 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.models import Reservation, ShowSession, Ticket
+from planetarium.tests.default_test_data import (
+    sample_astronomy_show,
+    sample_planetarium_dome,
+    sample_show_theme,
+    user_test,
+)
+
+ASTRONOMY_SHOW_URL = reverse("planetarium:astronomy_show-list")
+PLANETARIUM_DOME_URL = reverse("planetarium:planetarium_dome-list")
+SHOW_SESSION_URL = reverse("planetarium:show_session-list")
+TICKET_URL = reverse("planetarium:tickets-list")
+
+
+class FilterSetApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = user_test(username="default_user", password="test12345")
+        self.client.force_authenticate(self.user)
+        self.astronomy_show = sample_astronomy_show(title="Deep sky")
+        self.planetarium_dome = sample_planetarium_dome(name="Filter Dome")
+
+    def show_session(self, show_time):
+        return ShowSession.objects.create(
+            astronomy_show=self.astronomy_show,
+            planetarium_dome=self.planetarium_dome,
+            show_time=show_time,
+        )
+
+    def test_show_theme_filter_without_duplicates_or_distinct(self):
+        self.astronomy_show.show_theme.add(
+            sample_show_theme(name="Stars"),
+            sample_show_theme(name="Star clusters"),
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(ASTRONOMY_SHOW_URL, {"show_theme": "star"})
+
+        self.assertEqual(len(res.data["results"]), 1)
+        (page_query,) = [
+            query["sql"] for query in queries if "ORDER BY" in query["sql"]
+        ]
+        self.assertNotIn("DISTINCT", page_query)
+
+    def test_show_time_range(self):
+        self.show_session("2024-05-01")
+        self.show_session("2024-05-10")
+        self.show_session("2024-05-20")
+
+        res = self.client.get(
+            SHOW_SESSION_URL,
+            {"show_time_from": "2024-05-05", "show_time_to": "2024-05-20"},
+        )
+
+        self.assertEqual(
+            [session["show_time"] for session in res.data["results"]],
+            ["2024-05-10", "2024-05-20"],
+        )
+
+    def test_created_range(self):
+        show_session = self.show_session("2024-05-01")
+        old, new = (
+            Reservation.objects.create(user=self.user) for _ in range(2)
+        )
+        Reservation.objects.filter(pk=old.pk).update(
+            created_at=timezone.now() - timedelta(days=10)
+        )
+        for seat, reservation in enumerate((old, new), start=1):
+            Ticket.objects.create(
+                row=1,
+                seat=seat,
+                show_session=show_session,
+                reservation=reservation,
+            )
+
+        res = self.client.get(
+            TICKET_URL,
+            {
+                "created_from": (
+                    timezone.now() - timedelta(days=1)
+                ).isoformat()
+            },
+        )
+
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertEqual(res.data["results"][0]["seat"], 2)
+
+    def test_invalid_value_is_rejected(self):
+        res = self.client.get(PLANETARIUM_DOME_URL, {"rows": "many"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
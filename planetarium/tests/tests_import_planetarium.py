@@ -0,0 +1,131 @@
+import json
+import pathlib
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from planetarium.cache import get_versions
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    ShowSession,
+    ShowTheme,
+)
+
+
+class ImportPlanetariumCommandTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = pathlib.Path(directory.name)
+
+    def write(self, name, content):
+        path = self.directory / name
+        path.write_text(content, encoding="utf-8")
+        return str(path)
+
+    def call(self, *args):
+        stdout = StringIO()
+        call_command(
+            "import_planetarium", *args, stdout=stdout, stderr=StringIO()
+        )
+        return stdout.getvalue()
+
+    def test_import_season(self):
+        themes = self.write("themes.csv", "name\nStars\nPlanets\n")
+        domes = self.write(
+            "domes.json",
+            json.dumps([{"name": "Main Dome", "rows": 5, "seats_in_row": 8}]),
+        )
+        shows = self.write(
+            "shows.csv",
+            "title,description,show_theme\n"
+            "Red giants,About stars,Stars\n"
+            "Gas giants,About planets,Planets|Stars\n",
+        )
+        sessions = self.write(
+            "sessions.ndjson",
+            "\n".join(
+                json.dumps(
+                    {
+                        "astronomy_show": title,
+                        "planetarium_dome": "Main Dome",
+                        "show_time": "2024-06-01",
+                    }
+                )
+                for title in ("Red giants", "Gas giants")
+            ),
+        )
+        (version,) = get_versions(["astronomyshow"])
+
+        self.call("themes", themes)
+        self.call("domes", domes)
+        self.call("shows", shows, "--batch-size", "1")
+        output = self.call("sessions", sessions)
+
+        self.assertIn("Imported 2 rows", output)
+        self.assertIn("rows/s", output)
+        self.assertEqual(
+            sorted(
+                AstronomyShow.objects.get(
+                    title="Gas giants"
+                ).show_theme.values_list("name", flat=True)
+            ),
+            ["Planets", "Stars"],
+        )
+        self.assertEqual(
+            list(
+                ShowSession.objects.values_list(
+                    "seats_sold", "seats_available"
+                )
+            ),
+            [(0, 40), (0, 40)],
+        )
+        self.assertEqual(get_versions(["astronomyshow"]), [version + 1])
+
+    def test_failed_batch_is_rolled_back(self):
+        domes = self.write(
+            "domes.csv",
+            "name,rows,seats_in_row\n"
+            "First Dome,5,8\n"
+            "Second Dome,5,8\n"
+            "Huge Dome,500,8\n"
+            "First Dome,5,8\n"
+            "Last Dome,5,8\n",
+        )
+
+        with self.assertRaisesMessage(
+            CommandError, "2 rows were not imported"
+        ):
+            self.call("domes", domes, "--batch-size", "2")
+
+        self.assertEqual(
+            list(
+                PlanetariumDome.objects.order_by("pk").values_list(
+                    "name", flat=True
+                )
+            ),
+            ["First Dome", "Second Dome", "Last Dome"],
+        )
+
+    def test_unknown_name(self):
+        shows = self.write(
+            "shows.json",
+            json.dumps(
+                [
+                    {
+                        "title": "Comets",
+                        "description": "About comets",
+                        "show_theme": ["Missing"],
+                    }
+                ]
+            ),
+        )
+
+        with self.assertRaises(CommandError):
+            self.call("shows", shows)
+
+        self.assertFalse(AstronomyShow.objects.exists())
+        self.assertFalse(ShowTheme.objects.exists())
@@ -0,0 +1,148 @@
+import base64
+import json
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.utils.urls import remove_query_param
+from rest_framework import status
+
+from planetarium.models import ShowSession
+from planetarium.pagination import ShowSessionPagination
+from planetarium.tests.default_test_data import (
+    user_test,
+    sample_astronomy_show,
+    sample_planetarium_dome,
+)
+
+Show_Session_URL = reverse("planetarium:show_session-list")
+Show_Theme_URL = reverse("planetarium:show_theme-list")
+Async_Show_Session_URL = reverse("planetarium:show_session-async-list")
+
+
+def cursor(ordering, position, reverse=0):
+    data = json.dumps({"o": ordering, "p": position, "r": reverse})
+    return base64.urlsafe_b64encode(data.encode()).decode("ascii")
+
+
+class KeysetPaginationApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = user_test(
+            username="default_user", password="defaultpassword122"
+        )
+        self.client.force_authenticate(self.user)
+        astronomy_show = sample_astronomy_show(title="Paged Show")
+        planetarium_dome = sample_planetarium_dome(name="Paged Dome")
+        self.show_sessions = [
+            ShowSession.objects.create(
+                astronomy_show=astronomy_show,
+                planetarium_dome=planetarium_dome,
+                show_time=show_time,
+            )
+            for show_time in (
+                "2024-05-21",
+                "2024-05-19",
+                "2024-05-20",
+                "2024-05-19",
+                "2024-05-20",
+            )
+        ]
+
+    def walk(self, url):
+        pages = []
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            pages.append(res.data)
+            url = res.data["next"]
+        return pages
+
+    def test_pages_follow_show_time_and_id(self):
+        pages = self.walk(Show_Session_URL + "?page_size=2")
+
+        self.assertEqual([len(page["results"]) for page in pages], [2, 2, 1])
+        self.assertIsNone(pages[0]["previous"])
+        show_times = [
+            show_session["show_time"]
+            for page in pages
+            for show_session in page["results"]
+        ]
+        self.assertEqual(
+            show_times,
+            [
+                "2024-05-19",
+                "2024-05-19",
+                "2024-05-20",
+                "2024-05-20",
+                "2024-05-21",
+            ],
+        )
+
+    def test_previous_page(self):
+        first_page, second_page, _ = self.walk(
+            Show_Session_URL + "?page_size=2"
+        )
+
+        res = self.client.get(second_page["previous"])
+
+        self.assertEqual(res.data["results"], first_page["results"])
+        self.assertIsNone(res.data["previous"])
+
+    def test_no_count_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(Show_Session_URL)
+
+        self.assertFalse(
+            any(
+                "COUNT(" in query["sql"] for query in queries.captured_queries
+            )
+        )
+
+    def test_page_size_limit(self):
+        request = Request(
+            APIRequestFactory().get(Show_Session_URL, {"page_size": 1000})
+        )
+
+        self.assertEqual(
+            ShowSessionPagination().get_page_size(request),
+            ShowSessionPagination.max_page_size,
+        )
+
+    def test_invalid_cursor(self):
+        res = self.client.get(Show_Theme_URL, {"cursor": "not-a-cursor"})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tampered_cursor(self):
+        for position in (
+            ["2024-05-19", "x"],
+            ["not-a-date", 1],
+            [{"a": 1}, 1],
+            [None, 1],
+            ["2024-05-19", [1]],
+        ):
+            for url in (Show_Session_URL, Async_Show_Session_URL):
+                with self.subTest(position=position, url=url):
+                    res = self.client.get(
+                        url, {"cursor": cursor("show_time,id", position)}
+                    )
+
+                    self.assertEqual(
+                        res.status_code, status.HTTP_404_NOT_FOUND
+                    )
+
+    def test_cursor_of_another_ordering(self):
+        res = self.client.get(
+            Show_Session_URL, {"ordering": "seats_available", "page_size": 2}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.get(
+            remove_query_param(res.data["next"], "ordering")
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
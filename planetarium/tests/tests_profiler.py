@@ -0,0 +1,132 @@
+import pathlib
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from planetarium.serializers import ShowSessionListSerializer
+from planetarium.tests.default_test_data import (
+    sample_show_session,
+    user_test,
+)
+from planetarium_api_service.profiling import Sampler, folded_stack
+
+SHOW_SESSION_URL = reverse("planetarium:show_session-list")
+
+
+def slow_to_representation(self, instance):
+    time.sleep(0.05)
+    return ORIGINAL_TO_REPRESENTATION(self, instance)
+
+
+ORIGINAL_TO_REPRESENTATION = ShowSessionListSerializer.to_representation
+
+
+class SamplerTests(TestCase):
+    def test_folded_stack_up_to_the_root(self):
+        def inner():
+            return folded_stack(
+                sys._getframe(),
+                root_code=self.test_folded_stack_up_to_the_root.__code__,
+            )
+
+        self.assertEqual(
+            inner(),
+            f"{__name__}:SamplerTests.test_folded_stack_up_to_the_root;"
+            f"{__name__}:SamplerTests.test_folded_stack_up_to_the_root."
+            "<locals>.inner",
+        )
+
+    def test_samples_the_thread(self):
+        sampler = Sampler(threading.get_ident(), 0.001)
+
+        sampler.start()
+        time.sleep(0.05)
+        sampler.stop()
+
+        self.assertGreater(sampler.samples, 0)
+        self.assertTrue(
+            all(
+                stack.endswith("SamplerTests.test_samples_the_thread")
+                for stack in sampler.stacks
+            )
+        )
+        self.assertGreaterEqual(sampler.duration, 0.05)
+
+
+class ProfileMiddlewareTests(TestCase):
+    def setUp(self):
+        self.profile_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.profile_dir.cleanup)
+        settings = override_settings(PROFILE_DIR=self.profile_dir.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        sample_show_session()
+        self.user = user_test(is_staff=True)
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Bearer "
+            f"{RefreshToken.for_user(self.user).access_token}"
+        )
+
+    def profiles(self):
+        return list(pathlib.Path(self.profile_dir.name).iterdir())
+
+    def test_staff_requests_with_the_header_are_profiled(self):
+        with mock.patch.object(
+            ShowSessionListSerializer,
+            "to_representation",
+            slow_to_representation,
+        ):
+            res = self.client.get(SHOW_SESSION_URL, HTTP_X_PROFILE="1")
+
+        self.assertEqual(res.status_code, 200)
+        [profile] = self.profiles()
+        self.assertEqual(res["X-Profile-File"], profile.name)
+        self.assertGreater(int(res["X-Profile-Samples"]), 0)
+        lines = profile.read_text().splitlines()
+        self.assertEqual(
+            sum(int(line.rsplit(" ", 1)[1]) for line in lines),
+            int(res["X-Profile-Samples"]),
+        )
+        self.assertTrue(
+            any(
+                line.startswith(
+                    "planetarium_api_service.middleware:"
+                    "ProfileMiddleware.__call__;"
+                )
+                and "planetarium.views:ShowSessionViewSet.list;" in line
+                and "planetarium.serializers:ShowSessionListSerializer."
+                "slow_to_representation" in line
+                for line in lines
+            )
+        )
+
+    def test_other_requests_are_not_profiled(self):
+        visitor = APIClient()
+        visitor.credentials(
+            HTTP_AUTHORIZATION="Bearer "
+            f"{RefreshToken.for_user(user_test(username='visitor')).access_token}"
+        )
+
+        with mock.patch(
+            "planetarium_api_service.middleware.Sampler"
+        ) as sampler:
+            for client, headers in (
+                (self.client, {}),
+                (self.client, {"HTTP_X_PROFILE": "0"}),
+                (visitor, {"HTTP_X_PROFILE": "1"}),
+                (APIClient(), {"HTTP_X_PROFILE": "1"}),
+            ):
+                res = client.get(SHOW_SESSION_URL, **headers)
+                self.assertNotIn("X-Profile-File", res)
+
+        sampler.assert_not_called()
+        self.assertEqual(self.profiles(), [])
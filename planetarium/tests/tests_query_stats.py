@@ -0,0 +1,52 @@
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from planetarium.tests.default_test_data import (
+    user_test,
+    sample_planetarium_dome,
+)
+from planetarium.tests.query_budget import QueryBudgetMixin, THROTTLE_QUERIES
+
+Planetarium_Dome_URL = reverse("planetarium:planetarium_dome-list")
+
+
+class QueryStatsMiddlewareTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = user_test(
+            username="default_user", password="defaultpassword122"
+        )
+        sample_planetarium_dome(name="Stats Dome")
+
+    def test_headers_for_staff(self):
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_authenticate(self.user)
+
+        res = self.client.get(Planetarium_Dome_URL)
+
+        self.assertEqual(res["X-DB-Queries"], str(1 + THROTTLE_QUERIES))
+        self.assertIn("X-DB-Time-ms", res)
+        self.assertIn("X-DB-Slowest-ms", res)
+        self.assertEqual(
+            res.wsgi_request.query_stats.count, 1 + THROTTLE_QUERIES
+        )
+
+    def test_no_headers_for_visitors(self):
+        self.client.force_authenticate(self.user)
+
+        res = self.client.get(Planetarium_Dome_URL)
+
+        self.assertNotIn("X-DB-Queries", res)
+        self.assertEqual(
+            res.wsgi_request.query_stats.count, 1 + THROTTLE_QUERIES
+        )
+
+
+class QueryBudgetMixinTests(QueryBudgetMixin, TestCase):
+    def test_over_budget_fails(self):
+        with self.assertRaises(AssertionError):
+            with self.assertQueryBudget(1):
+                sample_planetarium_dome(name="Budget Dome 1")
+                sample_planetarium_dome(name="Budget Dome 2")
@@ -0,0 +1,275 @@
+from unittest import mock, skipUnless
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.state import ProjectState
+from django.db.models import UniqueConstraint
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from planetarium.cache import catalog_cache
+from planetarium.conditional import ConditionalGetMixin
+from planetarium.migration_operations import AddUniqueConstraintConcurrently
+from planetarium.models import ShowTheme, ThrottleBucket, Ticket
+from planetarium.tests.default_test_data import (
+    sample_show_session,
+    sample_show_theme,
+    user_test,
+)
+from planetarium_api_service.db_router import (
+    ReplicaRouter,
+    read_alias,
+    token_user_id,
+)
+from planetarium_api_service.middleware import ReplicaRoutingMiddleware
+
+REPLICA = settings.REPLICA_DATABASE_ALIAS
+TICKET_URL = reverse("planetarium:tickets-list")
+MANAGE_USER_URL = reverse("user_authenticate:manage-user")
+SHOW_THEME_URL = reverse("planetarium:show_theme-list")
+
+
+def authorization(user):
+    return f"Bearer {RefreshToken.for_user(user).access_token}"
+
+
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_follow_read_alias(self):
+        self.assertIsNone(self.router.db_for_read(Ticket))
+        token = read_alias.set(REPLICA)
+        try:
+            self.assertEqual(self.router.db_for_read(Ticket), REPLICA)
+        finally:
+            read_alias.reset(token)
+
+    def test_rows_read_from_the_replica_are_saved_to_the_primary(self):
+        theme = ShowTheme(name="Replicated")
+        theme._state.db = REPLICA
+
+        self.assertEqual(
+            self.router.db_for_write(ShowTheme, instance=theme),
+            DEFAULT_DB_ALIAS,
+        )
+        self.assertIsNone(self.router.db_for_write(ShowTheme))
+
+    def test_replica_is_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate(REPLICA, "planetarium"))
+        self.assertIsNone(
+            self.router.allow_migrate(DEFAULT_DB_ALIAS, "planetarium")
+        )
+
+    @override_settings(REPLICA_DATABASE_ALIAS=DEFAULT_DB_ALIAS)
+    def test_concurrent_unique_constraint_skips_the_replica(self):
+        operation = AddUniqueConstraintConcurrently(
+            "ticket",
+            UniqueConstraint(
+                fields=["show_session", "row", "seat"], name="replicated"
+            ),
+        )
+        state = ProjectState.from_apps(apps)
+        schema_editor = mock.Mock()
+        schema_editor.connection.alias = DEFAULT_DB_ALIAS
+        schema_editor.connection.vendor = "postgresql"
+
+        operation.database_forwards(
+            "planetarium", schema_editor, state, state
+        )
+
+        schema_editor.execute.assert_not_called()
+
+    @override_settings(REPLICA_DATABASE_ALIAS="missing")
+    def test_middleware_unused_without_replica(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            ReplicaRoutingMiddleware(lambda request: None)
+
+    @override_settings(
+        REPLICA_DATABASE_ALIAS=DEFAULT_DB_ALIAS,
+        REPLICA_PIN_CACHE="pins",
+        CACHES={
+            "pins": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+            }
+        },
+    )
+    def test_middleware_needs_a_shared_pin_cache(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, "'pins'"):
+            ReplicaRoutingMiddleware(lambda request: None)
+
+    @override_settings(
+        REPLICA_DATABASE_ALIAS=DEFAULT_DB_ALIAS,
+        REPLICA_PIN_CACHE="pins",
+        CACHES={
+            "pins": {
+                "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+                "LOCATION": "replica_pins",
+            }
+        },
+    )
+    def test_middleware_with_a_shared_pin_cache(self):
+        ReplicaRoutingMiddleware(lambda request: None)
+
+
+class ReplicaRouterTransactionTests(TestCase):
+    def test_reads_in_a_transaction_on_the_primary_stay_there(self):
+        token = read_alias.set(REPLICA)
+        try:
+            self.assertIsNone(ReplicaRouter().db_for_read(Ticket))
+        finally:
+            read_alias.reset(token)
+
+    def test_token_user_id(self):
+        user = user_test()
+        factory = RequestFactory()
+
+        for headers, expected in (
+            ({"Authorization": authorization(user)}, user.pk),
+            ({"Authorization": "Bearer invalid"}, None),
+            ({}, None),
+        ):
+            request = factory.get("/", headers=headers)
+            self.assertEqual(token_user_id(request), expected)
+
+
+class CatalogCacheRoutingTests(TestCase):
+    def test_cache_misses_read_from_the_primary(self):
+        catalog_cache().clear()
+        client = APIClient()
+        client.force_authenticate(user_test())
+        aliases = []
+        list_view = ConditionalGetMixin.list
+
+        def record_alias(viewset, request, *args, **kwargs):
+            aliases.append(read_alias.get())
+            return list_view(viewset, request, *args, **kwargs)
+
+        token = read_alias.set(REPLICA)
+        try:
+            with mock.patch.object(ConditionalGetMixin, "list", record_alias):
+                miss = client.get(SHOW_THEME_URL)
+                hit = client.get(SHOW_THEME_URL)
+        finally:
+            read_alias.reset(token)
+
+        self.assertEqual((miss["X-Cache"], hit["X-Cache"]), ("MISS", "HIT"))
+        self.assertEqual(aliases, [None])
+
+
+@skipUnless(
+    REPLICA in settings.DATABASES,
+    "needs a replica database, see POSTGRES_REPLICA_HOST",
+)
+class ReplicaRoutingApiTests(TransactionTestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        caches[settings.REPLICA_PIN_CACHE].clear()
+        self.user = user_test()
+        self.show_session = sample_show_session()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=authorization(self.user))
+
+    def send(self, client, method, url, data=None):
+        """the response and how many queries the primary and the replica
+        ran for it, leaving out the throttle buckets, which are always
+        written to the primary"""
+        with CaptureQueriesContext(
+            connections[DEFAULT_DB_ALIAS]
+        ) as primary, CaptureQueriesContext(connections[REPLICA]) as replica:
+            res = getattr(client, method)(url, data)
+        primary = [
+            query
+            for query in primary
+            if ThrottleBucket._meta.db_table not in query["sql"]
+        ]
+        return res, len(primary), len(replica)
+
+    def book(self):
+        res, _, replica = self.send(
+            self.client,
+            "post",
+            TICKET_URL,
+            {"row": 1, "seat": 1, "show_session": self.show_session.pk},
+        )
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(replica, 0)
+
+    def test_safe_requests_read_from_the_replica(self):
+        res, primary, replica = self.send(self.client, "get", TICKET_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    def test_writer_reads_from_the_primary(self):
+        self.book()
+
+        res, primary, replica = self.send(self.client, "get", TICKET_URL)
+
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+    def test_other_users_keep_reading_from_the_replica(self):
+        self.book()
+        other = APIClient()
+        other.credentials(
+            HTTP_AUTHORIZATION=authorization(user_test(username="other"))
+        )
+
+        _, primary, replica = self.send(other, "get", TICKET_URL)
+
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    def test_user_endpoints(self):
+        res, _, replica = self.send(self.client, "get", MANAGE_USER_URL)
+        self.assertEqual(res.status_code, 200)
+        self.assertGreater(replica, 0)
+
+        self.client.patch(MANAGE_USER_URL, {"username": "renamed"})
+
+        res, primary, replica = self.send(self.client, "get", MANAGE_USER_URL)
+        self.assertEqual(res.data["username"], "renamed")
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+    def test_catalog_cache_is_filled_from_the_primary(self):
+        catalog_cache().clear()
+        sample_show_theme(name="Replicated")
+
+        miss, miss_primary, miss_replica = self.send(
+            self.client, "get", SHOW_THEME_URL
+        )
+        hit, hit_primary, hit_replica = self.send(
+            self.client, "get", SHOW_THEME_URL
+        )
+
+        self.assertEqual((miss["X-Cache"], hit["X-Cache"]), ("MISS", "HIT"))
+        self.assertGreater(miss_primary, 0)
+        self.assertEqual(hit_primary, 0)
+        # only the user of the token is read from the replica
+        self.assertEqual(miss_replica, hit_replica)
+
+    @override_settings(REPLICA_STICKY_SECONDS=0)
+    def test_no_window(self):
+        self.book()
+
+        _, primary, replica = self.send(self.client, "get", TICKET_URL)
+
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
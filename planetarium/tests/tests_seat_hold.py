@@ -0,0 +1,139 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from planetarium.models import ShowSession, Ticket, SeatHold, Reservation
+from planetarium.tests.default_test_data import (
+    user_test,
+    sample_astronomy_show,
+    sample_planetarium_dome,
+)
+
+Seat_Hold_URL = reverse("planetarium:seat_holds-list")
+Seat_Hold_Confirm_URL = reverse("planetarium:seat_holds-confirm")
+Ticket_Book_URL = reverse("planetarium:tickets-book")
+
+
+class SeatHoldApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = user_test(
+            username="default_user", password="defaultpassword122"
+        )
+        self.other_user = user_test(
+            username="other_user", password="defaultpassword122"
+        )
+        self.client.force_authenticate(self.user)
+        self.show_session = ShowSession.objects.create(
+            astronomy_show=sample_astronomy_show(title="Hold Show"),
+            planetarium_dome=sample_planetarium_dome(
+                name="Hold Dome", rows=5, seats_in_row=10
+            ),
+            show_time="2024-05-19",
+        )
+
+    def hold(self, *seats):
+        payload = {
+            "show_session": self.show_session.id,
+            "seats": [{"row": row, "seat": seat} for row, seat in seats],
+        }
+        return self.client.post(Seat_Hold_URL, payload, format="json")
+
+    def test_hold_seats(self):
+        res = self.hold((1, 1), (1, 2))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            set(SeatHold.objects.values_list("row", "seat", "user")),
+            {(1, 1, self.user.id), (1, 2, self.user.id)},
+        )
+        self.assertEqual(
+            len(self.client.get(Seat_Hold_URL).data["results"]), 2
+        )
+
+    def test_held_seat_unavailable_to_others(self):
+        self.hold((1, 1))
+        self.client.force_authenticate(self.other_user)
+
+        hold_res = self.hold((1, 1))
+        book_res = self.client.post(
+            Ticket_Book_URL,
+            {
+                "show_session": self.show_session.id,
+                "tickets": [{"row": 1, "seat": 1}],
+            },
+            format="json",
+        )
+        seats_res = self.client.get(
+            reverse(
+                "planetarium:show_session-seats",
+                args=[self.show_session.id],
+            )
+        )
+
+        self.assertEqual(hold_res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(book_res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(seats_res.data["taken"], 1)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_confirm_holds(self):
+        self.hold((2, 3), (2, 4))
+
+        res = self.client.post(
+            Seat_Hold_Confirm_URL,
+            {"show_session": self.show_session.id},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Reservation.objects.get().user, self.user)
+        self.assertEqual(
+            set(Ticket.objects.values_list("row", "seat")), {(2, 3), (2, 4)}
+        )
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_confirm_holds_of_deleted_show_session(self):
+        self.hold((2, 3))
+
+        def delete_show_session(*args):
+            ShowSession.objects.filter(pk=self.show_session.pk).delete()
+
+        # deleted by somebody else between validation and booking
+        with mock.patch(
+            "planetarium.serializers.validate_seats",
+            side_effect=delete_show_session,
+        ):
+            res = self.client.post(
+                Seat_Hold_Confirm_URL,
+                {"show_session": self.show_session.id},
+                format="json",
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Reservation.objects.exists())
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_expired_hold_released(self):
+        SeatHold.objects.create(
+            row=3,
+            seat=3,
+            show_session=self.show_session,
+            user=self.other_user,
+            expires_at=timezone.now() - timedelta(seconds=1),
+        )
+
+        res = self.hold((3, 3))
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        SeatHold.objects.update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        call_command("release_expired_seat_holds", stdout=StringIO())
+        self.assertFalse(SeatHold.objects.exists())
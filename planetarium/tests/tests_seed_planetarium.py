@@ -0,0 +1,106 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db.models import Count, F
+from django.test import TestCase
+
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    Reservation,
+    ShowSession,
+    ShowTheme,
+    Ticket,
+)
+
+SEED_OPTIONS = (
+    "--themes=5",
+    "--domes=3",
+    "--max-rows=4",
+    "--max-seats-in-row=12",
+    "--shows=10",
+    "--sessions=20",
+    "--users=15",
+    "--fill-rate=0.5",
+    "--days=7",
+)
+
+
+class SeedPlanetariumCommandTests(TestCase):
+    def seed(self, *options):
+        stdout = StringIO()
+        call_command(
+            "seed_planetarium", *SEED_OPTIONS, *options, stdout=stdout
+        )
+        return stdout.getvalue()
+
+    def snapshot(self):
+        return (
+            list(ShowTheme.objects.order_by("pk").values_list("name")),
+            list(
+                AstronomyShow.objects.order_by(
+                    "pk", "show_theme__name"
+                ).values_list("title", "show_theme__name")
+            ),
+            list(
+                PlanetariumDome.objects.order_by("pk").values_list(
+                    "name", "rows", "seats_in_row"
+                )
+            ),
+            list(
+                ShowSession.objects.order_by("pk").values_list(
+                    "astronomy_show__title", "show_time", "seats_sold"
+                )
+            ),
+            list(
+                Ticket.objects.order_by("pk").values_list(
+                    "row", "seat", "reservation__user__username"
+                )
+            ),
+        )
+
+    def test_seed(self):
+        output = self.seed()
+
+        self.assertIn("rows/s", output)
+        self.assertEqual(ShowTheme.objects.count(), 5)
+        self.assertEqual(get_user_model().objects.count(), 15)
+        self.assertEqual(ShowSession.objects.count(), 20)
+        self.assertFalse(
+            PlanetariumDome.objects.filter(rows__gt=4).exists()
+            or PlanetariumDome.objects.filter(seats_in_row__gt=12).exists()
+        )
+        sessions = ShowSession.objects.annotate(
+            tickets_count=Count("tickets"),
+            capacity=F("planetarium_dome__rows")
+            * F("planetarium_dome__seats_in_row"),
+        )
+        for session in sessions:
+            self.assertEqual(session.seats_sold, session.tickets_count)
+            self.assertEqual(
+                session.seats_available, session.capacity - session.seats_sold
+            )
+            self.assertAlmostEqual(
+                session.seats_sold, session.capacity / 2, delta=1
+            )
+        self.assertFalse(
+            Reservation.objects.annotate(count=Count("reservation_tickets"))
+            .filter(count__gt=6)
+            .exists()
+        )
+
+    def test_same_seed_same_data(self):
+        self.seed()
+        first = self.snapshot()
+        for model in (ShowTheme, AstronomyShow, PlanetariumDome):
+            model.objects.all().delete()
+        get_user_model().objects.all().delete()
+
+        self.seed()
+
+        self.assertEqual(self.snapshot(), first)
+
+    def test_invalid_options(self):
+        with self.assertRaises(CommandError):
+            self.seed("--max-rows=51")
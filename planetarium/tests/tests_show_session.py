@@ -1,9 +1,17 @@
+import base64
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 
-from planetarium.models import ShowSession
+from planetarium.models import ShowSession, Ticket, Reservation
+from planetarium.seat_map import SeatMap
+from planetarium.tests.query_budget import QueryBudgetMixin, THROTTLE_QUERIES
 from planetarium.serializers import ShowSessionListSerializer
 from planetarium.tests.default_test_data import (
     user_test,
@@ -70,7 +78,7 @@ class AuthenticatedShowSessionApiTests(TestCase):
         show_session_show = ShowSession.objects.all()
         serializer = ShowSessionListSerializer(show_session_show, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_not_create_show_session(self):
         """Show session object 1"""
@@ -174,9 +182,9 @@ class ShowSessionFilteringApiTests(TestCase):
         serializer1 = ShowSessionListSerializer(show_session_object_1)
         serializer2 = ShowSessionListSerializer(show_session_object_2)
         serializer3 = ShowSessionListSerializer(show_session_object_3)
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data["results"])
+        self.assertIn(serializer2.data, res.data["results"])
+        self.assertNotIn(serializer3.data, res.data["results"])
 
     def test_filter_show_session_astronomy_description(self):
         """Show session object 1"""
@@ -230,9 +238,9 @@ class ShowSessionFilteringApiTests(TestCase):
         serializer1 = ShowSessionListSerializer(show_session_object_1)
         serializer2 = ShowSessionListSerializer(show_session_object_2)
         serializer3 = ShowSessionListSerializer(show_session_object_3)
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data["results"])
+        self.assertIn(serializer2.data, res.data["results"])
+        self.assertNotIn(serializer3.data, res.data["results"])
 
     def test_filter_show_session_astronomy_planetarium_dome_name(self):
         """Show session object 1"""
@@ -286,9 +294,9 @@ class ShowSessionFilteringApiTests(TestCase):
         serializer1 = ShowSessionListSerializer(show_session_object_1)
         serializer2 = ShowSessionListSerializer(show_session_object_2)
         serializer3 = ShowSessionListSerializer(show_session_object_3)
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data["results"])
+        self.assertIn(serializer2.data, res.data["results"])
+        self.assertNotIn(serializer3.data, res.data["results"])
 
     def test_filter_show_session_show_time(self):
         """Show session object 1"""
@@ -344,9 +352,9 @@ class ShowSessionFilteringApiTests(TestCase):
         serializer1 = ShowSessionListSerializer(show_session_object_1)
         serializer2 = ShowSessionListSerializer(show_session_object_2)
         serializer3 = ShowSessionListSerializer(show_session_object_3)
-        self.assertIn(serializer1.data, res1.data)
-        self.assertIn(serializer2.data, res2.data)
-        self.assertNotIn(serializer3.data, res3.data)
+        self.assertIn(serializer1.data, res1.data["results"])
+        self.assertIn(serializer2.data, res2.data["results"])
+        self.assertNotIn(serializer3.data, res3.data["results"])
 
 
 class ShowSessionModelsTestsStr(TestCase):
@@ -379,3 +387,393 @@ class ShowSessionModelsTestsStr(TestCase):
                 f" planetarium: {show_session_object_1.planetarium_dome.name} , show time: {show_session_object_1.show_time}"
             ),
         )
+
+
+class ShowSessionSeatsApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = user_test(
+            username="default_user", password="defaultpassword122"
+        )
+        self.client.force_authenticate(self.user)
+        self.show_session = ShowSession.objects.create(
+            astronomy_show=sample_astronomy_show(title="Seats Show"),
+            planetarium_dome=sample_planetarium_dome(
+                name="Seats Dome", rows=3, seats_in_row=5
+            ),
+            show_time="2024-05-19",
+        )
+        self.url = reverse(
+            "planetarium:show_session-seats", args=[self.show_session.id]
+        )
+
+    def book(self, row, seat):
+        Ticket.objects.create(
+            row=row,
+            seat=seat,
+            show_session=self.show_session,
+            reservation=Reservation.objects.create(user=self.user),
+        )
+
+    def test_seats_bitset(self):
+        self.book(1, 1)
+        self.book(2, 5)
+
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["rows"], 3)
+        self.assertEqual(res.data["seats_in_row"], 5)
+        self.assertEqual(res.data["taken"], 2)
+        bits = int.from_bytes(base64.b64decode(res.data["seats"]), "little")
+        self.assertEqual(bits, 1 << 0 | 1 << 9)
+
+    def test_seats_not_modified(self):
+        self.book(1, 1)
+        etag = self.client.get(self.url)["ETag"]
+
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.book(3, 3)
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+
+    def test_seats_after_planetarium_dome_shrank(self):
+        self.book(1, 1)
+        self.book(3, 5)
+        planetarium_dome = self.show_session.planetarium_dome
+        planetarium_dome.rows = 2
+        planetarium_dome.seats_in_row = 4
+        planetarium_dome.save()
+
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["taken"], 1)
+
+
+class SeatMapFindBlockTests(TestCase):
+    def test_block_closest_to_center_of_middle_row(self):
+        seat_map = SeatMap(5, 10, [(3, 5), (3, 6)])
+
+        self.assertEqual(seat_map.find_block(2), (3, 7))
+        self.assertEqual(seat_map.find_block(4, preferred_row=1), (1, 4))
+
+    def test_rows_without_room_are_skipped(self):
+        seat_map = SeatMap(3, 6, [(2, 3), (2, 4), (1, 4), (3, 2), (3, 5)])
+
+        self.assertEqual(seat_map.find_block(3), (1, 1))
+        self.assertIsNone(seat_map.find_block(4))
+        self.assertIsNone(seat_map.find_block(7))
+
+    def test_seats_outside_dome_are_skipped(self):
+        seat_map = SeatMap(2, 3, [(1, 1), (3, 1), (1, 4), (0, 1)])
+
+        self.assertEqual(seat_map.taken_count, 1)
+        self.assertEqual(seat_map.find_block(3), (2, 1))
+
+    def test_found_block_is_free_on_full_size_dome(self):
+        occupied = [
+            (row, seat)
+            for row in range(1, 51)
+            for seat in range(1, 631)
+            if (row * 7 + seat * 13) % 10
+        ]
+        seat_map = SeatMap(50, 630, occupied)
+
+        row, first_seat = seat_map.find_block(1, preferred_row=50)
+        self.assertFalse(seat_map.is_taken(row, first_seat))
+        self.assertIsNone(seat_map.find_block(2))
+
+
+class ShowSessionBestAvailableApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = user_test(
+            username="default_user", password="defaultpassword122"
+        )
+        self.client.force_authenticate(self.user)
+        self.show_session = ShowSession.objects.create(
+            astronomy_show=sample_astronomy_show(title="Party Show"),
+            planetarium_dome=sample_planetarium_dome(
+                name="Party Dome", rows=3, seats_in_row=8
+            ),
+            show_time="2024-05-19",
+        )
+        self.url = reverse(
+            "planetarium:show_session-best-available",
+            args=[self.show_session.id],
+        )
+
+    def test_suggest_best_available(self):
+        res = self.client.get(self.url, {"party_size": 4})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["row"], 2)
+        self.assertEqual(res.data["seats"], [3, 4, 5, 6])
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_book_best_available(self):
+        res = self.client.post(
+            self.url, {"party_size": 3, "preferred_row": 3}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            set(Ticket.objects.values_list("row", "seat")),
+            {(3, 3), (3, 4), (3, 5)},
+        )
+        self.assertEqual(Reservation.objects.get().user, self.user)
+
+    def test_no_block_available(self):
+        res = self.client.get(self.url, {"party_size": 9})
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+
+
+class ShowSessionQueryBudgetTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = user_test(
+            username="default_user", password="defaultpassword122"
+        )
+        self.client.force_authenticate(self.user)
+        self.planetarium_dome = sample_planetarium_dome(name="Count Dome")
+
+    def add_show_sessions(self, start, count):
+        for number in range(start, start + count):
+            astronomy_show = sample_astronomy_show(title=f"Show {number}")
+            astronomy_show.show_theme.add(
+                sample_show_theme(name=f"Theme {number}")
+            )
+            ShowSession.objects.create(
+                astronomy_show=astronomy_show,
+                planetarium_dome=self.planetarium_dome,
+                show_time="2024-05-19",
+            )
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(Show_Session_URL)
+        return len(queries)
+
+    def test_list_queries_do_not_grow_with_show_sessions(self):
+        self.add_show_sessions(0, 1)
+        one_show_session = self.count_queries()
+        self.add_show_sessions(1, 9)
+
+        self.assertEqual(self.count_queries(), one_show_session)
+
+    def test_list_budget(self):
+        self.add_show_sessions(0, 10)
+
+        with self.assertQueryBudget(2 + THROTTLE_QUERIES):
+            self.client.get(Show_Session_URL)
+
+    def test_seats_budget(self):
+        self.add_show_sessions(0, 1)
+        url = reverse(
+            "planetarium:show_session-seats",
+            args=[ShowSession.objects.get().id],
+        )
+
+        with self.assertQueryBudget(2 + THROTTLE_QUERIES):
+            self.client.get(url)
+
+
+class ShowSessionSeatCounterTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = user_test(
+            username="default_user", password="defaultpassword122"
+        )
+        self.client.force_authenticate(self.user)
+        self.planetarium_dome = sample_planetarium_dome(
+            name="Counter Dome", rows=2, seats_in_row=5
+        )
+        self.show_session = ShowSession.objects.create(
+            astronomy_show=sample_astronomy_show(title="Counter Show"),
+            planetarium_dome=self.planetarium_dome,
+            show_time="2024-05-19",
+        )
+
+    def ticket(self, row, seat):
+        return Ticket(
+            row=row,
+            seat=seat,
+            show_session=self.show_session,
+            reservation=Reservation.objects.create(user=self.user),
+        )
+
+    def assertCounters(self, seats_sold, seats_available):
+        self.show_session.refresh_from_db()
+        self.assertEqual(self.show_session.seats_sold, seats_sold)
+        self.assertEqual(self.show_session.seats_available, seats_available)
+
+    def test_new_show_session_is_empty(self):
+        self.assertCounters(0, 10)
+
+    def test_ticket_save_and_delete(self):
+        ticket = self.ticket(1, 1)
+        ticket.save()
+        self.assertCounters(1, 9)
+
+        ticket.delete()
+        self.assertCounters(0, 10)
+
+    def test_bulk_create_and_queryset_delete(self):
+        Ticket.objects.bulk_create([self.ticket(1, 1), self.ticket(1, 2)])
+        self.assertCounters(2, 8)
+
+        Ticket.objects.filter(show_session=self.show_session).delete()
+        self.assertCounters(0, 10)
+
+    def test_reservation_delete(self):
+        reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.bulk_create(
+            [
+                Ticket(
+                    row=1,
+                    seat=seat,
+                    show_session=self.show_session,
+                    reservation=reservation,
+                )
+                for seat in (1, 2)
+            ]
+            + [self.ticket(2, 1)]
+        )
+
+        reservation.delete()
+
+        self.assertCounters(1, 9)
+
+    def test_user_delete(self):
+        other = user_test(username="other_user", password="otherpassword122")
+        Ticket.objects.bulk_create(
+            [
+                self.ticket(1, 1),
+                self.ticket(1, 2),
+                Ticket(
+                    row=2,
+                    seat=1,
+                    show_session=self.show_session,
+                    reservation=Reservation.objects.create(user=other),
+                ),
+            ]
+        )
+
+        self.user.delete()
+
+        self.assertCounters(1, 9)
+
+    def test_reservation_queryset_delete(self):
+        Ticket.objects.bulk_create(
+            [self.ticket(row, seat) for row in (1, 2) for seat in range(1, 6)]
+        )
+
+        # select, one counter UPDATE, then one DELETE per table
+        with self.assertNumQueries(4):
+            Reservation.objects.filter(user=self.user).delete()
+
+        self.assertCounters(0, 10)
+
+    def test_show_session_delete_fast_deletes_tickets(self):
+        Ticket.objects.bulk_create(
+            [self.ticket(row, seat) for row in (1, 2) for seat in range(1, 6)]
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            self.show_session.delete()
+
+        self.assertEqual(
+            [
+                query["sql"]
+                for query in queries
+                if query["sql"].startswith("UPDATE")
+            ],
+            [],
+        )
+        self.assertLess(len(queries), 10)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_booking(self):
+        res = self.client.post(
+            reverse("planetarium:tickets-book"),
+            {
+                "show_session": self.show_session.id,
+                "tickets": [{"row": 1, "seat": 1}, {"row": 2, "seat": 2}],
+            },
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertCounters(2, 8)
+
+    def test_stale_save_keeps_counters(self):
+        stale = ShowSession.objects.get(pk=self.show_session.pk)
+        self.ticket(1, 1).save()
+
+        stale.show_time = "2024-05-20"
+        stale.save()
+
+        self.assertCounters(1, 9)
+
+    def test_planetarium_dome_resize(self):
+        self.ticket(1, 1).save()
+
+        self.planetarium_dome.rows = 3
+        self.planetarium_dome.save()
+
+        self.assertCounters(1, 14)
+
+    def test_save_keeps_dome_without_resync(self):
+        show_session = ShowSession.objects.get(pk=self.show_session.pk)
+        show_session.show_time = "2024-05-20"
+
+        with self.assertNumQueries(1):
+            show_session.save()
+
+    def test_move_to_another_dome(self):
+        self.ticket(1, 1).save()
+        show_session = ShowSession.objects.get(pk=self.show_session.pk)
+        show_session.planetarium_dome = sample_planetarium_dome(
+            name="Bigger Dome", rows=3, seats_in_row=5
+        )
+
+        show_session.save()
+
+        self.assertCounters(1, 14)
+
+    def test_repair_seat_counters(self):
+        self.ticket(1, 1).save()
+        ShowSession.objects.update(seats_sold=7, seats_available=0)
+
+        call_command("repair_seat_counters", stdout=StringIO())
+
+        self.assertCounters(1, 9)
+
+    def test_filter_and_order_by_availability(self):
+        other = ShowSession.objects.create(
+            astronomy_show=self.show_session.astronomy_show,
+            planetarium_dome=sample_planetarium_dome(
+                name="Small Dome", rows=1, seats_in_row=3
+            ),
+            show_time="2024-05-19",
+        )
+
+        res = self.client.get(Show_Session_URL, {"available_min": 4})
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertEqual(res.data["results"][0]["seats_available"], 10)
+
+        res = self.client.get(
+            Show_Session_URL, {"ordering": "seats_available", "page_size": 1}
+        )
+        self.assertEqual(res.data["results"][0]["seats_available"], 3)
+
+        res = self.client.get(res.data["next"])
+        self.assertEqual(res.data["results"][0]["seats_available"], 10)
+        self.assertIsNone(res.data["next"])
+        self.assertEqual(other.seats_available, 3)
@@ -9,6 +9,7 @@ from rest_framework import status
 from planetarium.models import ShowTheme
 from planetarium.serializers import ShowThemeSerializer
 from planetarium.tests.default_test_data import user_test, sample_show_theme
+from planetarium.tests.query_budget import QueryBudgetMixin, THROTTLE_QUERIES
 
 ShowTheme_URL = reverse("planetarium:show_theme-list")
 
@@ -39,7 +40,7 @@ class AuthenticatedShowThemeApiTests(TestCase):
         serializer = ShowThemeSerializer(show_theme, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_not_create_show_theme(self):
         payload = {"name": "New Show Theme"}
@@ -76,9 +77,9 @@ class ShowThemeFilteringApiTests(TestCase):
         serializer2 = ShowThemeSerializer(show_theme_2)
         serializer3 = ShowThemeSerializer(show_theme_3)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data["results"])
+        self.assertIn(serializer2.data, res.data["results"])
+        self.assertNotIn(serializer3.data, res.data["results"])
 
 
 class ShowThemeValidateViewTests(TestCase):
@@ -121,3 +122,18 @@ class ShowThemeModelsTests(TestCase):
     def test_show_theme_str(self):
         show_theme_1 = sample_show_theme(name="Test1")
         self.assertEqual(show_theme_1.__str__(), "Test1")
+
+
+class ShowThemeQueryBudgetTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = user_test(
+            username="default_user", password="defaultpassword122"
+        )
+        self.client.force_authenticate(self.user)
+        for number in range(10):
+            sample_show_theme(name=f"Theme {number}")
+
+    def test_list_budget(self):
+        with self.assertQueryBudget(1 + THROTTLE_QUERIES):
+            self.client.get(ShowTheme_URL)
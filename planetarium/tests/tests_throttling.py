@@ -0,0 +1,176 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework.throttling import SimpleRateThrottle
+
+from planetarium.models import ThrottleBucket
+from planetarium.tests.default_test_data import (
+    sample_show_session,
+    user_test,
+)
+from planetarium.throttling import bucket_key, refill_seconds, take_token
+
+SHOW_SESSION_URL = reverse("planetarium:show_session-list")
+TICKET_URL = reverse("planetarium:tickets-list")
+REGISTER_URL = reverse("user:user-registration")
+
+
+def throttle_rates(**rates):
+    return mock.patch.dict(SimpleRateThrottle.THROTTLE_RATES, rates)
+
+
+class TakeTokenTests(TestCase):
+    def take(self, now, key="bucket"):
+        return take_token(key, 3.0, 1.0, now, DEFAULT_DB_ALIAS)
+
+    def test_bucket_starts_full(self):
+        taken = [self.take(100.0 + index / 10) for index in range(6)]
+
+        self.assertEqual(taken, [True, True, True, False, False, False])
+        self.assertEqual(ThrottleBucket.objects.count(), 1)
+
+    def test_bucket_refills_at_rate(self):
+        for index in range(4):
+            self.take(100.0)
+
+        self.assertFalse(self.take(100.5))
+        self.assertTrue(self.take(101.2))
+        self.assertFalse(self.take(101.3))
+
+    def test_bucket_does_not_fill_over_capacity(self):
+        self.take(100.0)
+
+        self.assertTrue(self.take(1000.0))
+        self.assertEqual(ThrottleBucket.objects.get().tokens, 2.0)
+
+    def test_buckets_are_separate(self):
+        for index in range(3):
+            self.take(100.0, key="first")
+
+        self.assertFalse(self.take(100.0, key="first"))
+        self.assertTrue(self.take(100.0, key="second"))
+
+    def test_long_keys_are_hashed(self):
+        key = "throttle_user_" + "x" * 300
+
+        self.assertEqual(bucket_key("throttle_user_1"), "throttle_user_1")
+        self.assertLessEqual(len(bucket_key(key)), 255)
+        self.assertEqual(bucket_key(key), bucket_key(key))
+
+
+class ThrottleApiTests(TestCase):
+    def setUp(self):
+        self.show_session = sample_show_session()
+        self.user = user_test()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_user_is_throttled_with_retry_after(self):
+        with throttle_rates(user="2/minute"):
+            responses = [self.client.get(SHOW_SESSION_URL) for _ in range(3)]
+
+        self.assertEqual(
+            [res.status_code for res in responses],
+            [
+                status.HTTP_200_OK,
+                status.HTTP_200_OK,
+                status.HTTP_429_TOO_MANY_REQUESTS,
+            ],
+        )
+        self.assertTrue(1 <= int(responses[-1]["Retry-After"]) <= 30)
+        self.assertTrue(
+            ThrottleBucket.objects.filter(
+                key=f"throttle_user_{self.user.pk}"
+            ).exists()
+        )
+
+    def test_anon_is_throttled_by_ip(self):
+        with throttle_rates(anon="1/minute"):
+            first = APIClient().post(REGISTER_URL, {})
+            second = APIClient().post(REGISTER_URL, {})
+
+        self.assertEqual(first.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            second.status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+
+    def test_booking_scope_throttles_ticket_writes(self):
+        with throttle_rates(booking="1/hour"):
+            reads = [self.client.get(TICKET_URL) for _ in range(3)]
+            first = self.client.post(
+                TICKET_URL,
+                {"row": 1, "seat": 1, "show_session": self.show_session.id},
+            )
+            second = self.client.post(
+                TICKET_URL,
+                {"row": 1, "seat": 2, "show_session": self.show_session.id},
+            )
+
+        self.assertEqual(
+            {res.status_code for res in reads}, {status.HTTP_200_OK}
+        )
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            second.status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+        self.assertGreater(int(second["Retry-After"]), 30 * 60)
+
+    def test_booking_scope_is_per_user(self):
+        other = APIClient()
+        other.force_authenticate(user_test(username="other_user"))
+
+        with throttle_rates(booking="1/hour"):
+            self.client.post(
+                TICKET_URL,
+                {"row": 1, "seat": 1, "show_session": self.show_session.id},
+            )
+            res = other.post(
+                TICKET_URL,
+                {"row": 1, "seat": 2, "show_session": self.show_session.id},
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+
+class ThrottleCommandTests(TestCase):
+    def test_purge_deletes_full_buckets_only(self):
+        with mock.patch("planetarium.models.time.time", return_value=1e6):
+            ThrottleBucket.objects.bulk_create(
+                [
+                    ThrottleBucket(
+                        key="idle",
+                        tokens=0,
+                        updated_at=1e6 - refill_seconds() - 1,
+                    ),
+                    ThrottleBucket(key="recent", tokens=0, updated_at=1e6),
+                ]
+            )
+            out = StringIO()
+            call_command("purge_throttle_buckets", stdout=out)
+
+        self.assertIn("Purged 1 full throttle buckets", out.getvalue())
+        self.assertEqual(
+            list(ThrottleBucket.objects.values_list("key", flat=True)),
+            ["recent"],
+        )
+
+    def test_benchmark_compares_both_throttles(self):
+        out = StringIO()
+
+        call_command(
+            "benchmark_throttles",
+            checks=20,
+            clients=4,
+            warmup=4,
+            stdout=out,
+        )
+
+        self.assertIn("cache", out.getvalue())
+        self.assertIn("token-bucket", out.getvalue())
+        self.assertFalse(ThrottleBucket.objects.exists())
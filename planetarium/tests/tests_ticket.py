@@ -2,7 +2,12 @@ from django.test import TestCase
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
-from planetarium.models import ShowSession, Ticket, Reservation
+from planetarium.models import (
+    PlanetariumDome,
+    Reservation,
+    ShowSession,
+    Ticket,
+)
 from planetarium.serializers import TicketListSerializer
 from planetarium.tests.default_test_data import (
     user_test,
@@ -10,7 +15,15 @@ from planetarium.tests.default_test_data import (
     sample_planetarium_dome,
     sample_astronomy_show,
 )
+from planetarium.tests.query_budget import (
+    BOOKING_THROTTLE_QUERIES,
+    QueryBudgetMixin,
+    THROTTLE_QUERIES,
+)
+from django.db import connection
 from django.db.utils import IntegrityError
+from django.test.utils import CaptureQueriesContext
+from drf_spectacular.generators import SchemaGenerator
 
 
 Ticket_URL = reverse("planetarium:tickets-list")
@@ -84,7 +97,7 @@ class AuthenticatedTicketApiTests(TestCase):
         )
         serializer = TicketListSerializer(expected_ticket_list, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_list_ticket(self):
         """Ticket object 1"""
@@ -135,7 +148,7 @@ class AuthenticatedTicketApiTests(TestCase):
         ticket_list = Ticket.objects.all()
         serializer = TicketListSerializer(ticket_list, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_not_create_ticket(self):
         """Ticket object 1"""
@@ -249,9 +262,9 @@ class TicketFilteringApiTests(TestCase):
         serializer2 = TicketListSerializer(ticket_object_2)
         serializer3 = TicketListSerializer(ticket_object_3)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data["results"])
+        self.assertIn(serializer2.data, res.data["results"])
+        self.assertNotIn(serializer3.data, res.data["results"])
 
     def test_filter_ticket_reservation_user(self):
         """Ticket object 1"""
@@ -331,9 +344,9 @@ class TicketFilteringApiTests(TestCase):
         serializer1 = TicketListSerializer(ticket_object_1)
         serializer2 = TicketListSerializer(ticket_object_2)
         serializer3 = TicketListSerializer(ticket_object_3)
-        self.assertIn(serializer1.data, res.data)
-        self.assertNotIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data["results"])
+        self.assertNotIn(serializer2.data, res.data["results"])
+        self.assertNotIn(serializer3.data, res.data["results"])
 
     def test_filter_ticket_show_session_planetarium_dome_name(self):
         """Ticket object 1"""
@@ -407,9 +420,9 @@ class TicketFilteringApiTests(TestCase):
         serializer2 = TicketListSerializer(ticket_object_2)
         serializer3 = TicketListSerializer(ticket_object_3)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data["results"])
+        self.assertIn(serializer2.data, res.data["results"])
+        self.assertNotIn(serializer3.data, res.data["results"])
 
 
 class TicketValidation(TestCase):
@@ -672,3 +685,257 @@ class ReservationTest(TestCase):
         }
         response = self.client.post(Ticket_URL, data)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+Ticket_Book_URL = reverse("planetarium:tickets-book")
+
+
+class TicketBookingApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = user_test(
+            username="default_user", password="defaultpassword122"
+        )
+        self.client.force_authenticate(self.user)
+        self.show_session = ShowSession.objects.create(
+            astronomy_show=sample_astronomy_show(title="Booking Show"),
+            planetarium_dome=sample_planetarium_dome(
+                name="Booking Dome", rows=10, seats_in_row=20
+            ),
+            show_time="2024-05-19",
+        )
+
+    def book(self, *seats):
+        payload = {
+            "show_session": self.show_session.id,
+            "tickets": [{"row": row, "seat": seat} for row, seat in seats],
+        }
+        return self.client.post(Ticket_Book_URL, payload, format="json")
+
+    def test_book_several_seats_in_one_reservation(self):
+        res = self.book((1, 1), (1, 2), (1, 3))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Reservation.objects.count(), 1)
+        reservation = Reservation.objects.get()
+        self.assertEqual(res.data["reservation"], reservation.id)
+        self.assertEqual(reservation.user, self.user)
+        self.assertEqual(
+            set(
+                reservation.reservation_tickets.values_list("row", "seat")
+            ),
+            {(1, 1), (1, 2), (1, 3)},
+        )
+
+    def test_book_schema_reservation_is_integer(self):
+        schema = SchemaGenerator().get_schema(request=None, public=True)
+
+        self.assertEqual(
+            schema["components"]["schemas"]["TicketBatchCreate"][
+                "properties"
+            ]["reservation"],
+            {"type": "integer", "readOnly": True},
+        )
+
+    def test_book_taken_seat_creates_nothing(self):
+        self.book((2, 5))
+
+        res = self.book((2, 4), (2, 5))
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(res.data["seats"], [{"row": 2, "seat": 5}])
+        self.assertEqual(Reservation.objects.count(), 1)
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_book_seat_outside_dome(self):
+        res = self.book((1, 1), (11, 1))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_book_with_outdated_dome_shape(self):
+        self.book((1, 1))
+        # another process resized the dome, the cached shape is stale
+        PlanetariumDome.objects.filter(
+            pk=self.show_session.planetarium_dome_id
+        ).update(rows=5)
+
+        res = self.book((8, 1))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Ticket.objects.count(), 1)
+        self.assertEqual(Reservation.objects.count(), 1)
+        self.assertEqual(self.book((5, 1)).status_code, 201)
+
+    def test_book_same_seat_twice(self):
+        res = self.book((3, 3), (3, 3))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Reservation.objects.exists())
+
+
+class TicketSeatUniquenessTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = user_test(
+            username="default_user", password="defaultpassword122"
+        )
+        self.client.force_authenticate(self.user)
+        planetarium_dome = sample_planetarium_dome(
+            name="Uniqueness Dome", rows=10, seats_in_row=10
+        )
+        self.show_session_1 = ShowSession.objects.create(
+            astronomy_show=sample_astronomy_show(title="Uniqueness Show 1"),
+            planetarium_dome=planetarium_dome,
+            show_time="2024-05-19",
+        )
+        self.show_session_2 = ShowSession.objects.create(
+            astronomy_show=sample_astronomy_show(title="Uniqueness Show 2"),
+            planetarium_dome=planetarium_dome,
+            show_time="2024-05-20",
+        )
+
+    def test_same_seat_in_different_show_sessions(self):
+        payload = {"row": 5, "seat": 5}
+
+        res_1 = self.client.post(
+            Ticket_URL, {**payload, "show_session": self.show_session_1.id}
+        )
+        res_2 = self.client.post(
+            Ticket_URL, {**payload, "show_session": self.show_session_2.id}
+        )
+
+        self.assertEqual(res_1.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res_2.status_code, status.HTTP_201_CREATED)
+
+    def test_same_seat_in_same_show_session(self):
+        payload = {
+            "row": 5,
+            "seat": 5,
+            "show_session": self.show_session_1.id,
+        }
+
+        self.client.post(Ticket_URL, payload)
+        res = self.client.post(Ticket_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(res.data["seats"], [{"row": 5, "seat": 5}])
+        self.assertEqual(Ticket.objects.count(), 1)
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_create_ticket_queries(self):
+        payload = {
+            "row": 1,
+            "seat": 1,
+            "show_session": self.show_session_1.id,
+        }
+        self.client.post(Ticket_URL, {**payload, "seat": 2})
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(Ticket_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        inserts = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith("INSERT")
+        ]
+        self.assertEqual(len(inserts), 2 + BOOKING_THROTTLE_QUERIES)
+        # the shape comes from the cache, the dome is only part of the
+        # counter UPDATE checking the bounds
+        self.assertFalse(
+            any(
+                "planetarium_planetariumdome" in query["sql"]
+                for query in queries.captured_queries
+                if query["sql"].startswith("SELECT")
+            )
+        )
+
+
+class TicketQueryBudgetTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = user_test(
+            username="default_user", password="defaultpassword122"
+        )
+        self.client.force_authenticate(self.user)
+        self.tickets = []
+
+    def add_tickets(self, count):
+        for _ in range(count):
+            number = len(self.tickets)
+            astronomy_show = sample_astronomy_show(title=f"Show {number}")
+            astronomy_show.show_theme.add(
+                sample_show_theme(name=f"Theme {number}"),
+                sample_show_theme(name=f"Other Theme {number}"),
+            )
+            show_session = ShowSession.objects.create(
+                astronomy_show=astronomy_show,
+                planetarium_dome=sample_planetarium_dome(
+                    name=f"Dome {number}"
+                ),
+                show_time="2024-05-19",
+            )
+            self.tickets.append(
+                Ticket.objects.create(
+                    row=1,
+                    seat=1,
+                    show_session=show_session,
+                    reservation=Reservation.objects.create(user=self.user),
+                )
+            )
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return len(queries)
+
+    def test_list_queries_do_not_grow_with_tickets(self):
+        self.add_tickets(1)
+        one_ticket = self.count_queries(Ticket_URL)
+        self.add_tickets(9)
+        ten_tickets = self.count_queries(Ticket_URL)
+
+        self.assertEqual(one_ticket, ten_tickets)
+
+    def test_retrieve_queries_do_not_grow_with_tickets(self):
+        self.add_tickets(1)
+        one_ticket = self.count_queries(
+            reverse("planetarium:tickets-detail", args=[self.tickets[0].id])
+        )
+        self.add_tickets(9)
+        ten_tickets = self.count_queries(
+            reverse("planetarium:tickets-detail", args=[self.tickets[-1].id])
+        )
+
+        self.assertEqual(one_ticket, ten_tickets)
+
+    def test_list_budget(self):
+        self.add_tickets(10)
+
+        with self.assertQueryBudget(1 + THROTTLE_QUERIES):
+            self.client.get(Ticket_URL)
+
+    def test_retrieve_budget(self):
+        self.add_tickets(1)
+
+        with self.assertQueryBudget(2 + THROTTLE_QUERIES):
+            self.client.get(
+                reverse(
+                    "planetarium:tickets-detail", args=[self.tickets[0].id]
+                )
+            )
+
+    def test_create_budget(self):
+        self.add_tickets(1)
+        payload = {
+            "row": 2,
+            "seat": 2,
+            "show_session": self.tickets[0].show_session_id,
+        }
+        self.client.post(Ticket_URL, {**payload, "seat": 3})
+
+        with self.assertQueryBudget(5 + BOOKING_THROTTLE_QUERIES):
+            res = self.client.post(Ticket_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
@@ -0,0 +1,145 @@
+"""Throttles keeping a token bucket per client and scope in the database.
+
+DRF's rate throttles keep the times of the recent requests of every
+client in the cache: with the local-memory cache every worker process
+counts on its own, and the lists grow with the rate. These keep one
+ThrottleBucket row per client and scope in the database all processes
+share. A bucket holds up to num_requests tokens and refills at
+num_requests per duration, every request takes a token.
+
+Taking one is a single INSERT ... ON CONFLICT DO UPDATE ... WHERE ...
+RETURNING: the row is refilled and a token taken atomically, and a
+request finding less than one token updates nothing and gets no row
+back. Only throttled requests read the bucket again, for Retry-After.
+"""
+
+import hashlib
+
+from django.db import connections, router
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import (
+    AnonRateThrottle,
+    ScopedRateThrottle,
+    SimpleRateThrottle,
+    UserRateThrottle,
+)
+
+from planetarium.models import ThrottleBucket
+
+BOOKING_SCOPE = "booking"
+
+
+def bucket_key(cache_key):
+    """cache_key, hashed when it does not fit the key column"""
+    if len(cache_key) <= ThrottleBucket._meta.get_field("key").max_length:
+        return cache_key
+    return f"sha256:{hashlib.sha256(cache_key.encode()).hexdigest()}"
+
+
+def take_token(key, capacity, rate, now, using):
+    """takes a token from the bucket key holding up to capacity tokens and
+    refilling rate tokens per second, returns whether it had one"""
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    column = {
+        field: qn(ThrottleBucket._meta.get_field(field).column)
+        for field in ("key", "tokens", "updated_at")
+    }
+    refilled = (
+        f"bucket.{column['tokens']} + (excluded.{column['updated_at']} "
+        f"- bucket.{column['updated_at']}) * %s"
+    )
+    sql = f"""INSERT INTO {qn(ThrottleBucket._meta.db_table)} AS bucket (
+            {column['key']}, {column['tokens']}, {column['updated_at']}
+        )
+        VALUES (%s, %s, %s)
+        ON CONFLICT ({column['key']}) DO UPDATE SET
+            {column['tokens']} = CASE
+                WHEN {refilled} > %s THEN %s ELSE {refilled}
+            END - 1,
+            {column['updated_at']} = excluded.{column['updated_at']}
+        WHERE {refilled} >= 1
+        RETURNING {column['tokens']}
+    """
+    params = [key, capacity - 1, now, rate, capacity, capacity, rate, rate]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchone() is not None
+
+
+def refill_seconds():
+    """the longest an empty bucket of any scope takes to fill up"""
+    throttle = ScopedTokenBucketThrottle()
+    return max(
+        (
+            throttle.parse_rate(rate)[1]
+            for rate in api_settings.DEFAULT_THROTTLE_RATES.values()
+            if rate
+        ),
+        default=0,
+    )
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """SimpleRateThrottle taking tokens from the bucket of its cache key
+    instead of keeping a request history, put it after the throttle
+    defining the scope and get_cache_key"""
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+        self.key = bucket_key(key)
+        self.using = router.db_for_write(ThrottleBucket)
+        return take_token(
+            self.key,
+            float(self.num_requests),
+            self.num_requests / self.duration,
+            self.timer(),
+            self.using,
+        )
+
+    def wait(self):
+        bucket = (
+            ThrottleBucket.objects.using(self.using)
+            .filter(key=self.key)
+            .values_list("tokens", "updated_at")
+            .first()
+        )
+        if bucket is None:
+            return None
+        tokens, updated_at = bucket
+        rate = self.num_requests / self.duration
+        refilled = tokens + (self.timer() - updated_at) * rate
+        return max(1 - refilled, 0) / rate
+
+
+class AnonTokenBucketThrottle(AnonRateThrottle, TokenBucketThrottle):
+    pass
+
+
+class UserTokenBucketThrottle(UserRateThrottle, TokenBucketThrottle):
+    pass
+
+
+class ScopedTokenBucketThrottle(ScopedRateThrottle, TokenBucketThrottle):
+    pass
+
+
+class BookingThrottleScopeMixin:
+    """throttles the writes of the booking_actions of a viewset in the
+    booking scope, on top of the user and anon scopes"""
+
+    booking_actions = ()
+
+    @property
+    def throttle_scope(self):
+        if (
+            self.action in self.booking_actions
+            and self.request.method not in SAFE_METHODS
+        ):
+            return BOOKING_SCOPE
+        return None
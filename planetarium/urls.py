@@ -1,11 +1,18 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from planetarium.async_views import (
+    AstronomyShowReadView,
+    PlanetariumDomeReadView,
+    ShowSessionReadView,
+    ShowThemeReadView,
+)
 from planetarium.views import (
     TicketViewSet,
     AstronomyShowViewSet,
     PlanetariumDomeViewSet,
     ShowSessionViewSet,
     ShowThemeViewSet,
+    SeatHoldViewSet,
 )
 
 
@@ -20,7 +27,28 @@ router.register(
 )
 router.register("show_session", ShowSessionViewSet, basename="show_session")
 router.register("show_theme", ShowThemeViewSet, basename="show_theme")
+router.register("seat_holds", SeatHoldViewSet, basename="seat_holds")
+
 
+# list and retrieve as coroutines for ASGI deployments, same responses
+async_urlpatterns = []
+for prefix, view in (
+    ("astronomy_show", AstronomyShowReadView),
+    ("planetarium_dome", PlanetariumDomeReadView),
+    ("show_session", ShowSessionReadView),
+    ("show_theme", ShowThemeReadView),
+):
+    async_urlpatterns += [
+        path(f"{prefix}/", view.as_view(), name=f"{prefix}-async-list"),
+        path(
+            f"{prefix}/<str:pk>/",
+            view.as_view(),
+            name=f"{prefix}-async-detail",
+        ),
+    ]
 
-urlpatterns = [path("", include(router.urls))]
+urlpatterns = [
+    path("", include(router.urls)),
+    path("async/", include(async_urlpatterns)),
+]
 app_name = "planetarium"
@@ -1,8 +1,11 @@
+from django.utils.http import parse_etags
+from django.db import transaction
+from django.db.models import Count
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, extend_schema
-from rest_framework import viewsets, status
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
 from planetarium.models import (
@@ -10,31 +13,104 @@ from planetarium.models import (
     AstronomyShow,
     PlanetariumDome,
     ShowSession,
-    Reservation,
     ShowTheme,
+    SeatHold,
+    Reservation,
+)
+from planetarium.booking import book_seats
+from planetarium.cache import CatalogCacheMixin
+from planetarium.conditional import ConditionalGetMixin
+from planetarium.exceptions import NoSeatsAvailable, SeatsTaken
+from planetarium.exports import (
+    EXPORT_FORMAT_QUERY_PARAM,
+    EXPORT_FORMATS,
+    RESERVATION_EXPORT_COLUMNS,
+    TICKET_EXPORT_COLUMNS,
+    export_response,
+)
+from planetarium.fieldsets import SparseFieldsetViewMixin
+from planetarium.filters import (
+    AstronomyShowFilter,
+    PlanetariumDomeFilter,
+    ReservationExportFilter,
+    ShowSessionFilter,
+    ShowThemeFilter,
+    TicketExportFilter,
+    TicketFilter,
+)
+from planetarium.pagination import (
+    TicketPagination,
+    AstronomyShowPagination,
+    PlanetariumDomePagination,
+    ShowSessionPagination,
+    ShowThemePagination,
 )
 from planetarium.permissions import IsAdminOrIfAuthenticatedReadOnly
+from planetarium.search import (
+    SEARCH_RANK_ORDERING,
+    supports_full_text_search,
+)
+from planetarium.seat_map import SeatMap
 from planetarium.serializers import (
     TicketSerializer,
     TicketDetailSerializer,
     TicketCreateSerializer,
     TicketListSerializer,
+    TicketBatchCreateSerializer,
     AstronomyShowListSerializer,
     AstronomyShowCreateSerializer,
     PlanetariumDomeListSerializer,
     PlanetariumDomeCreateSerializer,
     ShowSessionListSerializer,
     ShowSessionCreateSerializer,
+    ShowSessionSeatsSerializer,
     ShowThemeSerializer,
     PlanetariumDomeImageSerializer,
     AstronomyShowImageSerializer,
+    SeatHoldSerializer,
+    SeatHoldCreateSerializer,
+    SeatHoldConfirmSerializer,
+    BestAvailableSeatsSerializer,
 )
+from planetarium.throttling import BookingThrottleScopeMixin
+
+BEST_AVAILABLE_BOOKING_ATTEMPTS = 3
 
+export_schema = extend_schema(
+    parameters=[
+        OpenApiParameter(
+            name=EXPORT_FORMAT_QUERY_PARAM,
+            type=OpenApiTypes.STR,
+            enum=list(EXPORT_FORMATS),
+            default="csv",
+        )
+    ],
+    responses={
+        (200, content_type): OpenApiTypes.STR
+        for content_type in EXPORT_FORMATS.values()
+    },
+    filters=True,
+)
 
-class TicketViewSet(viewsets.ModelViewSet):
-    queryset = Ticket.objects.all().select_related()
+
+class TicketViewSet(
+    BookingThrottleScopeMixin,
+    SparseFieldsetViewMixin,
+    ConditionalGetMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = Ticket.objects.all()
     serializer_class = TicketSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = TicketPagination
+    booking_actions = ("create", "book")
+    filterset_class = TicketFilter
+    conditional_related_fields = (
+        "show_session__updated_at",
+        "show_session__astronomy_show__updated_at",
+        "show_session__astronomy_show__show_theme__updated_at",
+        "show_session__planetarium_dome__updated_at",
+    )
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -43,62 +119,98 @@ class TicketViewSet(viewsets.ModelViewSet):
             return TicketDetailSerializer
         elif self.action == "create":
             return TicketCreateSerializer
+        elif self.action == "book":
+            return TicketBatchCreateSerializer
         return TicketListSerializer
 
-    """filtering for query_params 'show_session', 'reservation' , 'planetarium_dome' """
-
     def get_queryset(self):
-        show_session = self.request.query_params.get("show_session")
-        reservation = self.request.query_params.get("reservation")
-        planetarium_dome = self.request.query_params.get("planetarium_dome")
-
         queryset = self.queryset
-        if show_session:
-            queryset = queryset.filter(
-                show_session__astronomy_show__title__icontains=show_session
+        if self.action in ("export", "export_reservations"):
+            # staff exports cover the tickets of all users
+            return queryset.all()
+        if self.action in ("list", "retrieve"):
+            queryset = queryset.select_related(
+                "show_session__astronomy_show",
+                "show_session__planetarium_dome",
+                "reservation__user",
+            ).defer("show_session__astronomy_show__search_vector")
+        if self.action == "retrieve":
+            queryset = queryset.prefetch_related(
+                "show_session__astronomy_show__show_theme"
             )
-        if reservation:
-            queryset = queryset.filter(
-                reservation__user__username__icontains=reservation
-            )
-        if planetarium_dome:
-            queryset = queryset.filter(
-                show_session__planetarium_dome__name__icontains=planetarium_dome
-            )
-        return queryset.filter(reservation__user=self.request.user).distinct()
+        return queryset.filter(reservation__user=self.request.user)
 
     def perform_create(self, serializer):
-        reservation_obj = Reservation.objects.create(user=self.request.user)
-        serializer.save(reservation=reservation_obj)
-
-    @extend_schema(
-        parameters=[
-            OpenApiParameter(
-                name="show_session",
-                type=OpenApiTypes.STR,
-                description="Filter by show_session show_session(title)",
-            ),
-            OpenApiParameter(
-                name="reservation",
-                type=OpenApiTypes.STR,
-                description="Filter by reservation(username)",
-            ),
-            OpenApiParameter(
-                name="planetarium_dome",
-                type=OpenApiTypes.STR,
-                description="Filter by planetarium_dome(name)",
-            ),
-        ]
+        serializer.save(user=self.request.user)
+
+    @action(methods=["POST"], detail=False, url_path="book")
+    def book(self, request):
+        """book several seats of one show session in a single reservation"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(user=request.user)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @export_schema
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="export",
+        permission_classes=[IsAdminUser],
+        queryset=Ticket.objects.order_by("show_session_id", "row", "seat"),
+        filterset_class=TicketExportFilter,
+        pagination_class=None,
     )
-    def list(self, request, *args, **kwargs):
-        """filtering for query_params 'show_session', 'reservation' , 'planetarium_dome'"""
-        return super().list(request, *args, **kwargs)
+    def export(self, request):
+        """stream the tickets of all users, e.g. the manifest of a show
+        session or of a day, staff only"""
+        return export_response(
+            request,
+            self.filter_queryset(self.get_queryset()),
+            TICKET_EXPORT_COLUMNS,
+            "tickets",
+        )
 
+    @export_schema
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="export/reservations",
+        permission_classes=[IsAdminUser],
+        queryset=Reservation.objects.annotate(
+            tickets_count=Count("reservation_tickets")
+        ).order_by("id"),
+        filterset_class=ReservationExportFilter,
+        pagination_class=None,
+    )
+    def export_reservations(self, request):
+        """stream the reservations of all users with their ticket count,
+        staff only"""
+        return export_response(
+            request,
+            self.filter_queryset(self.get_queryset()),
+            RESERVATION_EXPORT_COLUMNS,
+            "reservations",
+        )
 
-class AstronomyShowViewSet(viewsets.ModelViewSet):
-    queryset = AstronomyShow.objects.all().prefetch_related("show_theme")
+
+class AstronomyShowViewSet(
+    SparseFieldsetViewMixin,
+    CatalogCacheMixin,
+    ConditionalGetMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = (
+        AstronomyShow.objects.all()
+        .defer("search_vector")
+        .prefetch_related("show_theme")
+    )
     serializer_class = AstronomyShowListSerializer
     permission_classes = [IsAdminOrIfAuthenticatedReadOnly]
+    pagination_class = AstronomyShowPagination
+    filterset_class = AstronomyShowFilter
+    cache_list_namespaces = ("astronomyshow", "showtheme")
+    conditional_related_fields = ("show_theme__updated_at",)
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -108,82 +220,35 @@ class AstronomyShowViewSet(viewsets.ModelViewSet):
         return AstronomyShowCreateSerializer
 
     @action(methods=["POST"], detail=True, url_path="upload-image")
-    def upload_image(self, request):
+    def upload_image(self, request, pk=None):
         astronomy_show = self.get_object()
         serializer = self.get_serializer(astronomy_show, data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-    """filtering for query_params 'title', 'description' , 'show_theme' """
-
-    def get_queryset(self):
-        astronomy_show_show_theme = self.request.query_params.get(
-            "show_theme"
-        )
-        astronomy_show_show_name = self.request.query_params.get("show_name")
-        astronomy_show_description = self.request.query_params.get(
-            "description"
-        )
-
-        queryset = self.queryset
-        if astronomy_show_show_theme:
-            queryset = queryset.filter(
-                show_theme__name__icontains=astronomy_show_show_theme
-            )
-        if astronomy_show_show_name:
-            queryset = queryset.filter(
-                title__icontains=astronomy_show_show_name
-            )
-        if astronomy_show_description:
-            queryset = queryset.filter(
-                description__icontains=astronomy_show_description
-            )
-        return queryset.distinct()
-
-    @extend_schema(
-        parameters=[
-            OpenApiParameter(
-                name="show_theme",
-                type=OpenApiTypes.STR,
-                description="Filter by show_theme(name)",
-            ),
-            OpenApiParameter(
-                name="reservation",
-                type=OpenApiTypes.STR,
-                description="Filter by show_name(title)",
-            ),
-            OpenApiParameter(
-                name="description",
-                type=OpenApiTypes.STR,
-                description="Filter by description(description)",
-            ),
-        ]
-    )
-    def list(self, request, *args, **kwargs):
-        """filtering for query_params 'title', 'description' , 'show_theme'"""
-        return super().list(request, *args, **kwargs)
-
-
-class PlanetariumDomeViewSet(viewsets.ModelViewSet):
+    @property
+    def keyset_ordering(self):
+        """full-text search results come best match first"""
+        if self.request.query_params.get("q") and supports_full_text_search(
+            self.queryset
+        ):
+            return SEARCH_RANK_ORDERING
+        return None
+
+
+class PlanetariumDomeViewSet(
+    SparseFieldsetViewMixin,
+    CatalogCacheMixin,
+    ConditionalGetMixin,
+    viewsets.ModelViewSet,
+):
     queryset = PlanetariumDome.objects.all()
     serializer_class = PlanetariumDomeListSerializer
     permission_classes = [IsAdminOrIfAuthenticatedReadOnly]
-    """filtering for query_params 'planetarium_name' , 'rows' , 'seats_in_row' """
-
-    def get_queryset(self):
-        planetarium_name = self.request.query_params.get("planetarium_name")
-        rows = self.request.query_params.get("rows")
-        seats_in_row = self.request.query_params.get("seats_in_row")
-
-        queryset = self.queryset
-        if planetarium_name:
-            queryset = queryset.filter(name__icontains=planetarium_name)
-        if rows:
-            queryset = queryset.filter(rows=rows)
-        if seats_in_row:
-            queryset = queryset.filter(seats_in_row=seats_in_row)
-        return queryset.distinct()
+    pagination_class = PlanetariumDomePagination
+    filterset_class = PlanetariumDomeFilter
+    cache_list_namespaces = ("planetariumdome",)
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -193,127 +258,179 @@ class PlanetariumDomeViewSet(viewsets.ModelViewSet):
         return PlanetariumDomeCreateSerializer
 
     @action(methods=["POST"], detail=True, url_path="upload-image")
-    def upload_image(self, request):
+    def upload_image(self, request, pk=None):
         bus = self.get_object()
         serializer = self.get_serializer(bus, data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-    @extend_schema(
-        parameters=[
-            OpenApiParameter(
-                name="planetarium_name",
-                type=OpenApiTypes.STR,
-                description="Filter by planetarium_name(name)",
-            ),
-            OpenApiParameter(
-                name="rows",
-                type=OpenApiTypes.INT,
-                description="Filter by rows(rows)",
-            ),
-            OpenApiParameter(
-                name="seats_in_row",
-                type=OpenApiTypes.INT,
-                description="Filter by seats_in_row(seats_in_row)",
-            ),
-        ]
-    )
-    def list(self, request, *args, **kwargs):
-        """filtering for query_params 'planetarium_name' , 'rows' , 'seats_in_row'"""
-        return super().list(request, *args, **kwargs)
-
 
-class ShowSessionViewSet(viewsets.ModelViewSet):
-    queryset = ShowSession.objects.all().select_related(
-        "astronomy_show", "planetarium_dome"
+class ShowSessionViewSet(
+    BookingThrottleScopeMixin,
+    SparseFieldsetViewMixin,
+    ConditionalGetMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = (
+        ShowSession.objects.all()
+        .select_related("astronomy_show", "planetarium_dome")
+        .defer("astronomy_show__search_vector")
     )
     serializer_class = ShowSessionListSerializer
     permission_classes = [IsAdminOrIfAuthenticatedReadOnly]
+    pagination_class = ShowSessionPagination
+    booking_actions = ("best_available",)
+    filterset_class = ShowSessionFilter
+    conditional_related_fields = (
+        "astronomy_show__updated_at",
+        "astronomy_show__show_theme__updated_at",
+        "planetarium_dome__updated_at",
+    )
 
     def get_serializer_class(self):
         if self.action == "list":
             return ShowSessionListSerializer
+        elif self.action == "seats":
+            return ShowSessionSeatsSerializer
+        elif self.action == "best_available":
+            return BestAvailableSeatsSerializer
         return ShowSessionCreateSerializer
 
-    """filtering for query_params 'show_name', 'description' , 'name' """
-
-    def get_queryset(self):
-        astronomy_show_title = self.request.query_params.get("show_name")
-        astronomy_show_description = self.request.query_params.get(
-            "description"
-        )
-        planetarium_dome = self.request.query_params.get("name")
-        show_time = self.request.query_params.get("show_time")
-
-        queryset = self.queryset
-        if astronomy_show_title:
-            queryset = queryset.filter(
-                astronomy_show__title__icontains=astronomy_show_title
+    @action(methods=["GET"], detail=True, url_path="seats")
+    def seats(self, request, pk=None):
+        """occupied seats of the show session as a packed bitset"""
+        seat_map = SeatMap.for_show_session(self.get_object())
+        etag = seat_map.etag()
+        headers = {"ETag": etag}
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers=headers
+            )
+        serializer = self.get_serializer(seat_map)
+        return Response(serializer.data, headers=headers)
+
+    @action(
+        methods=["GET", "POST"],
+        detail=True,
+        url_path="best-available",
+        permission_classes=[IsAuthenticated],
+    )
+    def best_available(self, request, pk=None):
+        """best block of adjacent free seats for a party, GET suggests the
+        seats and POST books them in one reservation"""
+        show_session = self.get_object()
+        serializer = self.get_serializer(
+            data=(
+                request.query_params
+                if request.method == "GET"
+                else request.data
             )
-        if astronomy_show_description:
-            queryset = queryset.filter(
-                astronomy_show__description__icontains=astronomy_show_description
+        )
+        serializer.is_valid(raise_exception=True)
+        party_size = serializer.validated_data["party_size"]
+        for _ in range(BEST_AVAILABLE_BOOKING_ATTEMPTS):
+            block = SeatMap.for_show_session(show_session).find_block(
+                party_size, serializer.validated_data.get("preferred_row")
             )
-        if planetarium_dome:
-            queryset = queryset.filter(
-                planetarium_dome__name__icontains=planetarium_dome
+            if block is None:
+                raise NoSeatsAvailable()
+            row, first_seat = block
+            seats = [
+                (row, seat)
+                for seat in range(first_seat, first_seat + party_size)
+            ]
+            if request.method == "GET":
+                serializer = self.get_serializer(
+                    {
+                        "show_session": show_session.id,
+                        "row": row,
+                        "seats": [seat for _, seat in seats],
+                    }
+                )
+                return Response(serializer.data)
+            try:
+                reservation, tickets = book_seats(
+                    request.user, show_session.id, seats
+                )
+            except SeatsTaken:
+                continue
+            serializer = TicketBatchCreateSerializer(
+                {
+                    "reservation": reservation,
+                    "show_session": show_session.id,
+                    "tickets": tickets,
+                }
             )
-        if show_time:
-            queryset = queryset.filter(show_time__exact=show_time)
-        return queryset.distinct()
-
-    @extend_schema(
-        parameters=[
-            OpenApiParameter(
-                name="show_name",
-                type=OpenApiTypes.STR,
-                description="Filter by show_name(name)",
-            ),
-            OpenApiParameter(
-                name="description",
-                type=OpenApiTypes.STR,
-                description="Filter by description(description)",
-            ),
-            OpenApiParameter(
-                name="name",
-                type=OpenApiTypes.STR,
-                description="Filter by name(name)",
-            ),
-            OpenApiParameter(
-                name="name",
-                type=OpenApiTypes.DATE,
-                description="Filter by show_time(show_time)",
-            ),
-        ]
-    )
-    def list(self, request, *args, **kwargs):
-        """filtering for query_params 'show_name', 'description' , 'name'"""
-        return super().list(request, *args, **kwargs)
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        raise NoSeatsAvailable()
 
+    def get_queryset(self):
+        queryset = self.queryset
+        if self.action == "list":
+            queryset = queryset.prefetch_related("astronomy_show__show_theme")
+        return queryset
 
-class ShowThemeViewSet(viewsets.ModelViewSet):
+
+class ShowThemeViewSet(
+    SparseFieldsetViewMixin,
+    CatalogCacheMixin,
+    ConditionalGetMixin,
+    viewsets.ModelViewSet,
+):
     queryset = ShowTheme.objects.all()
     serializer_class = ShowThemeSerializer
     permission_classes = [IsAdminOrIfAuthenticatedReadOnly]
-    """filtering for query_params 'name' """
+    pagination_class = ShowThemePagination
+    filterset_class = ShowThemeFilter
+    cache_list_namespaces = ("showtheme",)
+
+
+class SeatHoldViewSet(
+    BookingThrottleScopeMixin,
+    mixins.ListModelMixin,
+    mixins.CreateModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet,
+):
+    """seats held by the user while checking out, held seats are not
+    available to other visitors until the hold expires"""
+
+    queryset = SeatHold.objects.all()
+    serializer_class = SeatHoldSerializer
+    permission_classes = [IsAuthenticated]
+    booking_actions = ("create", "confirm")
+
+    def get_serializer_class(self):
+        if self.action == "create":
+            return SeatHoldCreateSerializer
+        elif self.action == "confirm":
+            return SeatHoldConfirmSerializer
+        return SeatHoldSerializer
 
     def get_queryset(self):
-        name = self.request.query_params.get("name")
-        queryset = self.queryset
-        if name:
-            queryset = queryset.filter(name__icontains=name)
-        return queryset.distinct()
-
-    @extend_schema(
-        parameters=[
-            OpenApiParameter(
-                name="name",
-                type=OpenApiTypes.STR,
-                description="Filter by name(name)",
-            ),
-        ]
-    )
-    def list(self, request, *args, **kwargs):
-        """filtering for query_params 'name'"""
-        return super().list(request, *args, **kwargs)
+        return self.queryset.active().filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    @action(methods=["POST"], detail=False, url_path="confirm")
+    def confirm(self, request):
+        """turn the active holds of the user for a show session into tickets"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        holds = self.get_queryset().filter(
+            show_session=serializer.validated_data["show_session"]
+        )
+        with transaction.atomic():
+            booking = TicketBatchCreateSerializer(
+                data={
+                    "show_session": serializer.data["show_session"],
+                    "tickets": list(holds.values("row", "seat")),
+                },
+                context=self.get_serializer_context(),
+            )
+            booking.is_valid(raise_exception=True)
+            booking.save(user=request.user)
+            holds.delete()
+        return Response(booking.data, status=status.HTTP_201_CREATED)
@@ -0,0 +1,13 @@
+"""PostgreSQL backend handing out connections from a psycopg_pool pool.
+
+With CONN_MAX_AGE at 0 Django opens a connection for every request and
+closes it at the end, so a short API call pays for the TCP and auth
+handshake every time. This backend keeps one ConnectionPool per alias
+and process: connecting takes a connection from it and closing puts the
+connection back.
+
+Configure it with DATABASES[alias]["OPTIONS"]["pool"], the keyword
+arguments of ConnectionPool (min_size, max_size, timeout, max_idle, ...).
+CONN_HEALTH_CHECKS checks every connection when it is taken from the pool,
+CONN_MAX_AGE has to stay 0: the pool keeps the connections open.
+"""
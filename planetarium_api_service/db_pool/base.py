@@ -0,0 +1,141 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql.base import (
+    DatabaseWrapper as PostgreSQLDatabaseWrapper,
+)
+from django.db.backends.postgresql.psycopg_any import (
+    IsolationLevel,
+    is_psycopg3,
+)
+from django.utils.asyncio import async_unsafe
+
+from planetarium_api_service.db_pool.creation import DatabaseCreation
+
+
+class DatabaseWrapper(PostgreSQLDatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    # alias: ConnectionPool, shared by the connections of all threads
+    _connection_pools = {}
+
+    @property
+    def pool(self):
+        """the pool of the alias, built on first use and opened on the
+        first connect; None without OPTIONS["pool"]"""
+        pool_options = self.settings_dict["OPTIONS"].get("pool")
+        if self.alias == NO_DB_ALIAS or pool_options is None:
+            return None
+        if self.alias not in self._connection_pools:
+            if self.settings_dict["CONN_MAX_AGE"] != 0:
+                raise ImproperlyConfigured(
+                    "Pooled connections are not persistent, set "
+                    f"CONN_MAX_AGE of {self.alias!r} to 0."
+                )
+            try:
+                from psycopg_pool import ConnectionPool
+            except ImportError:
+                ConnectionPool = None
+            if ConnectionPool is None or not is_psycopg3:
+                raise ImproperlyConfigured(
+                    "Pooled connections need psycopg 3 and psycopg_pool."
+                )
+            connect_kwargs = self.get_connection_params()
+            # what connect() expects of a new connection, it sets the
+            # autocommit of the settings itself
+            connect_kwargs["autocommit"] = True
+            pool = ConnectionPool(
+                kwargs=connect_kwargs,
+                open=False,
+                check=(
+                    ConnectionPool.check_connection
+                    if self.settings_dict["CONN_HEALTH_CHECKS"]
+                    else None
+                ),
+                **{"name": self.alias, **pool_options},
+            )
+            # threads racing here build a pool each, the first one wins;
+            # the others were never opened
+            self._connection_pools.setdefault(self.alias, pool)
+        return self._connection_pools[self.alias]
+
+    def close_pool(self):
+        """closes the connections of the pool, the next connect builds a
+        new one"""
+        pool = self._connection_pools.pop(self.alias, None)
+        if pool is not None:
+            pool.close()
+
+    def pool_stats(self):
+        """how the pool is used, cumulative since it was built; None
+        without a pool"""
+        pool = self.pool
+        if pool is None:
+            return None
+        stats = pool.get_stats()
+        size = stats.get("pool_size", 0)
+        idle = stats.get("pool_available", 0)
+        checkouts = stats.get("requests_num", 0)
+        wait_ms = stats.get("requests_wait_ms", 0)
+        return {
+            "min_size": pool.min_size,
+            "max_size": pool.max_size,
+            "size": size,
+            "in_use": size - idle,
+            "idle": idle,
+            # connections above min_size, closed again after max_idle
+            "overflow": max(size - pool.min_size, 0),
+            "waiting": stats.get("requests_waiting", 0),
+            "checkouts": checkouts,
+            "checkouts_queued": stats.get("requests_queued", 0),
+            "checkout_timeouts": stats.get("requests_errors", 0),
+            "wait_ms_total": wait_ms,
+            "wait_ms_avg": round(wait_ms / checkouts, 2) if checkouts else 0,
+            "connections_opened": stats.get("connections_num", 0),
+            "connect_ms_total": stats.get("connections_ms", 0),
+            "connections_lost": stats.get("connections_lost", 0),
+            "returned_broken": stats.get("returns_bad", 0),
+        }
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop("pool", None)
+        return conn_params
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        # the isolation level handling of the PostgreSQL backend
+        options = self.settings_dict["OPTIONS"]
+        set_isolation_level = False
+        try:
+            isolation_level_value = options["isolation_level"]
+        except KeyError:
+            self.isolation_level = IsolationLevel.READ_COMMITTED
+        else:
+            try:
+                self.isolation_level = IsolationLevel(isolation_level_value)
+                set_isolation_level = True
+            except ValueError:
+                raise ImproperlyConfigured(
+                    f"Invalid transaction isolation level "
+                    f"{isolation_level_value} specified. Use one of the "
+                    f"psycopg.IsolationLevel values."
+                )
+        # a no-op once open, PoolTimeout is an OperationalError
+        pool.open()
+        connection = pool.getconn()
+        if set_isolation_level:
+            connection.isolation_level = self.isolation_level
+        return connection
+
+    def _close(self):
+        # psycopg sets the pool on the connections it hands out; that is
+        # the one to return them to, close_pool may have replaced it since
+        pool = getattr(self.connection, "_pool", None)
+        if pool is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            pool.putconn(self.connection)
+            self.connection = None
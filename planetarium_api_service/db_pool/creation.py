@@ -0,0 +1,17 @@
+from django.db.backends.postgresql.creation import (
+    DatabaseCreation as PostgreSQLDatabaseCreation,
+)
+
+
+class DatabaseCreation(PostgreSQLDatabaseCreation):
+    def create_test_db(self, *args, **kwargs):
+        # a pool built before holds connections to the database the test
+        # database replaces
+        self.connection.close_pool()
+        return super().create_test_db(*args, **kwargs)
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # idle connections in the pool keep the test database from being
+        # dropped
+        self.connection.close_pool()
+        super()._destroy_test_db(test_database_name, verbosity)
@@ -0,0 +1,96 @@
+"""Reads of safe requests from a read replica.
+
+ReplicaRoutingMiddleware decides per request whether its reads may go to
+settings.REPLICA_DATABASE_ALIAS and stores the alias in read_alias for
+ReplicaRouter. Writes, reads outside of such a request and reads inside
+a transaction on the primary go to the primary.
+
+A user who wrote reads from the primary for REPLICA_STICKY_SECONDS
+afterwards, so they see their own writes whatever the replication lag.
+The pin is kept in the REPLICA_PIN_CACHE cache, which has to be shared
+by all processes serving requests.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+PIN_KEY = "replica:pin:{}"
+
+read_alias = ContextVar("read_alias", default=None)
+
+
+@contextmanager
+def reads_from_primary():
+    """for reads whose result outlives the request, e.g. what is cached
+    under the versions bumped by a write the replica may not have yet"""
+    token = read_alias.set(None)
+    try:
+        yield
+    finally:
+        read_alias.reset(token)
+
+
+def token_user_id(request):
+    """id of the user whose valid JWT the request carries, without a
+    query; None for anonymous requests"""
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = header and authentication.get_raw_token(header)
+    if not raw_token:
+        return None
+    try:
+        token = authentication.get_validated_token(raw_token)
+    except InvalidToken:
+        return None
+    return token.get(jwt_settings.USER_ID_CLAIM)
+
+
+def pin_to_primary(user_id):
+    caches[settings.REPLICA_PIN_CACHE].set(
+        PIN_KEY.format(user_id), True, settings.REPLICA_STICKY_SECONDS
+    )
+
+
+def is_pinned_to_primary(user_id):
+    return (
+        caches[settings.REPLICA_PIN_CACHE].get(PIN_KEY.format(user_id))
+        is not None
+    )
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = read_alias.get()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        instance = hints.get("instance")
+        if (
+            instance is not None
+            and instance._state.db == settings.REPLICA_DATABASE_ALIAS
+        ):
+            # the replica is read only, rows read from it are saved to the
+            # primary
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, settings.REPLICA_DATABASE_ALIAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == settings.REPLICA_DATABASE_ALIAS:
+            # it gets the schema from the primary
+            return False
+        return None
@@ -0,0 +1,271 @@
+import logging
+import pathlib
+import threading
+import time
+import uuid
+from contextlib import ExitStack
+
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.db import connections
+from django.utils.decorators import sync_and_async_middleware
+from django.utils.text import slugify
+from rest_framework.permissions import SAFE_METHODS
+
+from planetarium_api_service.db_router import (
+    is_pinned_to_primary,
+    pin_to_primary,
+    read_alias,
+    reads_from_primary,
+    token_user_id,
+)
+from planetarium_api_service.profiling import Sampler
+
+logger = logging.getLogger(__name__)
+
+
+@sync_and_async_middleware
+class ProfileMiddleware:
+    """Profiles the requests of staff users that send an X-Profile
+    header, see planetarium_api_service.profiling.
+
+    The folded stacks, from this middleware down, are written to a file in
+    PROFILE_DIR named by the X-Profile-File response header. Staff users
+    are told apart by their JWT. Requests without the header only pay for
+    looking it up. Under ASGI the event loop thread is sampled: the
+    queries of the async ORM run in sync_to_async threads and show up as
+    awaits, and other requests on the loop are sampled too.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        profile = request.META.get("HTTP_X_PROFILE", "0") != "0"
+        if not profile or not self.is_staff(request):
+            return self.get_response(request)
+
+        sampler = self.start_sampler(ProfileMiddleware.__call__)
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.stop()
+        return self.add_profile(request, response, sampler)
+
+    async def __acall__(self, request):
+        profile = request.META.get("HTTP_X_PROFILE", "0") != "0"
+        if not profile or not await sync_to_async(self.is_staff)(request):
+            return await self.get_response(request)
+
+        sampler = self.start_sampler(ProfileMiddleware.__acall__)
+        try:
+            response = await self.get_response(request)
+        finally:
+            sampler.stop()
+        return await sync_to_async(self.add_profile)(
+            request, response, sampler
+        )
+
+    @staticmethod
+    def start_sampler(root):
+        sampler = Sampler(
+            threading.get_ident(),
+            settings.PROFILE_INTERVAL,
+            root_code=root.__code__,
+        )
+        sampler.start()
+        return sampler
+
+    def add_profile(self, request, response, sampler):
+        path = self.profile_path(request)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        sampler.write_folded(path)
+        response["X-Profile-File"] = path.name
+        response["X-Profile-Samples"] = sampler.samples
+        response["X-Profile-Time-ms"] = f"{sampler.duration * 1000:.2f}"
+        return response
+
+    @staticmethod
+    def is_staff(request):
+        user_id = token_user_id(request)
+        return (
+            user_id is not None
+            and get_user_model()
+            .objects.filter(pk=user_id, is_active=True, is_staff=True)
+            .exists()
+        )
+
+    @staticmethod
+    def profile_path(request):
+        name = "-".join(
+            (
+                time.strftime("%Y%m%d-%H%M%S"),
+                request.method.lower(),
+                slugify(request.path.replace("/", " "))[:80],
+                uuid.uuid4().hex[:8],
+            )
+        )
+        return pathlib.Path(settings.PROFILE_DIR) / f"{name}.folded"
+
+
+class QueryStats:
+    """execute wrapper that counts the SQL statements of a request, their
+    total time and the slowest one"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest_duration = 0.0
+        self.slowest_sql = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.duration += duration
+            if duration >= self.slowest_duration:
+                self.slowest_duration = duration
+                self.slowest_sql = sql
+
+
+@sync_and_async_middleware
+class QueryStatsMiddleware:
+    """Records the SQL queries of every request on request.query_stats.
+
+    Staff users also get them back as X-DB-Queries, X-DB-Time-ms and
+    X-DB-Slowest-ms response headers. Under ASGI the wrappers go on the
+    connections of the thread sync_to_async keeps for the request, where
+    the async ORM runs its queries.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.query_stats = stats = QueryStats()
+        with self.wrap_connections(stats):
+            response = self.get_response(request)
+        self.report(request, response, stats)
+        return response
+
+    async def __acall__(self, request):
+        request.query_stats = stats = QueryStats()
+        wrappers = await sync_to_async(self.wrap_connections)(stats)
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            await sync_to_async(wrappers.close)()
+            raise
+        # one hop to the thread of the wrappers, request.user may still
+        # have to be loaded there too
+        await sync_to_async(self.finish)(wrappers, request, response, stats)
+        return response
+
+    def finish(self, wrappers, request, response, stats):
+        wrappers.close()
+        self.report(request, response, stats)
+
+    @staticmethod
+    def wrap_connections(stats):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(stats))
+        return stack
+
+    @staticmethod
+    def report(request, response, stats):
+        logger.debug(
+            "%s %s: %d queries in %.1f ms, slowest %.1f ms: %s",
+            request.method,
+            request.path,
+            stats.count,
+            stats.duration * 1000,
+            stats.slowest_duration * 1000,
+            stats.slowest_sql,
+        )
+        user = getattr(request, "user", None)
+        if user is not None and user.is_staff:
+            response["X-DB-Queries"] = stats.count
+            response["X-DB-Time-ms"] = f"{stats.duration * 1000:.2f}"
+            response["X-DB-Slowest-ms"] = (
+                f"{stats.slowest_duration * 1000:.2f}"
+            )
+
+
+@sync_and_async_middleware
+class ReplicaRoutingMiddleware:
+    """Lets safe requests to the views of REPLICA_ROUTED_APPS read from
+    the replica, unless their user wrote within REPLICA_STICKY_SECONDS.
+
+    Users are told apart by their JWT. Not used without a replica in
+    DATABASES. The REPLICA_PIN_CACHE cache has to be shared by all the
+    processes, a pin in a local memory cache would only be seen by the
+    process that served the write.
+    """
+
+    def __init__(self, get_response):
+        if settings.REPLICA_DATABASE_ALIAS not in settings.DATABASES:
+            raise MiddlewareNotUsed()
+        if isinstance(caches[settings.REPLICA_PIN_CACHE], LocMemCache):
+            raise ImproperlyConfigured(
+                f"REPLICA_PIN_CACHE={settings.REPLICA_PIN_CACHE!r} is a local "
+                "memory cache, reading from a replica needs a cache shared "
+                "by all processes."
+            )
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with reads_from_primary():
+            response = self.get_response(request)
+        user_id = self.writer_id(request, response)
+        if user_id is not None:
+            pin_to_primary(user_id)
+        return response
+
+    async def __acall__(self, request):
+        with reads_from_primary():
+            response = await self.get_response(request)
+        user_id = self.writer_id(request, response)
+        if user_id is not None:
+            await sync_to_async(pin_to_primary)(user_id)
+        return response
+
+    @staticmethod
+    def writer_id(request, response):
+        """id of the user who wrote with the request, None for reads"""
+        if request.method in SAFE_METHODS or response.status_code >= 400:
+            return None
+        return token_user_id(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in SAFE_METHODS or not set(
+            request.resolver_match.app_names
+        ).intersection(settings.REPLICA_ROUTED_APPS):
+            return None
+        user_id = token_user_id(request)
+        if user_id is None or not is_pinned_to_primary(user_id):
+            read_alias.set(settings.REPLICA_DATABASE_ALIAS)
+        return None
@@ -0,0 +1,84 @@
+"""Sampling profiler for single requests.
+
+A Sampler reads the stack of the thread serving a request from a thread
+of its own every PROFILE_INTERVAL seconds and counts how often it saw
+each stack. The counts are written in the folded format of flamegraph.pl,
+also read by speedscope: one line per stack, frames from the outermost
+to the innermost joined by ";", then the number of samples.
+
+Nothing runs between samples, the profiled request pays for a stack walk
+per sample only. A request thread running Python code lets the sampler
+in once per sys.getswitchinterval() at the latest, waiting on the
+database or the network it lets it in right away.
+"""
+
+import sys
+import threading
+import time
+from collections import Counter
+
+
+def frame_label(frame):
+    """module:qualname of the function; methods are named after the class
+    of self, so Serializer.to_representation run for a
+    ShowSessionListSerializer reads
+    planetarium.serializers:ShowSessionListSerializer.to_representation"""
+    code = frame.f_code
+    if code.co_argcount and code.co_varnames[0] == "self":
+        instance = frame.f_locals.get("self")
+        if instance is not None:
+            cls = type(instance)
+            return f"{cls.__module__}:{cls.__qualname__}.{code.co_name}"
+    return f"{frame.f_globals.get('__name__', '?')}:{code.co_qualname}"
+
+
+def folded_stack(frame, root_code=None):
+    """the frames from frame outwards up to and including the one running
+    root_code, outermost first"""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        if frame.f_code is root_code:
+            break
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class Sampler:
+    """counts the folded stacks of the thread thread_id, sampled every
+    interval seconds between start() and stop()"""
+
+    def __init__(self, thread_id, interval, root_code=None):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.root_code = root_code
+        self.stacks = Counter()
+        self.duration = 0.0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="request-sampler", daemon=True
+        )
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self._started
+
+    @property
+    def samples(self):
+        return sum(self.stacks.values())
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[folded_stack(frame, self.root_code)] += 1
+
+    def write_folded(self, path):
+        with open(path, "w") as file:
+            for stack, count in sorted(self.stacks.items()):
+                file.write(f"{stack} {count}\n")
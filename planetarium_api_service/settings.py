@@ -39,25 +39,45 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "user",
     "planetarium",
     "rest_framework",
-    "debug_toolbar",
     "rest_framework_simplejwt",
     "drf_spectacular",
+    "django_filters",
 ]
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
+    "planetarium_api_service.middleware.ProfileMiddleware",
+    "planetarium_api_service.middleware.QueryStatsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "planetarium_api_service.middleware.ReplicaRoutingMiddleware",
 ]
 
+# the toolbar costs time on every request, even with DEBUG off; profile
+# single requests with an X-Profile header instead
+if DEBUG:
+    INSTALLED_APPS.append("debug_toolbar")
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index(
+            "planetarium_api_service.middleware.QueryStatsMiddleware"
+        )
+        + 1,
+        "debug_toolbar.middleware.DebugToolbarMiddleware",
+    )
+
+# staff requests with an X-Profile header are sampled every PROFILE_INTERVAL
+# seconds, the folded stacks are written to PROFILE_DIR
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "/files/profiles")
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL", 0.001))
+
 ROOT_URLCONF = "planetarium_api_service.urls"
 
 TEMPLATES = [
@@ -78,17 +98,49 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "planetarium_api_service.wsgi.application"
 
+# Connections come from a psycopg_pool pool per process, checked when
+# they are taken from it. Its stats are at /api/metrics/db-pool/.
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": "planetarium_api_service.db_pool",
         "NAME": os.environ.get("POSTGRES_DB"),
         "USER": os.environ.get("POSTGRES_USER"),
         "PASSWORD": os.environ.get("POSTGRES_PASSWORD"),
         "HOST": os.environ.get("POSTGRES_HOST"),
         "PORT": os.environ.get("POSTGRES_PORT"),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "pool": {
+                "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", 2)),
+                "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+                # seconds a request waits for a connection
+                "timeout": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+            },
+        },
     }
 }
 
+# Safe requests to the planetarium and user endpoints read from the
+# replica when POSTGRES_REPLICA_HOST is set. Point it at the primary to
+# try the routing locally, the test runner mirrors it to the test database.
+REPLICA_DATABASE_ALIAS = os.environ.get("REPLICA_DATABASE_ALIAS", "replica")
+if os.environ.get("POSTGRES_REPLICA_HOST"):
+    DATABASES[REPLICA_DATABASE_ALIAS] = {
+        **DATABASES["default"],
+        "HOST": os.environ["POSTGRES_REPLICA_HOST"],
+        "PORT": os.environ.get(
+            "POSTGRES_REPLICA_PORT", DATABASES["default"]["PORT"]
+        ),
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_ROUTERS = ["planetarium_api_service.db_router.ReplicaRouter"]
+REPLICA_ROUTED_APPS = ("planetarium", "user")
+# a user who wrote reads from the primary for this long
+REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", 10))
+# the pins have to be seen by every process, so with a replica this names
+# a shared cache, e.g. "catalog" with CATALOG_CACHE=db
+REPLICA_PIN_CACHE = os.environ.get("REPLICA_PIN_CACHE", "catalog")
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -143,12 +195,59 @@ REST_FRAMEWORK = {
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_PAGINATION_CLASS": "planetarium.pagination.KeysetPagination",
+    "DEFAULT_FILTER_BACKENDS": [
+        "django_filters.rest_framework.DjangoFilterBackend"
+    ],
+    "PAGE_SIZE": 20,
+    # token buckets in the database, shared by all worker processes
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "planetarium.throttling.AnonTokenBucketThrottle",
+        "planetarium.throttling.UserTokenBucketThrottle",
+        "planetarium.throttling.ScopedTokenBucketThrottle",
     ],
-    "DEFAULT_THROTTLE_RATES": {"anon": "30/day", "user": "100/day"},
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": "30/day",
+        "user": "100/day",
+        "booking": "10/hour",
+    },
+}
+# CATALOG_CACHE picks one of these. locmem suits a single process only:
+# a write bumps the catalog versions in the cache of the process that
+# served it, the other workers keep serving their copies until the
+# timeout. Deployments with several workers set "db" (after
+# createcachetable) or "file" on a volume all of them mount.
+CATALOG_CACHE_BACKENDS = {
+    "locmem": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "planetarium-catalog",
+    },
+    "file": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ.get(
+            "CATALOG_CACHE_LOCATION", "/files/cache/catalog"
+        ),
+    },
+    "db": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "planetarium_catalog_cache",
+    },
 }
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "catalog": {
+        **CATALOG_CACHE_BACKENDS[os.environ.get("CATALOG_CACHE", "locmem")],
+        "TIMEOUT": int(os.environ.get("CATALOG_CACHE_TIMEOUT", 900)),
+    },
+}
+# hit/miss counters for catalog_cache_stats, two cache writes per request
+CATALOG_CACHE_STATS = os.environ.get("CATALOG_CACHE_STATS") == "1"
+SEAT_HOLD_TTL = timedelta(
+    seconds=int(os.environ.get("SEAT_HOLD_TTL_SECONDS", 600))
+)
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=5),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=5),
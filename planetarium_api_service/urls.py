@@ -30,6 +30,8 @@ from rest_framework_simplejwt.views import (
     TokenVerifyView,
 )
 
+from planetarium_api_service.views import DatabasePoolMetricsView
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path(
@@ -37,7 +39,6 @@ urlpatterns = [
         include("planetarium.urls", namespace="planetarium"),
     ),
     path("api/user/", include("user.urls", namespace="user_authenticate")),
-    path("__debug__/", include("debug_toolbar.urls")),
     path(
         "api/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"
     ),
@@ -45,6 +46,11 @@ urlpatterns = [
         "api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"
     ),
     path("token/verify/", TokenVerifyView.as_view(), name="token_verify"),
+    path(
+        "api/metrics/db-pool/",
+        DatabasePoolMetricsView.as_view(),
+        name="db-pool-metrics",
+    ),
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     path(
         "api/schema/swagger-ui/",
@@ -57,3 +63,6 @@ urlpatterns = [
         name="redoc",
     ),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+
+if settings.DEBUG:
+    urlpatterns.append(path("__debug__/", include("debug_toolbar.urls")))
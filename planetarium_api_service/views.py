@@ -0,0 +1,23 @@
+from django.db import connections
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+
+class DatabasePoolMetricsView(APIView):
+    """stats of the connection pool of every pooled database alias, of
+    the process serving the request"""
+
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(responses=OpenApiTypes.OBJECT)
+    def get(self, request):
+        metrics = {}
+        for connection in connections.all():
+            pool_stats = getattr(connection, "pool_stats", None)
+            stats = pool_stats() if pool_stats is not None else None
+            if stats is not None:
+                metrics[connection.alias] = stats
+        return Response(metrics)